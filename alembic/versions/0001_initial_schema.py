@@ -0,0 +1,73 @@
+"""Schéma initial (users, businesses, transactions, expenses)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+Correspond aux tables créées jusqu'ici par create_tables(). Sur une base
+existante, marquer cette révision sans l'exécuter: alembic stamp 0001
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("password_hash", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "businesses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("sector", sa.String(), nullable=True),
+        sa.Column("currency", sa.String(), nullable=True),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+    )
+    op.create_index("ix_businesses_id", "businesses", ["id"])
+
+    op.create_table(
+        "transactions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("payment_method", sa.String(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("business_id", sa.Integer(), sa.ForeignKey("businesses.id"), nullable=False),
+    )
+
+    op.create_table(
+        "expenses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("business_id", sa.Integer(), sa.ForeignKey("businesses.id"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("expenses")
+    op.drop_table("transactions")
+    op.drop_index("ix_businesses_id", table_name="businesses")
+    op.drop_table("businesses")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_table("users")
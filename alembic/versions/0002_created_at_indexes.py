@@ -0,0 +1,27 @@
+"""Index (business_id, created_at) pour les filtres par plage de dates
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_transactions_business_created_at", "transactions", ["business_id", "created_at"])
+    op.create_index("ix_expenses_business_created_at", "expenses", ["business_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_expenses_business_created_at", table_name="expenses")
+    op.drop_index("ix_transactions_business_created_at", table_name="transactions")
@@ -0,0 +1,33 @@
+"""Table des taux de change journaliers
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "fx_rates",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("currency", sa.String(), nullable=False),
+        sa.Column("rate_date", sa.Date(), nullable=False),
+        sa.Column("rate", sa.Float(), nullable=False),
+        sa.UniqueConstraint("currency", "rate_date", name="uq_fx_rates_currency_date"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("fx_rates")
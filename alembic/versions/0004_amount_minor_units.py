@@ -0,0 +1,46 @@
+"""Montants en unités mineures entières (amount -> amount_minor BIGINT)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MINOR_UNITS = 100
+TABLES = ("transactions", "expenses")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        # Ajout nullable, remplissage, puis NOT NULL et suppression de l'ancienne colonne
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column("amount_minor", sa.BigInteger(), nullable=True))
+
+        op.execute(f"UPDATE {table} SET amount_minor = ROUND(amount * {MINOR_UNITS})")
+
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column("amount_minor", existing_type=sa.BigInteger(), nullable=False)
+            batch_op.drop_column("amount")
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column("amount", sa.Float(), nullable=True))
+
+        op.execute(f"UPDATE {table} SET amount = amount_minor / {float(MINOR_UNITS)}")
+
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column("amount", existing_type=sa.Float(), nullable=False)
+            batch_op.drop_column("amount_minor")
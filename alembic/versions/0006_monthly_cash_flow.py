@@ -0,0 +1,59 @@
+"""Cash flow mensuel par moyen de paiement (table maintenue à l'écriture)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "monthly_cash_flow",
+        sa.Column("business_id", sa.Integer(), sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.Column("payment_method", sa.String(), nullable=False),
+        sa.Column("amount_minor", sa.BigInteger(), nullable=False),
+        sa.Column("transaction_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("business_id", "year", "month", "payment_method"),
+    )
+
+    # Remplissage initial depuis l'historique des transactions
+    transactions = sa.table(
+        "transactions",
+        sa.column("business_id", sa.Integer()),
+        sa.column("created_at", sa.DateTime()),
+        sa.column("payment_method", sa.String()),
+        sa.column("amount_minor", sa.BigInteger()),
+    )
+    year = sa.cast(sa.extract("year", transactions.c.created_at), sa.Integer())
+    month = sa.cast(sa.extract("month", transactions.c.created_at), sa.Integer())
+    op.execute(
+        sa.table(
+            "monthly_cash_flow",
+            sa.column("business_id"), sa.column("year"), sa.column("month"),
+            sa.column("payment_method"), sa.column("amount_minor"), sa.column("transaction_count"),
+        ).insert().from_select(
+            ["business_id", "year", "month", "payment_method", "amount_minor", "transaction_count"],
+            sa.select(
+                transactions.c.business_id, year, month, transactions.c.payment_method,
+                sa.func.sum(transactions.c.amount_minor), sa.func.count()
+            ).group_by(transactions.c.business_id, year, month, transactions.c.payment_method)
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("monthly_cash_flow")
@@ -0,0 +1,140 @@
+"""Partitionnement mensuel de transactions / expenses (PostgreSQL) et agrégats des mois archivés
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("transactions", "expenses")
+MONTHS_AHEAD = 3
+
+
+def _add_months(start: datetime, months: int) -> datetime:
+    index = start.year * 12 + start.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _literal(moment: datetime) -> str:
+    return moment.strftime("'%Y-%m-%d %H:%M:%S'")
+
+
+def _partition(table: str) -> None:
+    """Recrée `table` partitionnée par mois sur created_at et y recopie les lignes"""
+    bind = op.get_bind()
+    sequence = bind.execute(sa.text(f"SELECT pg_get_serial_sequence('{table}', 'id')")).scalar()
+    first = bind.execute(sa.text(f"SELECT min(created_at) FROM {table}")).scalar() or datetime.utcnow()
+
+    # La séquence des ids survit à l'ancienne table
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned")
+    op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_unpartitioned_pkey")
+    op.execute(f"DROP INDEX ix_{table}_business_created_at")
+
+    # La clé primaire d'une table partitionnée doit contenir la clé de partition
+    op.execute(f"CREATE TABLE {table} (LIKE {table}_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)")
+    op.execute(
+        f"ALTER TABLE {table} ADD CONSTRAINT {table}_business_id_fkey "
+        f"FOREIGN KEY (business_id) REFERENCES businesses (id)"
+    )
+    op.execute(f"CREATE INDEX ix_{table}_business_created_at ON {table} (business_id, created_at)")
+
+    start = datetime(first.year, first.month, 1)
+    last = _add_months(datetime(datetime.utcnow().year, datetime.utcnow().month, 1), MONTHS_AHEAD)
+    while start <= last:
+        end = _add_months(start, 1)
+        op.execute(
+            f"CREATE TABLE {table}_p{start:%Y_%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ({_literal(start)}) TO ({_literal(end)})"
+        )
+        start = end
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    op.execute(f"INSERT INTO {table} SELECT * FROM {table}_unpartitioned")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+    op.execute(f"DROP TABLE {table}_unpartitioned")
+
+
+def _unpartition(table: str) -> None:
+    bind = op.get_bind()
+    sequence = bind.execute(sa.text(f"SELECT pg_get_serial_sequence('{table}', 'id')")).scalar()
+
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+    op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_partitioned_pkey")
+    op.execute(f"ALTER INDEX ix_{table}_business_created_at RENAME TO ix_{table}_partitioned_business_created_at")
+
+    op.execute(f"CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS)")
+    op.execute(f"INSERT INTO {table} SELECT * FROM {table}_partitioned")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+    op.execute(
+        f"ALTER TABLE {table} ADD CONSTRAINT {table}_business_id_fkey "
+        f"FOREIGN KEY (business_id) REFERENCES businesses (id)"
+    )
+    op.execute(f"CREATE INDEX ix_{table}_business_created_at ON {table} (business_id, created_at)")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+    op.execute(f"DROP TABLE {table}_partitioned CASCADE")
+
+
+def upgrade() -> None:
+    # Clé de partitionnement: created_at obligatoire (toutes bases, pour un schéma identique)
+    for table in TABLES:
+        op.execute(f"UPDATE {table} SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column("created_at", existing_type=sa.DateTime(), nullable=False)
+
+    op.create_table(
+        "archived_monthly_totals",
+        sa.Column("business_id", sa.Integer(), sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("payment_method", sa.String(), nullable=False),
+        sa.Column("amount_minor", sa.BigInteger(), nullable=False),
+        sa.Column("entry_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("business_id", "year", "month", "kind", "category", "payment_method"),
+    )
+    op.create_table(
+        "archived_partitions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("partition_name", sa.String(), nullable=False, unique=True),
+        sa.Column("range_start", sa.DateTime(), nullable=False),
+        sa.Column("range_end", sa.DateTime(), nullable=False),
+        sa.Column("row_count", sa.BigInteger(), nullable=False),
+        sa.Column("path", sa.String(), nullable=False),
+        sa.Column("sha256", sa.String(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+    )
+
+    # Partitionnement déclaratif: PostgreSQL uniquement (SQLite garde des tables simples)
+    if op.get_bind().dialect.name == "postgresql":
+        for table in TABLES:
+            _partition(table)
+
+
+def downgrade() -> None:
+    # Les mois archivés (fichiers COPY) ne sont pas rechargés: restaurer avant de redescendre
+    if op.get_bind().dialect.name == "postgresql":
+        for table in TABLES:
+            _unpartition(table)
+
+    op.drop_table("archived_partitions")
+    op.drop_table("archived_monthly_totals")
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column("created_at", existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,137 @@
+
+# AFRIFLOW/backend/app/access.py : contrôle d'accès aux entreprises (cache des entreprises possédées)
+#
+# Chaque route vérifiait la propriété d'une entreprise par une requête
+# businesses (id, owner_id), parfois deux fois par requête HTTP. L'ensemble
+# des ids possédés par un utilisateur est désormais gardé:
+#   - pour la requête en cours dans session.info (mémo par session),
+#   - pour le processus pendant BUSINESS_ACCESS_TTL_SECONDS.
+# Le claim bids d'un jeton récent remplace les deux (aucune requête).
+# Une entreprise absente de l'ensemble est relue en base avant de refuser
+# (créée par un autre worker). Le cache est invalidé au commit d'une création
+# ou suppression d'entreprise (et d'un utilisateur, dont l'id peut être réutilisé).
+
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.auth import get_current_user
+from app.config import BUSINESS_ACCESS_TTL_SECONDS
+from app.database import get_db
+from app.models import models
+
+FORBIDDEN = "Vous n'avez pas accès à ce business"
+
+
+class BusinessAccessCache:
+    """Ids des entreprises possédées par utilisateur, en mémoire du processus avec expiration"""
+
+    MEMO_KEY = "owned_business_ids"
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._owned: Dict[int, Tuple[float, FrozenSet[int]]] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """Oublie un utilisateur (ou tous)"""
+        with self._lock:
+            if user_id is None:
+                self._owned.clear()
+            else:
+                self._owned.pop(user_id, None)
+
+    def _load(self, db: Session, user_id: int) -> FrozenSet[int]:
+        owned = frozenset(db.scalars(select(models.Business.id).where(models.Business.owner_id == user_id)))
+        with self._lock:
+            self._owned[user_id] = (time.monotonic() + self.ttl_seconds, owned)
+        return owned
+
+    def owned(self, db: Session, user_id: int, refresh: bool = False) -> FrozenSet[int]:
+        """Ids possédés: mémo de la session, puis cache du processus, puis base"""
+        memo = db.info.setdefault(self.MEMO_KEY, {})
+        if not refresh and user_id in memo:
+            return memo[user_id][1]
+
+        cached = None if refresh else self._owned.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            memo[user_id] = (False, cached[1])
+        else:
+            memo[user_id] = (True, self._load(db, user_id))
+        return memo[user_id][1]
+
+    def remember(self, db: Session, user_id: int, business_ids: Iterable[int]):
+        """Ids connus par ailleurs pour la requête (claim bids du jeton, voir app.auth)"""
+        db.info.setdefault(self.MEMO_KEY, {})[user_id] = (False, frozenset(business_ids))
+
+    def has_access(self, db: Session, user_id: int, business_id: int) -> bool:
+        if business_id in self.owned(db, user_id):
+            return True
+        # Absente du cache: relue une fois par session avant de refuser
+        fresh, _ = db.info[self.MEMO_KEY][user_id]
+        return not fresh and business_id in self.owned(db, user_id, refresh=True)
+
+
+business_access = BusinessAccessCache(BUSINESS_ACCESS_TTL_SECONDS)
+
+
+def check_business_access(
+    db: Session,
+    user_id: int,
+    business_id: int,
+    status_code: int = 403,
+    detail: str = FORBIDDEN
+) -> int:
+    """Lève une HTTPException si l'utilisateur ne possède pas l'entreprise"""
+    if not business_access.has_access(db, user_id, business_id):
+        raise HTTPException(status_code=status_code, detail=detail)
+    return business_id
+
+
+def require_business_access(
+    business_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+) -> int:
+    """Dépendance FastAPI: business_id (chemin ou paramètre) appartenant à l'utilisateur, sinon 403"""
+    return check_business_access(db, current_user.id, business_id)
+
+
+def optional_business_access(
+    business_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+) -> Optional[int]:
+    """Comme require_business_access pour un filtre ?business_id= facultatif"""
+    if not business_id:
+        return None
+    return check_business_access(db, current_user.id, business_id)
+
+
+# Invalidation: propriétaires des entreprises créées / supprimées, relevés au
+# flush et oubliés au commit (un rollback ne change rien).
+@event.listens_for(Session, "after_flush")
+def _collect_owners(session, flush_context):
+    owners = session.info.setdefault("access_owners", set())
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, models.Business):
+            owners.add(obj.owner_id)
+        elif isinstance(obj, models.User):
+            owners.add(obj.id)
+    if owners:
+        session.info.pop(BusinessAccessCache.MEMO_KEY, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_owners(session):
+    for user_id in session.info.pop("access_owners", ()):
+        business_access.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_owners(session):
+    session.info.pop("access_owners", None)
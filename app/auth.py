@@ -1,15 +1,23 @@
 
 # AFRIFLOW/backend/app/auth.py
 
+import logging
+import threading
+import time
+from dataclasses import dataclass
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.cache import get_redis
+from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, TOKEN_BUSINESS_SCOPE_SECONDS
 from app.database import get_db
 
+logger = logging.getLogger(__name__)
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
@@ -25,16 +33,108 @@ def create_access_token(data: dict) -> str:
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def create_user_token(user, business_ids: Optional[Iterable[int]] = None) -> str:
+    """Jeton portant les claims d'autorisation: sub (email), uid, ver et, si fournis, bids
+
+    bids (entreprises possédées) n'est valable que TOKEN_BUSINESS_SCOPE_SECONDS
+    (claim bids_exp): passé ce délai, le contrôle d'accès repasse par le cache
+    serveur (app.access).
+    """
+    claims = {"sub": user.email, "uid": user.id, "ver": user.token_version or 1}
+    if business_ids is not None and TOKEN_BUSINESS_SCOPE_SECONDS > 0:
+        claims["bids"] = sorted(business_ids)
+        claims["bids_exp"] = int(time.time()) + TOKEN_BUSINESS_SCOPE_SECONDS
+    return create_access_token(claims)
+
+
+@dataclass(frozen=True)
+class TokenUser:
+    """Utilisateur authentifié d'après les claims du jeton, sans lecture de la table users"""
+    id: int
+    email: str
+    token_version: int
+
+
+class TokenRevocationList:
+    """Version minimale des jetons acceptés par utilisateur (jetons antérieurs révoqués)
+
+    Partagée entre workers via Redis quand il est activé. Sans Redis, la
+    mémoire du processus ne connaît que ses propres révocations: is_revoked
+    renvoie alors None et l'appelant relit token_version en base (les autres
+    workers doivent voir un /users/logout-all). Une entrée n'a pas à survivre
+    aux jetons qu'elle révoque: elle expire avec eux (ACCESS_TOKEN_EXPIRE_MINUTES).
+    """
+
+    KEY_PREFIX = "afriflow:auth:min_version:"
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._local: Dict[int, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, user_id: int, min_version: int):
+        """Refuse désormais les jetons de `user_id` de version < `min_version`"""
+        with self._lock:
+            self._local[user_id] = (min_version, time.monotonic() + self.ttl_seconds)
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(f"{self.KEY_PREFIX}{user_id}", min_version, ex=self.ttl_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ Redis indisponible pour la révocation des jetons: {e}")
+
+    def is_revoked(self, user_id: int, version: int) -> Optional[bool]:
+        """True / False, ou None si aucun état partagé n'a pu être consulté (Redis désactivé ou en panne)"""
+        entry = self._local.get(user_id)
+        if entry is not None:
+            if entry[1] <= time.monotonic():
+                with self._lock:
+                    self._local.pop(user_id, None)
+            elif version < entry[0]:
+                return True
+
+        client = get_redis()
+        if client is not None:
+            try:
+                min_version = client.get(f"{self.KEY_PREFIX}{user_id}")
+                return min_version is not None and version < int(min_version)
+            except Exception as e:
+                logger.warning(f"⚠️ Redis indisponible pour la révocation des jetons: {e}")
+        return None
+
+
+revoked_tokens = TokenRevocationList(ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 # Import models ici pour éviter les imports circulaires
 from app.models import models as db_models
+from app.services.token_service import revoke_user_refresh_tokens
+
+def revoke_user_tokens(db: Session, user_id: int) -> int:
+    """Révocation en masse: jetons d'accès émis (token_version) et jetons de rafraîchissement
+
+    Renvoie la nouvelle version.
+    """
+    user = db.get(db_models.User, user_id)
+    user.token_version = (user.token_version or 1) + 1
+    revoke_user_refresh_tokens(db, user_id)
+    db.commit()
+    revoked_tokens.revoke(user_id, user.token_version)
+    logger.info(f"🔒 Jetons de l'utilisateur {user_id} révoqués (version {user.token_version})")
+    return user.token_version
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """Utilisateur du jeton
+
+    Jetons à claims uid / ver: seule la liste de révocation est consultée
+    (Redis; sans Redis, une lecture de users.token_version par clé primaire); bids (s'il n'a pas expiré) alimente le contrôle d'accès de la
+    requête. Jetons plus anciens (sub seul): lecture de l'utilisateur par email.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -43,8 +143,28 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(db_models.User).filter(db_models.User.email == email).first()
-    if user is None:
-        raise credentials_exception
+    user_id = payload.get("uid")
+    version = payload.get("ver", 1)
+    if user_id is not None:
+        revoked = revoked_tokens.is_revoked(user_id, version)
+        if revoked is None:
+            # Pas d'état partagé entre workers: version courante lue par clé primaire
+            current = db.query(db_models.User.token_version).filter(db_models.User.id == user_id).scalar()
+            revoked = current is None or version < current
+        if revoked:
+            raise credentials_exception
+        user = TokenUser(id=user_id, email=email, token_version=version)
+
+        business_ids = payload.get("bids")
+        if business_ids is not None and payload.get("bids_exp", 0) > time.time():
+            from app.access import business_access
+
+            business_access.remember(db, user_id, business_ids)
+    else:
+        user = db.query(db_models.User).filter(db_models.User.email == email).first()
+        if user is None or version < user.token_version:
+            raise credentials_exception
 
-    return user
\ No newline at end of file
+    # Permet de rattacher les écritures de la session à l'utilisateur (voir app.replica)
+    db.info["user_id"] = user.id
+    return user
@@ -0,0 +1,28 @@
+
+# AFRIFLOW/backend/app/cache.py : client Redis partagé (optionnel)
+
+import logging
+from typing import Optional
+
+from app.config import REDIS_ENABLED, REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def get_redis() -> Optional["redis.Redis"]:
+    """Client Redis du processus, ou None si Redis est désactivé
+
+    Les appelants gardent un repli en mémoire: Redis sert à partager l'état
+    entre workers et instances, pas à faire fonctionner l'API.
+    """
+    global _client
+    if not REDIS_ENABLED:
+        return None
+    if _client is None:
+        import redis
+
+        _client = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+        logger.info("✅ Client Redis initialisé")
+    return _client
@@ -0,0 +1,177 @@
+
+# AFRIFLOW/backend/app/compression.py : compression des réponses (br / gzip) selon Accept-Encoding
+
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # Brotli est optionnel: sans le paquet, seul gzip est proposé
+    import brotli
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    brotli = None
+
+# Types de contenu qui gagnent à être compressés (JSON, texte, CSV...)
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "application/x-ndjson")
+
+
+class GzipEncoder:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data)
+        # Flush synchronisé en streaming: le client reçoit chaque morceau sans attendre la fin
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliEncoder:
+    encoding = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+def negotiate_encoding(accept_encoding: str, brotli_enabled: bool = True) -> Optional[str]:
+    """Choisit br puis gzip parmi les encodages acceptés (q > 0), sinon None"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name] = q
+
+    def allowed(name):
+        return accepted.get(name, accepted.get("*", 0)) > 0
+
+    if brotli is not None and brotli_enabled and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """Middleware ASGI: compresse les réponses au-delà de `minimum_size` octets
+
+    Gère les réponses en streaming (chaque morceau est compressé et envoyé
+    aussitôt) et ignore les réponses déjà encodées ou non compressibles.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        brotli_enabled: bool = True
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli_enabled = brotli_enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.brotli_enabled)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        if encoding == "br":
+            encoder = BrotliEncoder(self.brotli_quality)
+        else:
+            encoder = GzipEncoder(self.gzip_level)
+        await CompressionResponder(self.app, encoder, self.minimum_size)(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, encoder, minimum_size: int):
+        self.app = app
+        self.encoder = encoder
+        self.minimum_size = minimum_size
+        self.send: Optional[Send] = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _should_skip(self) -> bool:
+        headers = Headers(raw=self.initial_message["headers"])
+        content_type = headers.get("content-type", "")
+        return (
+            "content-encoding" in headers
+            or self.initial_message["status"] in (204, 304)
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+        )
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # En-têtes retenus jusqu'au premier morceau du corps
+            self.initial_message = message
+            self.passthrough = self._should_skip()
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body and len(body) < self.minimum_size:
+                # Petite réponse: la compression coûterait plus qu'elle ne rapporte
+                await self.send(self.initial_message)
+                await self.send(message)
+                self.passthrough = True
+                return
+
+            headers["Content-Encoding"] = self.encoder.encoding
+            if more_body:
+                del headers["Content-Length"]
+                message["body"] = self.encoder.compress(body, final=False)
+            else:
+                message["body"] = self.encoder.compress(body, final=True)
+                headers["Content-Length"] = str(len(message["body"]))
+            # ETag fort invalide une fois le corps transformé
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        message["body"] = self.encoder.compress(body, final=not more_body)
+        await self.send(message)
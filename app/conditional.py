@@ -0,0 +1,79 @@
+
+# AFRIFLOW/backend/app/conditional.py : ETag et GET conditionnels (If-None-Match -> 304)
+
+import hashlib
+from datetime import datetime
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from app.auth import get_current_user
+from app.config import HTTP_CACHE_CONFIG
+from app.models import models
+from app.replica import get_read_db
+from app.services.fx_service import fx_rates
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparaison faible: W/"x" et "x" sont équivalents
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def conditional_get(cache_name: str):
+    """Dépendance FastAPI: ETag calculé depuis data_version, 304 si inchangé
+
+    Exécutée avant le corps de l'endpoint, donc avant toute agrégation: une
+    seule requête légère sur businesses. L'ETag couvre le chemin, les
+    paramètres, la date du jour (séries relatives à aujourd'hui), la
+    version des données de chaque entreprise concernée et, pour les réponses
+    converties (?currency=), l'empreinte des taux de change chargés.
+    """
+    cache_control = HTTP_CACHE_CONFIG.get(cache_name, "private, no-cache")
+
+    def dependency(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_read_db),
+        current_user: models.User = Depends(get_current_user)
+    ):
+        business_id = request.path_params.get("business_id") or request.query_params.get("business_id")
+
+        query = db.query(models.Business.id, models.Business.data_version).filter(
+            models.Business.owner_id == current_user.id
+        )
+        if business_id:
+            try:
+                query = query.filter(models.Business.id == int(business_id))
+            except ValueError:
+                return
+        versions = query.order_by(models.Business.id).all()
+        if business_id and not versions:
+            # Entreprise inconnue ou d'un autre utilisateur: l'endpoint répond (403/404)
+            return
+
+        fx_version = ""
+        if request.query_params.get("currency"):
+            fx_rates.ensure_loaded(db)
+            fx_version = fx_rates.version
+
+        fingerprint = "|".join([
+            str(current_user.id),
+            request.url.path,
+            str(sorted(request.query_params.multi_items())),
+            datetime.utcnow().date().isoformat(),
+            ",".join(f"{b_id}:{version}" for b_id, version in versions),
+            fx_version
+        ])
+        etag = f'W/"{hashlib.sha1(fingerprint.encode()).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+
+    return dependency
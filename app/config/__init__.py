@@ -0,0 +1,297 @@
+
+# AFRIFLOW/backend/app/config/__init__.py
+
+import os
+import logging
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Pas de print à l'import: les messages passent par logging (configuré par le processus)
+logger = logging.getLogger(__name__)
+
+# Trouve le chemin absolu du dossier app/ (ce fichier est dans app/config/)
+BASE_DIR = Path(__file__).parent.parent.absolute()
+env_path = BASE_DIR / '.env'
+
+# Charge les variables depuis le fichier .env
+if env_path.exists():
+    load_dotenv(dotenv_path=env_path)
+    logger.debug(f"✅ Fichier .env chargé depuis: {env_path}")
+else:
+    logger.debug(f"Fichier .env absent: {env_path}")
+
+# ============================================
+# CONFIGURATION BASE DE DONNÉES
+# ============================================
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    logger.warning("⚠️  DATABASE_URL non définie")
+    # En production, on veut lever une erreur
+    if os.getenv("ENVIRONMENT") == "production":
+        raise ValueError("DATABASE_URL must be set in production")
+
+# Pool de connexions par rôle de processus (api: par worker uvicorn, worker, cron).
+# Budget prod: 3 instances x 4 workers x (3 + 2) + worker + cron < 100 connexions.
+PROCESS_ROLE = os.getenv("PROCESS_ROLE", "api")
+DB_POOL_DEFAULTS = {
+    "api": {"pool_size": 3, "max_overflow": 2},
+    "worker": {"pool_size": 2, "max_overflow": 1},
+    "cron": {"pool_size": 1, "max_overflow": 0},
+}
+
+def get_db_pool_config(role: str = None) -> dict:
+    """Configuration du pool pour un rôle; DB_POOL_SIZE / DB_MAX_OVERFLOW priment sur les défauts"""
+    role = role or PROCESS_ROLE
+    defaults = DB_POOL_DEFAULTS.get(role, DB_POOL_DEFAULTS["api"])
+    return {
+        "role": role,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", defaults["pool_size"])),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", defaults["max_overflow"])),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        # Mode PgBouncer (transaction pooling): pas de pool côté app ni de requêtes préparées
+        "pgbouncer": os.getenv("DB_PGBOUNCER", "false").lower() == "true",
+    }
+
+# Réplique en lecture (analytics, dashboard, exports). Sans URL, tout passe par le primaire.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+REPLICA_CONFIG = {
+    "max_lag_seconds": float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5")),
+    "lag_check_interval": float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "10")),
+    # Lecture sur le primaire pendant ce délai après une écriture du même utilisateur
+    "sticky_seconds": int(os.getenv("REPLICA_STICKY_SECONDS", "30"))
+}
+
+# ============================================
+# CONFIGURATION REDIS (pour le worker)
+# ============================================
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_ENABLED = os.getenv("REDIS_ENABLED", "false").lower() == "true"
+
+# ============================================
+# CONFIGURATION JWT / AUTH
+# ============================================
+SECRET_KEY = os.getenv("SECRET_KEY", "change_this_secret_key_in_production")
+if SECRET_KEY == "change_this_secret_key_in_production" and os.getenv("ENVIRONMENT") == "production":
+    raise ValueError("SECRET_KEY must be changed in production")
+
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))  # courte durée: renouvelé par /users/refresh
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+# Jeton déjà consommé rejoué dans ce délai avec un successeur inutilisé: réponse perdue, pas un vol
+REFRESH_REUSE_GRACE_SECONDS = int(os.getenv("REFRESH_REUSE_GRACE_SECONDS", "30"))
+# Claim "bids" (entreprises possédées) valable moins longtemps que le jeton; 0 = pas de claim
+TOKEN_BUSINESS_SCOPE_SECONDS = int(os.getenv("TOKEN_BUSINESS_SCOPE_SECONDS", "300"))
+# Cache des entreprises possédées par utilisateur (contrôle d'accès sans requête)
+BUSINESS_ACCESS_TTL_SECONDS = int(os.getenv("BUSINESS_ACCESS_TTL_SECONDS", "30"))
+
+# ============================================
+# CONFIGURATION SMTP (EMAILS)
+# ============================================
+SMTP_CONFIG = {
+    "host": os.getenv("SMTP_HOST", "smtp.gmail.com"),
+    "port": int(os.getenv("SMTP_PORT", "587")),
+    "user": os.getenv("SMTP_USER", ""),
+    "password": os.getenv("SMTP_PASSWORD", ""),
+    "from": os.getenv("SMTP_FROM", "noreply@afriflow.com"),
+    "admin_email": os.getenv("SMTP_ADMIN", "admin@afriflow.com"),
+    "enabled": os.getenv("SMTP_ENABLED", "false").lower() == "true"
+}
+
+# ============================================
+# CONFIGURATION TWILIO (SMS)
+# ============================================
+TWILIO_CONFIG = {
+    "account_sid": os.getenv("TWILIO_ACCOUNT_SID", ""),
+    "auth_token": os.getenv("TWILIO_AUTH_TOKEN", ""),
+    "phone_number": os.getenv("TWILIO_PHONE_NUMBER", ""),
+    "enabled": all([
+        os.getenv("TWILIO_ACCOUNT_SID"),
+        os.getenv("TWILIO_AUTH_TOKEN"), 
+        os.getenv("TWILIO_PHONE_NUMBER")
+    ])
+}
+
+# ============================================
+# CONFIGURATION PAIEMENTS MOBILE MONEY
+# ============================================
+ORANGE_MONEY_CONFIG = {
+    "api_key": os.getenv("ORANGE_MONEY_API_KEY", ""),
+    "api_secret": os.getenv("ORANGE_MONEY_SECRET", ""),
+    "enabled": bool(os.getenv("ORANGE_MONEY_API_KEY"))
+}
+
+MTN_MONEY_CONFIG = {
+    "api_key": os.getenv("MTN_MONEY_API_KEY", ""),
+    "api_user": os.getenv("MTN_MONEY_API_USER", ""),
+    "enabled": bool(os.getenv("MTN_MONEY_API_KEY"))
+}
+
+WAVE_CONFIG = {
+    "api_key": os.getenv("WAVE_API_KEY", ""),
+    "enabled": bool(os.getenv("WAVE_API_KEY"))
+}
+
+# ============================================
+# CONFIGURATION AWS (pour les backups)
+# ============================================
+AWS_CONFIG = {
+    "access_key_id": os.getenv("AWS_ACCESS_KEY_ID", ""),
+    "secret_access_key": os.getenv("AWS_SECRET_ACCESS_KEY", ""),
+    "region": os.getenv("AWS_REGION", "eu-west-3"),  # Paris par défaut
+    "bucket_name": os.getenv("AWS_BUCKET_NAME", "afriflow-backups"),
+    "endpoint_url": os.getenv("AWS_ENDPOINT_URL") or None,  # MinIO / S3 compatible
+    "enabled": all([
+        os.getenv("AWS_ACCESS_KEY_ID"),
+        os.getenv("AWS_SECRET_ACCESS_KEY"),
+        os.getenv("AWS_BUCKET_NAME")
+    ])
+}
+
+# ============================================
+# CONFIGURATION BACKUP
+# ============================================
+BACKUP_CONFIG = {
+    "retention_days": int(os.getenv("BACKUP_RETENTION_DAYS", "30")),
+    "backup_time": os.getenv("BACKUP_TIME", "02:00"),  # 2h du matin
+    "enabled": os.getenv("BACKUP_ENABLED", "true").lower() == "true",
+    "dir": os.getenv("BACKUP_DIR", "/data/backups"),
+    "compression": os.getenv("BACKUP_COMPRESSION", "zstd"),  # zstd (gzip si zstandard absent) ou gzip
+    "compression_level": int(os.getenv("BACKUP_COMPRESSION_LEVEL", "3")),
+    "chunk_size": int(os.getenv("BACKUP_CHUNK_SIZE", str(1024 * 1024))),  # Lecture de pg_dump par blocs
+    "keep_local": os.getenv("BACKUP_KEEP_LOCAL", "true").lower() == "true",  # false: dump envoyé seulement sur S3
+    "s3_part_size_mb": int(os.getenv("BACKUP_S3_PART_SIZE_MB", "16")),  # Mémoire: taille x (concurrence + 1); minimum S3 5 Mo
+    "s3_concurrency": int(os.getenv("BACKUP_S3_CONCURRENCY", "4")),  # Parties envoyées en parallèle
+    "s3_part_retries": int(os.getenv("BACKUP_S3_PART_RETRIES", "3")),
+    "files_dirs": os.getenv("BACKUP_FILES_DIRS", "/data/invoices,/data/reports,/data/logs").split(","),
+    "files_mode": os.getenv("BACKUP_FILES_MODE", "incremental"),  # incremental (chunks) ou full (tar.gz)
+    "files_chunk_size_mb": int(os.getenv("BACKUP_FILES_CHUNK_SIZE_MB", "4")),
+    "restore_jobs": int(os.getenv("BACKUP_RESTORE_JOBS", "4"))  # pg_restore -j
+}
+
+# ============================================
+# PARTITIONNEMENT MENSUEL / ARCHIVAGE (PostgreSQL)
+# ============================================
+PARTITION_CONFIG = {
+    "months_ahead": int(os.getenv("PARTITION_MONTHS_AHEAD", "3")),  # Partitions futures créées par le worker
+    "archive_after_months": int(os.getenv("ARCHIVE_AFTER_MONTHS", "24")),  # 0: archivage désactivé
+    "archive_dir": os.getenv("ARCHIVE_DIR", "/data/archives"),
+    "compression_level": int(os.getenv("ARCHIVE_COMPRESSION_LEVEL", "9"))
+}
+
+# ============================================
+# CONFIGURATION DEVISES / TAUX DE CHANGE
+# ============================================
+FX_CONFIG = {
+    "base_currency": os.getenv("FX_BASE_CURRENCY", "FCFA"),
+    "rates_file": os.getenv("FX_RATES_FILE", "/data/fx/rates.csv"),
+    "cache_ttl_seconds": int(os.getenv("FX_CACHE_TTL_SECONDS", "300"))
+}
+
+# ============================================
+# CONFIGURATION ENVIRONNEMENT
+# ============================================
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+
+# create_all() au démarrage de l'API: pratique en développement, mais en
+# production le schéma est géré par Alembic (scripts/migrate.py en pre-deploy)
+AUTO_CREATE_TABLES = os.getenv(
+    "AUTO_CREATE_TABLES", "false" if ENVIRONMENT == "production" else "true"
+).lower() == "true"
+
+# ============================================
+# CONFIGURATION CORS (Frontend)
+# ============================================
+ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:8080").split(",")
+
+# ============================================
+# CONFIGURATION RATE LIMITING
+# ============================================
+RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
+RATE_LIMIT_PERIOD = int(os.getenv("RATE_LIMIT_PERIOD", "60"))  # en secondes
+# Seaux à jetons: (requêtes, période en secondes). Actif par défaut en production seulement
+RATE_LIMIT_CONFIG = {
+    "enabled": os.getenv(
+        "RATE_LIMIT_ENABLED", "true" if ENVIRONMENT == "production" else "false"
+    ).lower() == "true",
+    "default": (RATE_LIMIT_REQUESTS, RATE_LIMIT_PERIOD),  # Toutes les routes, par IP
+    # Login / inscription / refresh, par IP: chaque login coûte un bcrypt
+    "auth": (int(os.getenv("RATE_LIMIT_AUTH_REQUESTS", "10")), int(os.getenv("RATE_LIMIT_AUTH_PERIOD", "60"))),
+    # Logins échoués par compte (email), quelle que soit l'IP: bourrage d'identifiants distribué
+    "account": (int(os.getenv("RATE_LIMIT_ACCOUNT_REQUESTS", "5")), int(os.getenv("RATE_LIMIT_ACCOUNT_PERIOD", "300"))),
+    # Proxys devant l'API (Render: 1); l'IP cliente est la n-ième depuis la fin de X-Forwarded-For
+    "proxy_hops": int(os.getenv("RATE_LIMIT_PROXY_HOPS", "1")),
+}
+
+# ============================================
+# CONFIGURATION CACHE HTTP (ETag / Cache-Control)
+# ============================================
+# Cache-Control par groupe d'endpoints; "no-cache" = revalidation systématique
+# par If-None-Match (304 tant que les données de l'entreprise n'ont pas changé)
+HTTP_CACHE_CONFIG = {
+    "dashboard": os.getenv("CACHE_CONTROL_DASHBOARD", "private, no-cache"),
+    "analytics": os.getenv("CACHE_CONTROL_ANALYTICS", "private, no-cache"),
+}
+
+# ============================================
+# CONFIGURATION COMPRESSION DES RÉPONSES
+# ============================================
+COMPRESSION_CONFIG = {
+    "enabled": os.getenv("COMPRESSION_ENABLED", "true").lower() == "true",
+    "minimum_size": int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),  # Octets; en dessous, réponse brute
+    "gzip_level": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+    "brotli_quality": int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4")),  # 4: bon compromis taille / CPU
+    "brotli_enabled": os.getenv("COMPRESSION_BROTLI_ENABLED", "true").lower() == "true"
+}
+
+# ============================================
+# CONFIGURATION HEALTH CHECKS
+# ============================================
+HEALTH_CONFIG = {
+    "cache_seconds": float(os.getenv("HEALTH_CACHE_SECONDS", "5")),  # Résultat des sondes réutilisé
+    "timeout_seconds": float(os.getenv("HEALTH_TIMEOUT_SECONDS", "2"))  # Au-delà: sonde en échec
+}
+
+# ============================================
+# CONFIGURATION SENTRY (Monitoring)
+# ============================================
+SENTRY_DSN = os.getenv("SENTRY_DSN", "")
+
+# ============================================
+# LOGGING
+# ============================================
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.getenv("LOG_FILE", "/data/logs/app.log")
+
+logger.debug(f"✅ Configuration chargée - Environnement: {ENVIRONMENT}")
+
+# ============================================
+# FONCTIONS UTILITAIRES
+# ============================================
+def get_smtp_config():
+    """Retourne la configuration SMTP"""
+    return SMTP_CONFIG
+
+def get_twilio_config():
+    """Retourne la configuration Twilio"""
+    return TWILIO_CONFIG
+
+def get_payment_config(provider: str = None):
+    """Retourne la configuration de paiement pour un provider spécifique"""
+    providers = {
+        "orange_money": ORANGE_MONEY_CONFIG,
+        "mtn_money": MTN_MONEY_CONFIG,
+        "wave": WAVE_CONFIG
+    }
+    if provider:
+        return providers.get(provider, {})
+    return providers
+
+def is_production():
+    """Vérifie si on est en production"""
+    return ENVIRONMENT == "production"
+
+def is_development():
+    """Vérifie si on est en développement"""
+    return ENVIRONMENT == "development"
\ No newline at end of file
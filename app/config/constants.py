@@ -14,8 +14,28 @@ PAYMENT_METHODS = {
     "bank_transfer": "Virement"
 }
 
+# Opérateurs mobile money: détaillés dans le cash flow et cumulés sous "mobile_money"
+MOBILE_MONEY_PROVIDERS = {
+    "orange_money": "Orange Money",
+    "mtn_money": "MTN Mobile Money",
+    "wave": "Wave"
+}
+
 CURRENCIES = ["FCFA", "EUR", "USD", "NGN", "GHS", "KES"]
 
+# Codes ISO 4217 (APIs de paiement, exports)
+CURRENCY_ISO_CODES = {
+    "FCFA": "XOF",
+    "EUR": "EUR",
+    "USD": "USD",
+    "NGN": "NGN",
+    "GHS": "GHS",
+    "KES": "KES"
+}
+
+# Parité fixe du franc CFA (BCEAO): 1 EUR = 655,957 FCFA
+FCFA_EUR_PARITY = 655.957
+
 # Seuils et limites
 MAX_BUSINESSES_PER_USER = 10
 MAX_TRANSACTIONS_PER_PAGE = 100
@@ -1,24 +1,113 @@
 
 # AFRIFLOW/backend/app/database.py
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
-from app.config import DATABASE_URL
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from app.config import DATABASE_URL, DATABASE_REPLICA_URL, REPLICA_CONFIG, get_db_pool_config
 import logging
+import threading
+import time
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Création de la connexion à la base de données
-try:
-    engine = create_engine(
-        DATABASE_URL,
-        pool_size=5,  # Nombre de connexions permanentes
-        max_overflow=10,  # Connexions supplémentaires temporaires
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool qui mesure l'attente au checkout et la saturation du pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.peak_checked_out = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            logger.warning(f"⚠️ Pool de connexions saturé ({self.checkedout()}/{self.capacity()})")
+            raise
+        waited = time.perf_counter() - started
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.peak_checked_out = max(self.peak_checked_out, self.checkedout())
+        return conn
+
+    def capacity(self) -> int:
+        return self.size() + max(self._max_overflow, 0)
+
+    def metrics(self) -> dict:
+        capacity = self.capacity()
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "saturation": round(self.checkedout() / capacity, 3) if capacity else 0,
+            "peak_saturation": round(self.peak_checked_out / capacity, 3) if capacity else 0,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0,
+            "wait_max_ms": round(self.wait_max * 1000, 3)
+        }
+
+
+def _pgbouncer_connect_args(url: str) -> dict:
+    """Désactive les requêtes préparées côté serveur (incompatibles avec le transaction pooling)
+
+    psycopg2 n'en utilise pas; psycopg 3 et asyncpg les mettent en cache par défaut.
+    """
+    driver = make_url(url).get_driver_name()
+    if driver == "psycopg":
+        return {"prepare_threshold": None}
+    if driver == "asyncpg":
+        return {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+    return {}
+
+
+def build_engine(url: str = DATABASE_URL, role: str = None):
+    """Crée l'engine selon le rôle du processus (api, worker, cron)
+
+    En mode PgBouncer, chaque session ouvre une connexion vers PgBouncer et la
+    rend à la fermeture (NullPool): c'est PgBouncer qui mutualise.
+    """
+    pool_config = get_db_pool_config(role)
+
+    if pool_config["pgbouncer"]:
+        return create_engine(
+            url,
+            poolclass=NullPool,
+            connect_args=_pgbouncer_connect_args(url),
+            echo=False
+        )
+
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_config["pool_size"],  # Connexions permanentes par processus
+        max_overflow=pool_config["max_overflow"],  # Connexions supplémentaires temporaires
+        pool_timeout=pool_config["pool_timeout"],  # Attente max d'une connexion libre
+        pool_recycle=pool_config["pool_recycle"],
         pool_pre_ping=True,  # Vérifie que la connexion est vivante avant utilisation
         echo=False  # Met à True pour voir les requêtes SQL dans la console
     )
+
+
+# Création de la connexion à la base de données
+try:
+    engine = build_engine()
     logger.info("✅ Connexion à la base de données établie avec succès")
 except Exception as e:
     logger.error(f"❌ Erreur de connexion à la base de données: {e}")
@@ -31,6 +120,85 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+
+
+class ReplicaLagMonitor:
+    """Surveille le retard de la réplique; le résultat est gardé `check_interval` secondes"""
+
+    # Retard nul si la réplique a rejoué tout ce qu'elle a reçu (primaire inactif)
+    PG_LAG_QUERY = text(
+        "SELECT CASE WHEN NOT pg_is_in_recovery() "
+        "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    )
+
+    def __init__(self, replica_engine, max_lag_seconds: float, check_interval: float):
+        self.engine = replica_engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.lag = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _measure_lag(self) -> float:
+        with self.engine.connect() as conn:
+            if self.engine.dialect.name == "postgresql":
+                return float(conn.execute(self.PG_LAG_QUERY).scalar() or 0)
+            conn.execute(text("SELECT 1"))
+            return 0.0
+
+    def healthy(self) -> bool:
+        """Réplique joignable et en retard de moins de max_lag_seconds"""
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                try:
+                    self.lag = self._measure_lag()
+                except Exception as e:
+                    logger.warning(f"⚠️ Réplique injoignable, lecture sur le primaire: {e}")
+                    self.lag = None
+                self._checked_at = now
+        return self.lag is not None and self.lag <= self.max_lag_seconds
+
+
+class RoutingSession(Session):
+    """Session de lecture: requêtes vers la réplique, écritures (flush) vers le primaire
+
+    La cible est choisie une fois par session pour garder une vue cohérente;
+    si la réplique est en retard ou injoignable, tout part sur le primaire.
+    """
+
+    def __init__(self, primary, replica=None, lag_monitor=None, **kwargs):
+        super().__init__(**kwargs)
+        self.primary = primary
+        self.replica = replica
+        self.lag_monitor = lag_monitor
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or self.replica is None:
+            return self.primary
+        if "read_target" not in self.info:
+            use_replica = self.lag_monitor is None or self.lag_monitor.healthy()
+            self.info["read_target"] = "replica" if use_replica else "primary"
+        return self.replica if self.info["read_target"] == "replica" else self.primary
+
+
+# Réplique en lecture (optionnelle)
+replica_engine = build_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+replica_lag_monitor = ReplicaLagMonitor(
+    replica_engine, REPLICA_CONFIG["max_lag_seconds"], REPLICA_CONFIG["lag_check_interval"]
+) if replica_engine is not None else None
+
+# Sessions de lecture (analytics, dashboard, exports)
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    primary=engine,
+    replica=replica_engine,
+    lag_monitor=replica_lag_monitor
+)
+
 # Base pour créer les modèles (tables)
 Base = declarative_base()
 
@@ -63,9 +231,16 @@ def check_connection():
     """Vérifie que la connexion à la base fonctionne"""
     try:
         with engine.connect() as conn:
-            conn.execute("SELECT 1")
+            conn.execute(text("SELECT 1"))
         return True
     except Exception as e:
         logger.error(f"❌ Erreur de connexion: {e}")
         return False
 
+def get_pool_metrics(target=None) -> dict:
+    """Métriques du pool de connexions du processus (attente au checkout, saturation)"""
+    pool = (target or engine).pool
+    pool_config = get_db_pool_config()
+    if isinstance(pool, InstrumentedQueuePool):
+        return {"role": pool_config["role"], "mode": "pool", **pool.metrics()}
+    return {"role": pool_config["role"], "mode": "pgbouncer" if pool_config["pgbouncer"] else pool.__class__.__name__}
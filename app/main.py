@@ -3,11 +3,15 @@
 
 from contextlib import asynccontextmanager  
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import users, transactions, expenses, dashboard, businesses, analytics
+from starlette.concurrency import run_in_threadpool
+from app.routes import users, transactions, expenses, dashboard, businesses, analytics, portfolio, health
 from app.database import engine, Base, check_connection, create_tables
+from app.config import AUTO_CREATE_TABLES, COMPRESSION_CONFIG, RATE_LIMIT_CONFIG
+from app.compression import CompressionMiddleware
+from app.ratelimit import RateLimitMiddleware
 import logging
-import datetime
 import sys
 import fastapi
 import sqlalchemy
@@ -22,17 +26,15 @@ async def lifespan(app: FastAPI):
     # --- STARTUP (ancien @app.on_event("startup")) ---
     logger.info("🚀 Démarrage de l'API Afriflow...")
     
-    # Vérification de la connexion à la base de données
-    if check_connection():
-        logger.info("✅ Connexion à la base de données établie")
-        
-        # Création des tables si elles n'existent pas (développement seulement)
-        # En production, utiliser Alembic pour les migrations
-        create_tables()
-    else:
-        logger.error("❌ Impossible de se connecter à la base de données")
-        # En production, on pourrait vouloir arrêter l'application
-        # raise Exception("Database connection failed")
+    # Création des tables si elles n'existent pas (développement seulement).
+    # En production (AUTO_CREATE_TABLES=false) le schéma est géré par Alembic au
+    # build, et la disponibilité de la base est exposée par /health/ready.
+    if AUTO_CREATE_TABLES:
+        if await run_in_threadpool(check_connection):
+            logger.info("✅ Connexion à la base de données établie")
+            await run_in_threadpool(create_tables)
+        else:
+            logger.error("❌ Impossible de se connecter à la base de données")
     
     yield  # 👈 L'application tourne ici
     
@@ -49,6 +51,7 @@ app = FastAPI(
     docs_url="/docs",  # Swagger UI
     redoc_url="/redoc",  # ReDoc
     lifespan=lifespan,  # 👈 C'EST LA CLÉ ! Activation du nouveau système
+    default_response_class=ORJSONResponse,  # Sérialisation JSON via orjson
     openapi_tags=[  # Documentation des tags
         {
             "name": "users",
@@ -73,10 +76,29 @@ app = FastAPI(
         {
             "name": "analytics",
             "description": "Analytics avancées et graphiques 📊"
+        },
+        {
+            "name": "portfolio",
+            "description": "Analytics consolidées de toutes les entreprises d'un utilisateur"
+        },
+        {
+            "name": "health",
+            "description": "Sondes de santé (liveness / readiness)"
         }
     ]
 )
 
+# Limitation de débit (seaux à jetons par IP et par compte). Ajoutée avant
+# CORS: le middleware CORS l'enveloppe, les réponses 429 restent lisibles par le frontend
+if RATE_LIMIT_CONFIG["enabled"]:
+    app.add_middleware(
+        RateLimitMiddleware,
+        default=RATE_LIMIT_CONFIG["default"],
+        auth=RATE_LIMIT_CONFIG["auth"],
+        account=RATE_LIMIT_CONFIG["account"],
+        proxy_hops=RATE_LIMIT_CONFIG["proxy_hops"]
+    )
+
 # Configuration CORS pour permettre au frontend d'accéder à l'API
 app.add_middleware(
     CORSMiddleware,
@@ -86,6 +108,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression br / gzip des réponses volumineuses (listes, analytics, exports)
+if COMPRESSION_CONFIG["enabled"]:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_CONFIG["minimum_size"],
+        gzip_level=COMPRESSION_CONFIG["gzip_level"],
+        brotli_quality=COMPRESSION_CONFIG["brotli_quality"],
+        brotli_enabled=COMPRESSION_CONFIG["brotli_enabled"]
+    )
+
 # Inclusion des routeurs
 app.include_router(users.router)
 app.include_router(businesses.router)
@@ -93,6 +125,8 @@ app.include_router(transactions.router)
 app.include_router(expenses.router)
 app.include_router(dashboard.router)
 app.include_router(analytics.router)
+app.include_router(portfolio.router)
+app.include_router(health.router)
 
 @app.get("/")
 def root():
@@ -125,23 +159,12 @@ def root():
             "expenses": "/expenses",
             "dashboard": "/dashboard",
             "analytics": "/analytics",
+            "portfolio": "/portfolio",
             "docs": "/docs"
         },
-        "health_check": "/health"
-    }
-
-@app.get("/health")
-def health_check():
-    """
-    Endpoint de santé pour le monitoring
-    """
-    db_status = check_connection()
-    
-    return {
-        "status": "healthy" if db_status else "unhealthy",
-        "database": "connected" if db_status else "disconnected",
-        "version": app.version,
-        "timestamp": datetime.datetime.now().isoformat()
+        "health_check": "/health",
+        "liveness": "/health/live",
+        "readiness": "/health/ready"
     }
 
 @app.get("/info")
@@ -1,10 +1,14 @@
 
 # AFRIFLOW/backend/app/models/models.py
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, Float, type_coerce, ForeignKey, DateTime, Date, Index, UniqueConstraint
+from sqlalchemy import event, update, delete, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, column_property, relationship
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
 from app.database import Base
+from app.schemas.money import to_major, to_minor, from_minor
 
 class User(Base):
     __tablename__ = "users"
@@ -12,6 +16,8 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     password_hash = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Claim "ver" des JWT: l'incrémenter révoque tous les jetons déjà émis
+    token_version = Column(Integer, nullable=False, default=1, server_default="1")
 
     businesses = relationship("Business", back_populates="owner", cascade="all, delete-orphan")
 
@@ -22,30 +28,300 @@ class Business(Base):
     sector = Column(String, nullable=True)
     currency = Column(String, default="FCFA")
     owner_id = Column(Integer, ForeignKey("users.id"))
+    # Incrémenté à chaque écriture sur les transactions/dépenses (ETag des analytics)
+    data_version = Column(Integer, nullable=False, default=1, server_default="1")
 
     owner = relationship("User", back_populates="businesses")
     transactions = relationship("Transaction", back_populates="business", cascade="all, delete-orphan")
     expenses = relationship("Expense", back_populates="business", cascade="all, delete-orphan")
 
-class Transaction(Base):
+class RefreshToken(Base):
+    """Jeton de rafraîchissement (opaque, stocké haché par HMAC-SHA256)
+
+    Chaque usage le remplace par un nouveau jeton de la même famille
+    (rotation); la réutilisation d'un jeton déjà consommé révoque la famille.
+    """
+    __tablename__ = "refresh_tokens"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id = Column(String, nullable=False, index=True)
+    token_hash = Column(String, nullable=False, unique=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    used_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True)
+
+class MajorAmount(TypeDecorator):
+    """Entier en unités mineures relu en Decimal exact (unités principales)"""
+    impl = BigInteger
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else to_major(value)
+
+class AmountMixin:
+    """Montant stocké en unités mineures (entier exact), exposé en unités principales
+
+    Les agrégats SQL portent sur `amount_minor`; la propriété `amount` garde
+    l'API et les schémas Pydantic inchangés.
+    """
+
+    @property
+    def amount(self) -> float:
+        return from_minor(self.amount_minor)
+
+    @amount.setter
+    def amount(self, value):
+        self.amount_minor = to_minor(value)
+
+    @classmethod
+    def amount_column(cls):
+        """Montant exact en unités principales (lectures en liste, pas pour les agrégats)"""
+        return type_coerce(cls.amount_minor, MajorAmount).label("amount")
+
+class Transaction(AmountMixin, Base):
+    """Vente / encaissement
+
+    Sur PostgreSQL la table est partitionnée par mois sur created_at (migration
+    0007): la clé primaire réelle y est (id, created_at), id restant unique
+    (séquence) pour l'ORM.
+    """
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Les analytics filtrent toujours par business puis par plage de dates
+        Index("ix_transactions_business_created_at", "business_id", "created_at"),
+    )
     id = Column(Integer, primary_key=True)
-    amount = Column(Float, nullable=False)
-    payment_method = Column(String, nullable=False)
+    # active_history: l'ancienne valeur est chargée avant modification (maintenance de monthly_cash_flow)
+    amount_minor = column_property(Column(BigInteger, nullable=False), active_history=True)
+    payment_method = column_property(Column(String, nullable=False), active_history=True)
     category = Column(String, nullable=False)
     description = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = column_property(Column(DateTime, nullable=False, default=datetime.utcnow), active_history=True)
 
-    business_id = Column(Integer, ForeignKey("businesses.id"), nullable=False)
+    business_id = column_property(Column(Integer, ForeignKey("businesses.id"), nullable=False), active_history=True)
     business = relationship("Business", back_populates="transactions")
 
-class Expense(Base):
+class Expense(AmountMixin, Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        Index("ix_expenses_business_created_at", "business_id", "created_at"),
+    )
     id = Column(Integer, primary_key=True)
-    amount = Column(Float, nullable=False)
+    amount_minor = Column(BigInteger, nullable=False)
     category = Column(String, nullable=False)
     description = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Clé de partitionnement mensuel sur PostgreSQL (comme transactions)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     business_id = Column(Integer, ForeignKey("businesses.id"), nullable=False)
-    business = relationship("Business", back_populates="expenses")
\ No newline at end of file
+    business = relationship("Business", back_populates="expenses")
+
+class FxRate(Base):
+    """Taux de change journalier: 1 unité de `currency` vaut `rate` unités de la devise de base"""
+    __tablename__ = "fx_rates"
+    __table_args__ = (
+        UniqueConstraint("currency", "rate_date", name="uq_fx_rates_currency_date"),
+    )
+    id = Column(Integer, primary_key=True)
+    currency = Column(String, nullable=False)
+    rate_date = Column(Date, nullable=False)
+    rate = Column(Float, nullable=False)
+
+class MonthlyCashFlow(Base):
+    """Cash flow mensuel par moyen de paiement, maintenu à chaque écriture de transaction
+
+    Une ligne par (entreprise, mois, moyen de paiement): la lecture de
+    l'analyse du cash flow est en O(mois) au lieu d'un scan de l'historique.
+    """
+    __tablename__ = "monthly_cash_flow"
+    business_id = Column(Integer, ForeignKey("businesses.id", ondelete="CASCADE"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    payment_method = Column(String, primary_key=True)
+    amount_minor = Column(BigInteger, nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+class ArchivedMonthlyTotal(Base):
+    """Agrégats figés des mois archivés (partitions détachées de transactions / expenses)
+
+    Les lignes archivées ne sont plus dans les tables: les analytics sur tout
+    l'historique additionnent les lignes vivantes et ces agrégats. Pour les
+    dépenses, payment_method vaut "".
+    """
+    __tablename__ = "archived_monthly_totals"
+    business_id = Column(Integer, ForeignKey("businesses.id", ondelete="CASCADE"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    kind = Column(String, primary_key=True)  # "transaction" | "expense"
+    category = Column(String, primary_key=True)
+    payment_method = Column(String, primary_key=True)
+    amount_minor = Column(BigInteger, nullable=False)
+    entry_count = Column(Integer, nullable=False)
+
+class ArchivedPartition(Base):
+    """Partition mensuelle détachée et exportée dans un fichier compressé (COPY)"""
+    __tablename__ = "archived_partitions"
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String, nullable=False)
+    partition_name = Column(String, nullable=False, unique=True)
+    range_start = Column(DateTime, nullable=False)
+    range_end = Column(DateTime, nullable=False)
+    row_count = Column(BigInteger, nullable=False)
+    path = Column(String, nullable=False)
+    sha256 = Column(String, nullable=False)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_data_version(session, flush_context):
+    """Relève les entreprises dont les transactions/dépenses ont changé (data_version à incrémenter)"""
+    business_ids = {
+        obj.business_id
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, (Transaction, Expense)) and obj.business_id is not None
+    }
+    business_ids.update(
+        obj.id for obj in session.dirty
+        if isinstance(obj, Business) and obj.id is not None and session.is_modified(obj)
+    )
+    if business_ids:
+        session.info.setdefault("bumped_businesses", set()).update(business_ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_data_version(session):
+    """Incrémente data_version des entreprises relevées, juste avant le commit
+
+    Même transaction que l'écriture (l'ETag change si et seulement si elle est
+    commitée), mais un seul UPDATE en fin de transaction: le verrou de ligne
+    sur businesses n'est tenu que le temps du commit, pas de toute la
+    transaction (flushs successifs d'un import, par exemple).
+    """
+    # before_commit précède le dernier flush du commit: le provoquer pour tout relever
+    session.flush()
+    business_ids = session.info.pop("bumped_businesses", None)
+    if not business_ids:
+        return
+
+    session.connection().execute(
+        update(Business.__table__)
+        .where(Business.__table__.c.id.in_(sorted(business_ids)))
+        .values(data_version=Business.__table__.c.data_version + 1)
+    )
+    # Les objets Business chargés relisent leur data_version (sessions sans expire_on_commit)
+    for business_id in business_ids:
+        business = session.identity_map.get((Business, (business_id,), None))
+        if business is not None:
+            session.expire(business, ["data_version"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_data_version(session):
+    session.info.pop("bumped_businesses", None)
+
+
+_CASH_FLOW_FIELDS = ("business_id", "created_at", "payment_method", "amount_minor")
+
+
+def _cash_flow_key(values):
+    created_at = values["created_at"] or datetime.utcnow()
+    return (values["business_id"], created_at.year, created_at.month, values["payment_method"])
+
+
+def _previous_values(obj):
+    """Valeurs d'une transaction avant modification (historique encore disponible en after_flush)"""
+    state = inspect(obj)
+    values = {}
+    for field in _CASH_FLOW_FIELDS:
+        history = state.attrs[field].history
+        values[field] = history.deleted[0] if history.deleted else getattr(obj, field)
+    return values
+
+
+def upsert_cash_flow(connection, deltas):
+    """Ajoute des deltas {(business_id, année, mois, moyen): [montant, nombre]} à monthly_cash_flow"""
+    rows = [
+        {
+            "business_id": business_id, "year": year, "month": month, "payment_method": method,
+            "amount_minor": amount, "transaction_count": count
+        }
+        for (business_id, year, month, method), (amount, count) in deltas.items()
+        if amount or count
+    ]
+    if not rows:
+        return
+
+    table = MonthlyCashFlow.__table__
+    dialect_insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.business_id, table.c.year, table.c.month, table.c.payment_method],
+        set_={
+            "amount_minor": table.c.amount_minor + statement.excluded.amount_minor,
+            "transaction_count": table.c.transaction_count + statement.excluded.transaction_count
+        }
+    )
+    connection.execute(statement, rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_cash_flow(session, flush_context):
+    """Relève les deltas des transactions ajoutées / modifiées / supprimées pour monthly_cash_flow
+
+    L'historique des attributs n'existe qu'ici (après le flush il est remis à
+    zéro): les deltas sont calculés à chaque flush et cumulés dans session.info,
+    puis appliqués au commit (_apply_cash_flow). Les insertions en masse (Core)
+    passent hors ORM: appeler cash_flow_service.refresh_monthly_cash_flow ensuite.
+    """
+    deleted_businesses = session.info.setdefault("cash_flow_deleted", set())
+    deleted_businesses.update(obj.id for obj in session.deleted if isinstance(obj, Business))
+    deltas = session.info.setdefault("cash_flow_deltas", {})
+
+    def add(values, sign):
+        if values["business_id"] is None:
+            return
+        entry = deltas.setdefault(_cash_flow_key(values), [0, 0])
+        entry[0] += sign * (values["amount_minor"] or 0)
+        entry[1] += sign
+
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            add({field: getattr(obj, field) for field in _CASH_FLOW_FIELDS}, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            add(_previous_values(obj), -1)
+    for obj in session.dirty:
+        if isinstance(obj, Transaction) and session.is_modified(obj):
+            add(_previous_values(obj), -1)
+            add({field: getattr(obj, field) for field in _CASH_FLOW_FIELDS}, 1)
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_cash_flow(session):
+    """Un upsert par (entreprise, mois, moyen) juste avant le commit
+
+    Même transaction que l'écriture, mais les lignes de monthly_cash_flow ne
+    sont verrouillées que le temps du commit (comme data_version), pas depuis
+    le premier flush.
+    """
+    session.flush()
+    deleted_businesses = session.info.pop("cash_flow_deleted", set())
+    deltas = session.info.pop("cash_flow_deltas", {})
+    deltas = {key: delta for key, delta in deltas.items() if key[0] not in deleted_businesses}
+    if not deltas and not deleted_businesses:
+        return
+
+    connection = session.connection()
+    if deleted_businesses:
+        # Déjà fait par ON DELETE CASCADE sur PostgreSQL; SQLite n'applique pas les FK
+        for rollup in (MonthlyCashFlow.__table__, ArchivedMonthlyTotal.__table__):
+            connection.execute(delete(rollup).where(rollup.c.business_id.in_(deleted_businesses)))
+    # Ordre des clés fixe: deux commits concurrents verrouillent les lignes dans le même ordre
+    upsert_cash_flow(connection, dict(sorted(deltas.items())))
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_cash_flow(session):
+    session.info.pop("cash_flow_deltas", None)
+    session.info.pop("cash_flow_deleted", None)
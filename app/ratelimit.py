@@ -0,0 +1,259 @@
+
+# AFRIFLOW/backend/app/ratelimit.py : limitation de débit par seaux à jetons (IP et compte)
+#
+# Chaque clé (IP, IP sur les routes d'authentification, email au login) a un
+# seau de `capacité` jetons rechargé à capacité / période jetons par seconde;
+# une requête consomme un jeton, seau vide = 429 avec Retry-After.
+# Les seaux d'une requête sont vérifiés ensemble avant d'être débités: une
+# requête refusée par l'un ne consomme rien dans les autres. Le seau par
+# compte n'est débité que par les logins échoués (sinon quiconque connaît un
+# email pourrait bloquer son propriétaire), mais un seau vide refuse tout login.
+#
+# Avec Redis, l'état est partagé entre workers et instances: un script Lua
+# lit, recharge et consomme de façon atomique (horloge de Redis, pas celle des
+# instances). Sans Redis, ou s'il ne répond pas, les seaux sont en mémoire du
+# processus: quelques microsecondes par requête.
+
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Routes dont chaque appel est coûteux (bcrypt) ou sensible
+AUTH_PATHS = ("/users/login", "/users/register", "/users/refresh")
+# Réponses du login qui débitent le seau par compte (identifiants refusés)
+FAILED_LOGIN_STATUSES = (400, 401)
+EXEMPT_PREFIXES = ("/health",)
+MAX_BODY_BYTES = 16 * 1024
+
+# KEYS = seaux; ARGV = (capacité, jetons par seconde, TTL (ms), débit 0/1) par seau
+# Renvoie 0 si tous les seaux ont un jeton (débités si demandé), sinon
+# l'attente maximale en millisecondes, sans rien débiter.
+TOKEN_BUCKET_LUA = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 4 - 3])
+    local rate = tonumber(ARGV[i * 4 - 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        wait = math.max(wait, math.ceil((1 - tokens) / rate * 1000))
+    end
+end
+for i, key in ipairs(KEYS) do
+    local tokens = levels[i]
+    if wait == 0 and ARGV[i * 4] == '1' then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', key, ARGV[i * 4 - 1])
+end
+return wait
+"""
+
+# (clé, capacité, période en secondes, débiter)
+Bucket = Tuple[str, int, int, bool]
+
+
+class MemoryBuckets:
+    """Seaux à jetons en mémoire du processus: {clé: (jetons, instant de mise à jour)}"""
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, period: int) -> float:
+        """Consomme un jeton; renvoie 0 si accordé, sinon l'attente en secondes"""
+        return self.take_many([(key, capacity, period, True)])
+
+    def take_many(self, buckets: List[Bucket]) -> float:
+        """Vérifie tous les seaux puis, si aucun n'est vide, débite ceux marqués; sinon l'attente maximale"""
+        with self._lock:
+            now = self.clock()
+            levels = []
+            wait = 0.0
+            for key, capacity, period, _ in buckets:
+                tokens, updated_at = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - updated_at) * capacity / period)
+                levels.append(tokens)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) * period / capacity)
+            for (key, capacity, period, debit), tokens in zip(buckets, levels):
+                if len(self._buckets) >= self.max_keys and key not in self._buckets:
+                    self._prune(now, period)
+                self._buckets[key] = (tokens - 1 if debit and not wait else tokens, now)
+        return wait
+
+    def _prune(self, now: float, period: int):
+        # Seaux inactifs depuis une période: pleins, équivalents à une clé absente
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < period}
+        if len(self._buckets) >= self.max_keys:
+            self._buckets.clear()
+
+
+class RateLimiter:
+    """Seaux dans Redis (script Lua atomique) si disponible, sinon en mémoire"""
+
+    KEY_PREFIX = "afriflow:ratelimit:"
+
+    def __init__(self, memory: Optional[MemoryBuckets] = None):
+        self.memory = memory or MemoryBuckets()
+        self._script = None
+
+    def take(self, key: str, capacity: int, period: int) -> float:
+        return self.take_many([(key, capacity, period, True)])
+
+    def take_many(self, buckets: List[Bucket]) -> float:
+        """Voir MemoryBuckets.take_many; atomique dans Redis (un seul appel du script)"""
+        client = get_redis()
+        if client is not None:
+            try:
+                if self._script is None:
+                    self._script = client.register_script(TOKEN_BUCKET_LUA)
+                args = []
+                for _, capacity, period, debit in buckets:
+                    args += [capacity, capacity / period, period * 1000, int(debit)]
+                wait_ms = self._script(keys=[f"{self.KEY_PREFIX}{b[0]}" for b in buckets], args=args)
+                return int(wait_ms) / 1000
+            except Exception as e:
+                logger.warning(f"⚠️ Redis indisponible pour la limitation de débit: {e}")
+        return self.memory.take_many(buckets)
+
+
+def client_ip(scope: Scope, proxy_hops: int) -> str:
+    """IP du client: ajoutée par le n-ième proxy de confiance dans X-Forwarded-For, sinon le pair TCP"""
+    if proxy_hops > 0:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-forwarded-for":
+                hops = [part.strip() for part in value.decode("latin-1").split(",") if part.strip()]
+                if hops:
+                    return hops[-min(proxy_hops, len(hops))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _account_key(body: bytes) -> Optional[str]:
+    """Email du corps JSON de login, haché (pas d'adresse en clair dans Redis)"""
+    try:
+        email = json.loads(body).get("email")
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(email, str) or not email:
+        return None
+    return hashlib.sha1(email.strip().lower().encode()).hexdigest()
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI: seaux par IP sur toutes les routes, plus stricts sur l'authentification
+
+    Au login, le corps (JSON, borné à MAX_BODY_BYTES, 413 au-delà) est lu pour
+    limiter aussi par compte, puis rejoué tel quel pour l'endpoint; le seau du
+    compte est débité à la réponse, si le login a échoué.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        default: Tuple[int, int],
+        auth: Tuple[int, int],
+        account: Tuple[int, int],
+        proxy_hops: int = 1,
+        limiter: Optional[RateLimiter] = None
+    ):
+        self.app = app
+        self.default = default
+        self.auth = auth
+        self.account = account
+        self.proxy_hops = proxy_hops
+        self.limiter = limiter or RateLimiter()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        ip = client_ip(scope, self.proxy_hops)
+        buckets: List[Bucket] = [(f"ip:{ip}", *self.default, True)]
+        account = None
+        if scope["method"] == "POST" and scope["path"] in AUTH_PATHS:
+            buckets.append((f"auth:{ip}", *self.auth, True))
+            if scope["path"] == "/users/login":
+                body, receive = await self._buffer_body(receive)
+                if body is None:
+                    # Un corps géant ne doit pas échapper au seau par compte: refusé d'emblée
+                    await self._reject(send, 413, "Corps de requête trop volumineux")
+                    return
+                account = _account_key(body)
+                if account is not None:
+                    # Vérifié (seau vide = refus) mais débité seulement en cas d'échec
+                    buckets.append((f"account:{account}", *self.account, False))
+
+        wait = self.limiter.take_many(buckets)
+        if wait > 0:
+            await self._reject(send, 429, "Trop de requêtes, réessayez plus tard", wait)
+            return
+
+        if account is not None:
+            send = self._charge_account_on_failure(send, f"account:{account}")
+        await self.app(scope, receive, send)
+
+    def _charge_account_on_failure(self, send: Send, key: str) -> Send:
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and message["status"] in FAILED_LOGIN_STATUSES:
+                self.limiter.take_many([(key, *self.account, True)])
+            await send(message)
+
+        return send_wrapper
+
+    async def _buffer_body(self, receive: Receive) -> Tuple[Optional[bytes], Receive]:
+        """Lit le corps de la requête et renvoie un `receive` qui le rejoue
+
+        Corps au-delà de MAX_BODY_BYTES: None (l'appelant répond 413).
+        """
+        messages: List[Message] = []
+        size = 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            size += len(message.get("body", b""))
+            if not message.get("more_body", False) or size > MAX_BODY_BYTES:
+                break
+
+        body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.request")
+
+        async def replay() -> Message:
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        return (body if size <= MAX_BODY_BYTES else None), replay
+
+    async def _reject(self, send: Send, status: int, detail: str, wait: Optional[float] = None):
+        body = json.dumps({"detail": detail}).encode()
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if wait is not None:
+            headers.append((b"retry-after", str(max(1, math.ceil(wait))).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,100 @@
+
+# AFRIFLOW/backend/app/replica.py : routage des lectures vers la réplique avec "read-your-writes"
+
+import logging
+import threading
+import time
+from typing import Dict
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.auth import get_current_user
+from app.cache import get_redis
+from app.config import REPLICA_CONFIG
+from app.database import ReadSessionLocal, get_db, replica_engine
+from app.models import models
+
+logger = logging.getLogger(__name__)
+
+
+class WriteTracker:
+    """Mémorise les utilisateurs ayant écrit récemment (lectures forcées sur le primaire)
+
+    Partagé entre workers via Redis quand il est activé, sinon en mémoire du processus.
+    """
+
+    KEY_PREFIX = "afriflow:replica:sticky:"
+
+    def __init__(self, sticky_seconds: int):
+        self.sticky_seconds = sticky_seconds
+        self._local: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id: int):
+        with self._lock:
+            self._local[user_id] = time.monotonic() + self.sticky_seconds
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(f"{self.KEY_PREFIX}{user_id}", 1, ex=self.sticky_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ Redis indisponible pour le suivi des écritures: {e}")
+
+    def is_sticky(self, user_id: int) -> bool:
+        expires_at = self._local.get(user_id)
+        if expires_at is not None:
+            if expires_at > time.monotonic():
+                return True
+            with self._lock:
+                self._local.pop(user_id, None)
+
+        client = get_redis()
+        if client is not None:
+            try:
+                return bool(client.exists(f"{self.KEY_PREFIX}{user_id}"))
+            except Exception as e:
+                logger.warning(f"⚠️ Redis indisponible pour le suivi des écritures: {e}")
+        return False
+
+
+write_tracker = WriteTracker(REPLICA_CONFIG["sticky_seconds"])
+
+
+# Une session qui a flushé puis commité pour un utilisateur authentifié
+# (get_current_user renseigne session.info["user_id"]) marque cet utilisateur.
+@event.listens_for(Session, "after_flush")
+def _flag_write(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _track_write(session):
+    if session.info.pop("has_writes", False) and session.info.get("user_id"):
+        write_tracker.mark(session.info["user_id"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_write(session):
+    session.info.pop("has_writes", None)
+
+
+def get_read_db(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Dépendance FastAPI pour les lectures lourdes (analytics, dashboard, portfolio)
+
+    Sans réplique configurée, ou si l'utilisateur vient d'écrire, c'est la
+    session primaire de la requête qui est renvoyée.
+    """
+    if replica_engine is None or write_tracker.is_sticky(current_user.id):
+        yield db
+        return
+
+    read_db = ReadSessionLocal()
+    try:
+        yield read_db
+    finally:
+        read_db.close()
@@ -1,22 +1,29 @@
 
 # AFRIFLOW/backend/app/routes/analytics.py
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from sqlalchemy.orm import Session
 from typing import Optional, List
-from app.database import get_db
+from app.replica import get_read_db
+from app.conditional import conditional_get
 from app.auth import get_current_user
 from app.models import models
-from app.services.analytics_service import AnalyticsService
+from app.services.analytics_service import MAX_YEAR, MIN_YEAR, AnalyticsService
+from app.services.fx_service import CurrencyConversionError
 from datetime import datetime
 
-router = APIRouter(prefix="/analytics", tags=["analytics"])
+# ETag / 304 vérifiés avant tout calcul, pour toutes les routes analytics
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+    dependencies=[Depends(conditional_get("analytics"))]
+)
 
 @router.get("/{business_id}/monthly-revenue")
 def get_monthly_revenue(
     business_id: int,
-    year: Optional[int] = Query(None, description="Année spécifique"),
-    db: Session = Depends(get_db),
+    year: Optional[int] = Query(None, description="Année spécifique", ge=MIN_YEAR, le=MAX_YEAR),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Revenus mensuels avec détails"""
@@ -29,7 +36,7 @@ def get_monthly_revenue(
 @router.get("/{business_id}/expenses-by-category")
 def get_expenses_by_category(
     business_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Dépenses par catégorie avec pourcentages"""
@@ -42,7 +49,7 @@ def get_expenses_by_category(
 @router.get("/{business_id}/payment-methods")
 def get_payment_methods(
     business_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Distribution des méthodes de paiement"""
@@ -56,7 +63,7 @@ def get_payment_methods(
 def get_top_categories(
     business_id: int,
     limit: int = Query(5, description="Nombre de catégories à retourner"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Top catégories de ventes et dépenses"""
@@ -70,7 +77,7 @@ def get_top_categories(
 def get_daily_stats(
     business_id: int,
     days: int = Query(30, description="Nombre de jours à analyser", ge=1, le=365),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Statistiques journalières pour graphiques"""
@@ -83,21 +90,25 @@ def get_daily_stats(
 @router.get("/{business_id}/comparative/{year}")
 def get_comparative_stats(
     business_id: int,
-    year: int,
-    db: Session = Depends(get_db),
+    year: int = Path(..., description="Année de référence", ge=MIN_YEAR, le=MAX_YEAR),
+    years: int = Query(2, description="Nombre d'années comparées (année demandée incluse)", ge=2, le=10),
+    currency: Optional[str] = Query(None, description="Devise du rapport (par défaut: devise du business)"),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    """Statistiques comparatives avec année précédente"""
+    """Statistiques comparatives avec les années précédentes"""
     try:
         service = AnalyticsService(db, business_id, current_user.id)
-        return service.get_comparative_stats(year)
+        return service.get_comparative_stats(year, years, currency)
+    except CurrencyConversionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=403, detail=str(e))
 
 @router.get("/{business_id}/cash-flow-analysis")
 def get_cash_flow_analysis(
     business_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Analyse détaillée du cash flow"""
@@ -110,7 +121,7 @@ def get_cash_flow_analysis(
 @router.get("/{business_id}/summary")
 def get_summary_stats(
     business_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Résumé des statistiques clés"""
@@ -123,21 +134,15 @@ def get_summary_stats(
 @router.get("/{business_id}/dashboard")
 def get_complete_dashboard(
     business_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Dashboard complet avec toutes les analytics"""
     try:
         service = AnalyticsService(db, business_id, current_user.id)
         
-        # Récupérer le nom du business avec la nouvelle syntaxe SQLAlchemy 2.0
-        business = db.query(models.Business).filter(
-            models.Business.id == business_id,
-            models.Business.owner_id == current_user.id
-        ).first()
-        
-        if not business:
-            raise HTTPException(status_code=404, detail="Business non trouvé")
+        # Accès déjà vérifié par le service: lecture de l'entreprise par clé primaire
+        business = service.business
         
         # Récupérer toutes les stats
         return {
@@ -2,11 +2,14 @@
 # AFRIFLOW/backend/app/routes/businesses.py
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from typing import List
 from app.models import models as db_models  # Changement ici
 from app.schemas import schemas
+from app.schemas.money import from_minor
 from app.database import get_db
 from app.auth import get_current_user
+from app.access import check_business_access
 
 router = APIRouter(prefix="/businesses", tags=["businesses"])
 
@@ -44,32 +47,33 @@ def get_business_details(
     current_user: db_models.User = Depends(get_current_user)
 ):
     """Récupérer les détails d'une entreprise spécifique"""
-    business = db.query(db_models.Business).filter(
-        db_models.Business.id == business_id,
-        db_models.Business.owner_id == current_user.id
-    ).first()
-    
-    if not business:
+    check_business_access(db, current_user.id, business_id, status_code=404, detail="Entreprise non trouvée")
+    business = db.get(db_models.Business, business_id)
+    if business is None:
+        # Supprimée entre-temps par un autre worker (cache pas encore expiré)
         raise HTTPException(status_code=404, detail="Entreprise non trouvée")
     
-    # Calculer les statistiques
-    transactions = db.query(db_models.Transaction).filter(
+    # Calculer les statistiques (sommes entières en unités mineures)
+    transactions_count, total_revenue = db.query(
+        func.count(db_models.Transaction.id),
+        func.sum(db_models.Transaction.amount_minor)
+    ).filter(
         db_models.Transaction.business_id == business_id
-    ).all()
+    ).one()
     
-    expenses = db.query(db_models.Expense).filter(
+    expenses_count, total_expenses = db.query(
+        func.count(db_models.Expense.id),
+        func.sum(db_models.Expense.amount_minor)
+    ).filter(
         db_models.Expense.business_id == business_id
-    ).all()
-    
-    total_revenue = sum(t.amount for t in transactions)
-    total_expenses = sum(e.amount for e in expenses)
+    ).one()
     
     return {
         **business.__dict__,
-        "transactions_count": len(transactions),
-        "expenses_count": len(expenses),
-        "total_revenue": total_revenue,
-        "total_expenses": total_expenses
+        "transactions_count": transactions_count,
+        "expenses_count": expenses_count,
+        "total_revenue": from_minor(total_revenue),
+        "total_expenses": from_minor(total_expenses)
     }
 
 @router.delete("/{business_id}")
@@ -79,14 +83,13 @@ def delete_business(
     current_user: db_models.User = Depends(get_current_user)
 ):
     """Supprimer une entreprise"""
-    business = db.query(db_models.Business).filter(
-        db_models.Business.id == business_id,
-        db_models.Business.owner_id == current_user.id
-    ).first()
-    
-    if not business:
+    check_business_access(db, current_user.id, business_id, status_code=404, detail="Entreprise non trouvée")
+    business = db.get(db_models.Business, business_id)
+    if business is None:
+        # Supprimée entre-temps par un autre worker (cache pas encore expiré)
         raise HTTPException(status_code=404, detail="Entreprise non trouvée")
     
+    # Le commit invalide le cache d'accès du propriétaire (voir app.access)
     db.delete(business)
     db.commit()
     return {"message": "Entreprise supprimée avec succès"}
\ No newline at end of file
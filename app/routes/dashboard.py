@@ -1,77 +1,94 @@
 
 # AFRIFLOW/backend/app/routes/dashboard.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
+from sqlalchemy import exists, func
 from typing import Optional
-from app.database import get_db
+from app.replica import get_read_db
+from app.conditional import conditional_get
 from app.auth import get_current_user
+from app.access import optional_business_access
 from app.models import models as db_models  # Un seul import pour tous les modèles
+from app.schemas.money import from_minor
+from app.services.partition_service import merge_totals
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
-@router.get("/")
+def _with_archive(db: Session, rows, kind: str, key, business_id: Optional[int], owner_id: int):
+    """Lignes (clé, montant, nombre) cumulées avec les mois archivés (comme AnalyticsService / PortfolioService)"""
+    archived = db_models.ArchivedMonthlyTotal
+    if business_id:
+        scope = archived.business_id == business_id
+    else:
+        scope = archived.business_id.in_(
+            db.query(db_models.Business.id).filter(db_models.Business.owner_id == owner_id)
+        )
+    if not db.query(exists().where(scope)).scalar():
+        return rows
+    
+    archived_rows = db.query(
+        key,
+        func.sum(archived.amount_minor),
+        func.sum(archived.entry_count)
+    ).filter(scope, archived.kind == kind).group_by(key).all()
+    return merge_totals(list(rows) + archived_rows)
+
+@router.get("/", dependencies=[Depends(conditional_get("dashboard"))])
 def dashboard_summary(
-    business_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    business_id: Optional[int] = Depends(optional_business_access),
+    db: Session = Depends(get_read_db),
     current_user: db_models.User = Depends(get_current_user)  # Changement ici
 ):
     """Tableau de bord financier - peut être filtré par entreprise"""
     
-    # Base query pour les transactions de l'utilisateur
-    tx_query = db.query(db_models.Transaction).join(db_models.Business).filter(
-        db_models.Business.owner_id == current_user.id
+    # Agrégats SQL sur les montants entiers (unités mineures)
+    tx_query = db.query(
+        db_models.Transaction.payment_method,
+        func.sum(db_models.Transaction.amount_minor),
+        func.count(db_models.Transaction.id)
     )
     
-    exp_query = db.query(db_models.Expense).join(db_models.Business).filter(
-        db_models.Business.owner_id == current_user.id
+    exp_query = db.query(
+        db_models.Expense.category,
+        func.sum(db_models.Expense.amount_minor),
+        func.count(db_models.Expense.id)
     )
     
-    # Filtrer par business si spécifié
+    # Filtrer par business si spécifié (accès vérifié par la dépendance, sans requête)
     if business_id:
-        # Vérifier que le business appartient à l'utilisateur
-        business = db.query(db_models.Business).filter(
-            db_models.Business.id == business_id,
-            db_models.Business.owner_id == current_user.id
-        ).first()
-        if not business:
-            raise HTTPException(status_code=403, detail="Vous n'avez pas accès à ce business")
-        
         tx_query = tx_query.filter(db_models.Transaction.business_id == business_id)
         exp_query = exp_query.filter(db_models.Expense.business_id == business_id)
+    else:
+        tx_query = tx_query.join(db_models.Business).filter(db_models.Business.owner_id == current_user.id)
+        exp_query = exp_query.join(db_models.Business).filter(db_models.Business.owner_id == current_user.id)
     
-    # Récupérer toutes les transactions et dépenses
-    transactions = tx_query.all()
-    expenses = exp_query.all()
+    # Répartition par méthode de paiement et par catégorie (dépenses)
+    tx_rows = _with_archive(
+        db, tx_query.group_by(db_models.Transaction.payment_method).all(),
+        "transaction", db_models.ArchivedMonthlyTotal.payment_method, business_id, current_user.id
+    )
+    exp_rows = _with_archive(
+        db, exp_query.group_by(db_models.Expense.category).all(),
+        "expense", db_models.ArchivedMonthlyTotal.category, business_id, current_user.id
+    )
     
-    # Calculs
-    total_revenue = sum(t.amount for t in transactions)
-    total_expenses = sum(e.amount for e in expenses)
+    # Calculs sur les entiers, conversion à la sortie
+    total_revenue = sum(int(r[1] or 0) for r in tx_rows)
+    total_expenses = sum(int(r[1] or 0) for r in exp_rows)
     net_profit = total_revenue - total_expenses
     
-    # Répartition par méthode de paiement
-    cash_flow = {}
-    for tx in transactions:
-        method = tx.payment_method
-        cash_flow[method] = cash_flow.get(method, 0) + tx.amount
-    
-    # Répartition par catégorie (dépenses)
-    expenses_by_category = {}
-    for exp in expenses:
-        cat = exp.category
-        expenses_by_category[cat] = expenses_by_category.get(cat, 0) + exp.amount
-    
     return {
         "summary": {
-            "total_revenue": total_revenue,
-            "total_expenses": total_expenses,
-            "net_profit": net_profit,
+            "total_revenue": from_minor(total_revenue),
+            "total_expenses": from_minor(total_expenses),
+            "net_profit": from_minor(net_profit),
             "profit_margin": (net_profit / total_revenue * 100) if total_revenue > 0 else 0
         },
-        "cash_flow_by_method": cash_flow,
-        "expenses_by_category": expenses_by_category,
+        "cash_flow_by_method": {r[0]: from_minor(r[1]) for r in tx_rows},
+        "expenses_by_category": {r[0]: from_minor(r[1]) for r in exp_rows},
         "counts": {
-            "transactions": len(transactions),
-            "expenses": len(expenses)
+            "transactions": sum(r[2] for r in tx_rows),
+            "expenses": sum(r[2] for r in exp_rows)
         }
-    }
\ No newline at end of file
+    }
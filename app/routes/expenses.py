@@ -2,13 +2,14 @@
 # AFRIFLOW/backend/app/routes/expenses.py
 
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.models import models as db_models
 from app.schemas import schemas
 from app.database import get_db
 from app.auth import get_current_user
+from app.access import check_business_access, optional_business_access
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
 
@@ -18,14 +19,8 @@ def create_expense(
     db: Session = Depends(get_db),
     current_user: db_models.User = Depends(get_current_user)  # Changé de models.User à db_models.User
 ):
-    # Vérifier l'accès au business
-    business = db.query(db_models.Business).filter(
-        db_models.Business.id == expense.business_id,
-        db_models.Business.owner_id == current_user.id
-    ).first()
-    
-    if not business:
-        raise HTTPException(status_code=403, detail="Vous n'avez pas accès à ce business")
+    # Vérifier l'accès au business (cache, sans requête)
+    check_business_access(db, current_user.id, expense.business_id)
     
     new_exp = db_models.Expense(**expense.model_dump())
     db.add(new_exp)
@@ -35,23 +30,25 @@ def create_expense(
 
 @router.get("/", response_model=List[schemas.ExpenseOut])
 def get_expenses(
-    business_id: Optional[int] = None,
+    business_id: Optional[int] = Depends(optional_business_access),
     db: Session = Depends(get_db),
     current_user: db_models.User = Depends(get_current_user)  # Changé aussi ici
 ):
-    query = db.query(db_models.Expense).join(
-        db_models.Business
-    ).filter(
-        db_models.Business.owner_id == current_user.id
+    # Colonnes seules (pas d'objets ORM): sérialisées en bloc par pydantic-core
+    query = db.query(
+        db_models.Expense.id,
+        db_models.Expense.amount_column(),
+        db_models.Expense.category,
+        db_models.Expense.description,
+        db_models.Expense.created_at,
+        db_models.Expense.business_id
     )
     
     if business_id:
-        business = db.query(db_models.Business).filter(
-            db_models.Business.id == business_id,
-            db_models.Business.owner_id == current_user.id
-        ).first()
-        if not business:
-            raise HTTPException(status_code=403, detail="Vous n'avez pas accès à ce business")
+        # Accès déjà vérifié par la dépendance: pas de jointure sur businesses
         query = query.filter(db_models.Expense.business_id == business_id)
+    else:
+        query = query.join(db_models.Business).filter(db_models.Business.owner_id == current_user.id)
     
-    return query.all()
\ No newline at end of file
+    rows = [row._asdict() for row in query]
+    return Response(content=schemas.ExpenseRowsAdapter.dump_json(rows), media_type="application/json")
\ No newline at end of file
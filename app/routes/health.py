@@ -0,0 +1,51 @@
+# AFRIFLOW/backend/app/routes/health.py
+
+from datetime import datetime
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from app.database import get_pool_metrics
+from app.services.health_service import database_probe, redis_status
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("")
+async def health_check(request: Request):
+    """Santé globale pour le monitoring (sonde base de données en cache)"""
+    database = await database_probe.result()
+    db_ok = database["status"] == "ok"
+
+    return {
+        "status": "healthy" if db_ok else "unhealthy",
+        "database": "connected" if db_ok else "disconnected",
+        "database_probe": database,
+        "database_pool": get_pool_metrics(),
+        "redis": await redis_status(),
+        "version": request.app.version,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@router.get("/live")
+async def liveness():
+    """Le processus répond: aucune dépendance externe n'est interrogée"""
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+
+@router.get("/ready")
+async def readiness():
+    """Prêt à recevoir du trafic: base de données joignable (503 sinon)"""
+    database = await database_probe.result()
+    ready = database["status"] == "ok"
+
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "database": database,
+            "database_pool": get_pool_metrics(),
+            "redis": await redis_status()
+        }
+    )
@@ -0,0 +1,52 @@
+# AFRIFLOW/backend/app/routes/portfolio.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.replica import get_read_db
+from app.auth import get_current_user
+from app.models import models
+from app.services.analytics_service import MAX_YEAR, MIN_YEAR
+from app.services.portfolio_service import PortfolioService
+from app.services.fx_service import CurrencyConversionError
+
+router = APIRouter(prefix="/portfolio", tags=["portfolio"])
+
+CURRENCY_QUERY = Query(None, description="Devise cible pour les totaux convertis (ex: EUR)")
+
+@router.get("/summary")
+def get_portfolio_summary(
+    currency: Optional[str] = CURRENCY_QUERY,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Résumé par entreprise et totaux par devise"""
+    try:
+        return PortfolioService(db, current_user.id, currency).get_summary()
+    except CurrencyConversionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/monthly-revenue")
+def get_portfolio_monthly_revenue(
+    year: Optional[int] = Query(None, description="Année (par défaut: année en cours)", ge=MIN_YEAR, le=MAX_YEAR),
+    currency: Optional[str] = CURRENCY_QUERY,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Revenus mensuels de toutes les entreprises"""
+    try:
+        return PortfolioService(db, current_user.id, currency).get_monthly_revenue(year)
+    except CurrencyConversionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/cash-flow")
+def get_portfolio_cash_flow(
+    currency: Optional[str] = CURRENCY_QUERY,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Encaissements par moyen de paiement pour toutes les entreprises"""
+    try:
+        return PortfolioService(db, current_user.id, currency).get_cash_flow_by_method()
+    except CurrencyConversionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,13 +1,14 @@
 
 # AFRIFLOW/backend/app/routes/transactions.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.models import models as db_models  # Changement ici : import explicite
 from app.schemas import schemas
 from app.database import get_db
 from app.auth import get_current_user
+from app.access import check_business_access, optional_business_access
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
@@ -18,14 +19,8 @@ def create_transaction(
     current_user: db_models.User = Depends(get_current_user)  # Changement ici
 ):
     """Créer une nouvelle transaction (protégée par JWT)"""
-    # Vérifier que le business appartient bien à l'utilisateur
-    business = db.query(db_models.Business).filter(
-        db_models.Business.id == transaction.business_id,
-        db_models.Business.owner_id == current_user.id
-    ).first()
-    
-    if not business:
-        raise HTTPException(status_code=403, detail="Vous n'avez pas accès à ce business")
+    # Vérifier que le business appartient bien à l'utilisateur (cache, sans requête)
+    check_business_access(db, current_user.id, transaction.business_id)
     
     new_tx = db_models.Transaction(**transaction.model_dump())
     db.add(new_tx)
@@ -35,28 +30,30 @@ def create_transaction(
 
 @router.get("/", response_model=List[schemas.TransactionOut])
 def get_transactions(
-    business_id: Optional[int] = None,
+    business_id: Optional[int] = Depends(optional_business_access),
     db: Session = Depends(get_db),
     current_user: db_models.User = Depends(get_current_user)
 ):
     """Récupérer les transactions (filtrées par business si spécifié)"""
-    query = db.query(db_models.Transaction).join(
-        db_models.Business
-    ).filter(
-        db_models.Business.owner_id == current_user.id
+    # Colonnes seules (pas d'objets ORM): sérialisées en bloc par pydantic-core
+    query = db.query(
+        db_models.Transaction.id,
+        db_models.Transaction.amount_column(),
+        db_models.Transaction.payment_method,
+        db_models.Transaction.category,
+        db_models.Transaction.description,
+        db_models.Transaction.created_at,
+        db_models.Transaction.business_id
     )
     
     if business_id:
-        # Vérifier que le business appartient à l'utilisateur
-        business = db.query(db_models.Business).filter(
-            db_models.Business.id == business_id,
-            db_models.Business.owner_id == current_user.id
-        ).first()
-        if not business:
-            raise HTTPException(status_code=403, detail="Vous n'avez pas accès à ce business")
+        # Accès déjà vérifié par la dépendance: pas de jointure sur businesses
         query = query.filter(db_models.Transaction.business_id == business_id)
+    else:
+        query = query.join(db_models.Business).filter(db_models.Business.owner_id == current_user.id)
     
-    return query.all()
+    rows = [row._asdict() for row in query]
+    return Response(content=schemas.TransactionRowsAdapter.dump_json(rows), media_type="application/json")
 
 @router.get("/{transaction_id}", response_model=schemas.TransactionOut)
 def get_transaction(
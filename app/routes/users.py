@@ -5,11 +5,25 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app import auth
 from app.models import models as db_models  # Changement ici
-from app.schemas.schemas import UserOut, UserCreate, Token
+from app.schemas.schemas import UserOut, UserCreate, Token, RefreshRequest
 from app.database import get_db
+from app.access import business_access
+from app.config import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.services.token_service import (
+    RefreshTokenError, issue_refresh_token, revoke_refresh_token, rotate_refresh_token
+)
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+def _token_response(db: Session, user: db_models.User, refresh_token: str) -> dict:
+    # Claims uid / ver / bids: les requêtes suivantes n'ont plus à relire users ni businesses
+    return {
+        "access_token": auth.create_user_token(user, business_access.owned(db, user.id)),
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+
 @router.post("/register", response_model=UserOut)
 def register(user: UserCreate, db: Session = Depends(get_db)):
     db_user = db.query(db_models.User).filter(db_models.User.email == user.email).first()
@@ -27,5 +41,33 @@ def login(user: UserCreate, db: Session = Depends(get_db)):
     db_user = db.query(db_models.User).filter(db_models.User.email == user.email).first()
     if not db_user or not auth.verify_password(user.password, db_user.password_hash):
         raise HTTPException(status_code=400, detail="Email ou mot de passe incorrect")
-    token = auth.create_access_token({"sub": db_user.email})
-    return {"access_token": token, "token_type": "bearer"}
\ No newline at end of file
+    # bcrypt une seule fois: les jetons d'accès suivants viennent de /users/refresh
+    response = _token_response(db, db_user, issue_refresh_token(db, db_user.id))
+    db.commit()
+    return response
+
+@router.post("/refresh", response_model=Token)
+def refresh(body: RefreshRequest, db: Session = Depends(get_db)):
+    """Nouveau jeton d'accès contre un jeton de rafraîchissement (remplacé à chaque usage)"""
+    try:
+        user_id, refresh_token = rotate_refresh_token(db, body.refresh_token)
+    except RefreshTokenError as e:
+        # La révocation de la famille (réutilisation détectée) doit persister
+        db.commit()
+        raise HTTPException(status_code=401, detail=str(e))
+    response = _token_response(db, db.get(db_models.User, user_id), refresh_token)
+    db.commit()
+    return response
+
+@router.post("/logout")
+def logout(body: RefreshRequest, db: Session = Depends(get_db)):
+    """Ferme la session de cet appareil (famille du jeton de rafraîchissement)"""
+    revoke_refresh_token(db, body.refresh_token)
+    db.commit()
+    return {"message": "Session fermée"}
+
+@router.post("/logout-all")
+def logout_all(db: Session = Depends(get_db), current_user: db_models.User = Depends(auth.get_current_user)):
+    """Révoque tous les jetons émis pour l'utilisateur (tous appareils)"""
+    auth.revoke_user_tokens(db, current_user.id)
+    return {"message": "Toutes les sessions ont été fermées"}
\ No newline at end of file
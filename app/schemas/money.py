@@ -0,0 +1,43 @@
+# AFRIFLOW/backend/app/schemas/money.py : montants exacts en unités mineures
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Union
+
+from pydantic import BeforeValidator, PlainSerializer
+from typing_extensions import Annotated
+
+# Les montants sont stockés en centièmes (BigInteger) quelle que soit la devise:
+# 1 FCFA = 100, 12,50 EUR = 1250. Une échelle unique garde les agrégats
+# multi-devises (portfolio, conversion FX) sur la même base.
+MINOR_UNITS = 100
+
+Number = Union[int, float, Decimal, str]
+
+
+def to_minor(amount: Number) -> int:
+    """Montant en unités principales -> entier en unités mineures (arrondi au plus proche)"""
+    return int((Decimal(str(amount)) * MINOR_UNITS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def to_major(minor: int) -> Decimal:
+    """Entier en unités mineures -> montant exact en unités principales"""
+    return Decimal(minor) / MINOR_UNITS
+
+
+def from_minor(minor) -> float:
+    """Entier en unités mineures -> montant pour les réponses JSON
+
+    La somme reste exacte jusqu'ici (entiers côté base et côté Python); la
+    conversion en float n'intervient qu'à la sérialisation. Accepte aussi le
+    Decimal de sum(bigint) PostgreSQL et les agrégats convertis (sum(montant *
+    taux)), arrondis à l'unité mineure.
+    """
+    if minor is None:
+        return 0.0
+    return round(minor) / MINOR_UNITS
+
+
+# Montant exact côté Python, nombre dans le JSON (même réponse qu'avec un float)
+Amount = Annotated[Decimal, PlainSerializer(float, return_type=float, when_used="json")]
+# Le même, validé depuis l'entier en unités mineures (attribut amount_minor des modèles)
+MinorAmount = Annotated[Amount, BeforeValidator(to_major)]
@@ -1,8 +1,11 @@
 # AFRIFLOW/backend/app/schemas/schemas.py
 
-from pydantic import BaseModel, ConfigDict, field_serializer  # 👈 Ajout de field_serializer
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_serializer  # 👈 Ajout de field_serializer
+from typing_extensions import TypedDict
 from typing import Optional, List
+from decimal import Decimal
 from datetime import datetime
+from app.schemas.money import Amount, MinorAmount
 
 # ---------- USER SCHEMAS ----------
 class UserCreate(BaseModel):
@@ -19,6 +22,11 @@ class UserOut(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # secondes
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 # ---------- BUSINESS SCHEMAS ----------
 class BusinessCreate(BaseModel):
@@ -45,7 +53,7 @@ class BusinessWithDetails(BusinessOut):
 
 # ---------- TRANSACTION SCHEMAS ----------
 class TransactionCreate(BaseModel):
-    amount: float
+    amount: Decimal  # converti en unités mineures exactes (pas d'arrondi binaire)
     payment_method: str
     category: str
     description: Optional[str] = ""
@@ -53,7 +61,7 @@ class TransactionCreate(BaseModel):
 
 class TransactionOut(BaseModel):
     id: int
-    amount: float
+    amount: MinorAmount = Field(validation_alias="amount_minor")  # exact, lu depuis les unités mineures
     payment_method: str
     category: str
     description: Optional[str] = ""
@@ -67,16 +75,29 @@ class TransactionOut(BaseModel):
         """Sérialise un datetime en chaîne ISO 8601 pour JSON."""
         return value.isoformat()
 
+class TransactionRow(TypedDict):
+    """Ligne brute (sans validation) pour la sérialisation des listes, même JSON que TransactionOut"""
+    id: int
+    amount: Amount  # Decimal de amount_column()
+    payment_method: str
+    category: str
+    description: Optional[str]
+    created_at: datetime
+    business_id: int
+
+# Sérialisation en bloc (pydantic-core) des listes de lignes
+TransactionRowsAdapter = TypeAdapter(List[TransactionRow])
+
 # ---------- EXPENSE SCHEMAS ----------
 class ExpenseCreate(BaseModel):
-    amount: float
+    amount: Decimal
     category: str
     description: Optional[str] = ""
     business_id: int
 
 class ExpenseOut(BaseModel):
     id: int
-    amount: float
+    amount: MinorAmount = Field(validation_alias="amount_minor")  # exact, lu depuis les unités mineures
     category: str
     description: Optional[str] = ""
     created_at: datetime
@@ -89,6 +110,17 @@ class ExpenseOut(BaseModel):
         """Sérialise un datetime en chaîne ISO 8601 pour JSON."""
         return value.isoformat()
 
+class ExpenseRow(TypedDict):
+    """Ligne brute pour la sérialisation des listes, même JSON que ExpenseOut"""
+    id: int
+    amount: Amount  # Decimal de amount_column()
+    category: str
+    description: Optional[str]
+    created_at: datetime
+    business_id: int
+
+ExpenseRowsAdapter = TypeAdapter(List[ExpenseRow])
+
 # ---------- ANALYTICS SCHEMAS ----------
 class MonthlyRevenue(BaseModel):
     month_num: int
@@ -160,9 +192,11 @@ class CashFlowMonth(BaseModel):
     mobile_money: float
     total: float
     
-    model_config = ConfigDict(from_attributes=True)
+    # Une colonne supplémentaire par moyen de paiement (card, wave, orange_money...)
+    model_config = ConfigDict(from_attributes=True, extra="allow")
 
 class CashFlowAnalysis(BaseModel):
+    methods: List[str] = []
     monthly_breakdown: List[CashFlowMonth]
     
     model_config = ConfigDict(from_attributes=True)
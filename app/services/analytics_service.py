@@ -2,45 +2,113 @@
 # AFRIFLOW/backend/app/services/analytics_service.py : le service d'analytics
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_, case
-from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Optional
+from sqlalchemy import func, extract, and_, case, cast, exists, literal, literal_column, select, Date
+from datetime import datetime, date, time, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from app.access import business_access
 from app.models import models
+from app.services.fx_service import fx_rates
+from app.services.cash_flow_service import get_monthly_breakdown
+from app.services.partition_service import merge_totals
+from app.schemas.money import from_minor
 import calendar
 
+
+# Années acceptées par les routes: year_range(MAX_YEAR) reste dans les bornes de datetime,
+# et MIN_YEAR laisse de la marge aux comparaisons sur plusieurs années
+MIN_YEAR = 1900
+MAX_YEAR = 9998
+
+
+def year_range(year: int) -> Tuple[datetime, datetime]:
+    """Bornes [début, fin) d'une année, utilisables directement sur created_at
+
+    Comparer created_at à des bornes (plutôt que extract('year', created_at) == year)
+    permet à la base d'utiliser l'index (business_id, created_at).
+    """
+    return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+
+
 class AnalyticsService:
-    """Service centralisé pour toutes les analytics"""
+    """Service centralisé pour toutes les analytics
+
+    Les mois archivés (partitions détachées, voir partition_service) ne sont
+    plus dans transactions / expenses: les analytics sur tout l'historique
+    ajoutent leurs agrégats figés (archived_monthly_totals). Les statistiques
+    journalières ne portent que sur des mois récents, jamais archivés.
+    """
     
     def __init__(self, db: Session, business_id: int, user_id: int):
         self.db = db
         self.business_id = business_id
         self.user_id = user_id
         self._verify_access()
+        self._has_archive = None
     
     def _verify_access(self):
-        """Vérifie que l'utilisateur a accès à ce business"""
-        business = self.db.query(models.Business).filter(
-            models.Business.id == self.business_id,
-            models.Business.owner_id == self.user_id
-        ).first()
-        if not business:
+        """Vérifie que l'utilisateur a accès à ce business (cache des entreprises possédées)"""
+        if not business_access.has_access(self.db, self.user_id, self.business_id):
+            raise ValueError("Accès non autorisé à ce business")
+    
+    @property
+    def business(self) -> models.Business:
+        """Entreprise analysée, chargée au premier accès (map d'identité de la session ensuite)"""
+        business = self.db.get(models.Business, self.business_id)
+        if business is None:
             raise ValueError("Accès non autorisé à ce business")
         return business
     
+    def _archived(self, kind: str, *keys, filters=(), amount=None) -> List[Tuple]:
+        """Agrégats des mois archivés: lignes (clés..., montant, nombre) groupées par `keys`"""
+        archived = models.ArchivedMonthlyTotal
+        if self._has_archive is None:
+            self._has_archive = self.db.query(
+                exists().where(archived.business_id == self.business_id)
+            ).scalar()
+        if not self._has_archive:
+            return []
+        
+        return self.db.query(
+            *keys,
+            func.sum(archived.amount_minor if amount is None else amount),
+            func.sum(archived.entry_count)
+        ).filter(
+            archived.business_id == self.business_id,
+            archived.kind == kind,
+            *filters
+        ).group_by(*keys).all()
+    
+    def _with_archive(self, query, kind: str, *keys, filters=()) -> List[Tuple]:
+        """Lignes (clés..., montant, nombre) de `query`, cumulées avec les mois archivés de même clé"""
+        archived = self._archived(kind, *keys, filters=filters)
+        if not archived:
+            return query.all()
+        return merge_totals(query.all() + archived, key_size=len(keys))
+    
     def get_monthly_revenue(self, year: Optional[int] = None) -> List[Dict]:
         """Revenus mensuels avec noms des mois"""
         query = self.db.query(
             extract('month', models.Transaction.created_at).label('month'),
-            func.sum(models.Transaction.amount).label('total'),
+            func.sum(models.Transaction.amount_minor).label('total'),
             func.count(models.Transaction.id).label('count')
         ).filter(
             models.Transaction.business_id == self.business_id
         )
         
+        archived = models.ArchivedMonthlyTotal
         if year:
-            query = query.filter(extract('year', models.Transaction.created_at) == year)
-        
-        results = query.group_by('month').order_by('month').all()
+            start, end = year_range(year)
+            query = query.filter(
+                models.Transaction.created_at >= start,
+                models.Transaction.created_at < end
+            )
+        
+        results = sorted(
+            merge_totals(
+                [(int(r[0]), r[1], r[2]) for r in query.group_by('month').order_by('month').all()]
+                + self._archived("transaction", archived.month, filters=(archived.year == year,) if year else ())
+            )
+        )
         
         # Ajouter les noms des mois
         months_fr = [
@@ -52,7 +120,7 @@ class AnalyticsService:
             {
                 "month_num": int(r[0]),
                 "month_name": months_fr[int(r[0]) - 1],
-                "total": float(r[1]),
+                "total": from_minor(r[1]),
                 "transaction_count": r[2]
             }
             for r in results
@@ -60,45 +128,33 @@ class AnalyticsService:
     
     def get_expenses_by_category(self) -> List[Dict]:
         """Dépenses groupées par catégorie avec pourcentages"""
-        total_expenses = self.db.query(
-            func.sum(models.Expense.amount)
-        ).filter(
-            models.Expense.business_id == self.business_id
-        ).scalar() or 0
-        
-        results = self.db.query(
-            models.Expense.category,
-            func.sum(models.Expense.amount).label('total'),
-            func.count(models.Expense.id).label('count')
-        ).filter(
-            models.Expense.business_id == self.business_id
-        ).group_by(models.Expense.category).order_by(func.sum(models.Expense.amount).desc()).all()
+        results = sorted(self._with_archive(
+            self.db.query(
+                models.Expense.category,
+                func.sum(models.Expense.amount_minor).label('total'),
+                func.count(models.Expense.id).label('count')
+            ).filter(
+                models.Expense.business_id == self.business_id
+            ).group_by(models.Expense.category),
+            "expense",
+            models.ArchivedMonthlyTotal.category
+        ), key=lambda r: -int(r[1] or 0))
+        total_expenses = sum(int(r[1] or 0) for r in results)
         
         return [
             {
                 "category": r[0],
-                "total": float(r[1]),
+                "total": from_minor(r[1]),
                 "count": r[2],
-                "percentage": round((float(r[1]) / total_expenses * 100), 2) if total_expenses > 0 else 0
+                "percentage": round((int(r[1]) / total_expenses * 100), 2) if total_expenses > 0 else 0
             }
             for r in results
         ]
     
     def get_payment_methods_distribution(self) -> List[Dict]:
         """Distribution des méthodes de paiement"""
-        total_transactions = self.db.query(
-            func.sum(models.Transaction.amount)
-        ).filter(
-            models.Transaction.business_id == self.business_id
-        ).scalar() or 0
-        
-        results = self.db.query(
-            models.Transaction.payment_method,
-            func.sum(models.Transaction.amount).label('total'),
-            func.count(models.Transaction.id).label('count')
-        ).filter(
-            models.Transaction.business_id == self.business_id
-        ).group_by(models.Transaction.payment_method).all()
+        results = self._payment_method_totals()
+        total_transactions = sum(int(r[1] or 0) for r in results)
         
         # Mapping des noms
         method_names = {
@@ -112,42 +168,53 @@ class AnalyticsService:
             {
                 "method": r[0],
                 "method_name": method_names.get(r[0], r[0]),
-                "total": float(r[1]),
+                "total": from_minor(r[1]),
                 "count": r[2],
-                "percentage": round((float(r[1]) / total_transactions * 100), 2) if total_transactions > 0 else 0
+                "percentage": round((int(r[1]) / total_transactions * 100), 2) if total_transactions > 0 else 0
             }
             for r in results
         ]
     
+    def _payment_method_totals(self) -> List[Tuple]:
+        """(moyen de paiement, montant, nombre) sur tout l'historique"""
+        return self._with_archive(
+            self.db.query(
+                models.Transaction.payment_method,
+                func.sum(models.Transaction.amount_minor).label('total'),
+                func.count(models.Transaction.id).label('count')
+            ).filter(
+                models.Transaction.business_id == self.business_id
+            ).group_by(models.Transaction.payment_method),
+            "transaction",
+            models.ArchivedMonthlyTotal.payment_method
+        )
+    
     def get_top_categories(self, limit: int = 5) -> Dict[str, List]:
         """Top catégories de ventes et dépenses"""
-        # Top ventes par catégorie
-        top_sales = self.db.query(
-            models.Transaction.category,
-            func.sum(models.Transaction.amount).label('total'),
-            func.count(models.Transaction.id).label('count')
-        ).filter(
-            models.Transaction.business_id == self.business_id
-        ).group_by(models.Transaction.category).order_by(
-            func.sum(models.Transaction.amount).desc()
-        ).limit(limit).all()
-        
-        # Top dépenses par catégorie
-        top_expenses = self.db.query(
-            models.Expense.category,
-            func.sum(models.Expense.amount).label('total'),
-            func.count(models.Expense.id).label('count')
-        ).filter(
-            models.Expense.business_id == self.business_id
-        ).group_by(models.Expense.category).order_by(
-            func.sum(models.Expense.amount).desc()
-        ).limit(limit).all()
+        # Classement après cumul avec les mois archivés (peu de catégories par business)
+        def top(model, kind):
+            rows = self._with_archive(
+                self.db.query(
+                    model.category,
+                    func.sum(model.amount_minor).label('total'),
+                    func.count(model.id).label('count')
+                ).filter(
+                    model.business_id == self.business_id
+                ).group_by(model.category),
+                kind,
+                models.ArchivedMonthlyTotal.category
+            )
+            return sorted(rows, key=lambda r: -int(r[1] or 0))[:limit]
+        
+        # Top ventes / dépenses par catégorie
+        top_sales = top(models.Transaction, "transaction")
+        top_expenses = top(models.Expense, "expense")
         
         return {
             "top_sales_categories": [
                 {
                     "category": r[0],
-                    "total": float(r[1]),
+                    "total": from_minor(r[1]),
                     "count": r[2]
                 }
                 for r in top_sales
@@ -155,80 +222,99 @@ class AnalyticsService:
             "top_expense_categories": [
                 {
                     "category": r[0],
-                    "total": float(r[1]),
+                    "total": from_minor(r[1]),
                     "count": r[2]
                 }
                 for r in top_expenses
             ]
         }
     
+    def _day_series(self, start_date: date, end_date: date):
+        """CTE avec une ligne par jour sur [start_date, end_date]
+
+        PostgreSQL utilise generate_series; SQLite (tests, dev) un CTE récursif.
+        Dans les deux cas la colonne 'day' est comparable à func.date(created_at).
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            series = func.generate_series(
+                datetime.combine(start_date, time.min),
+                datetime.combine(end_date, time.min),
+                literal_column("interval '1 day'")
+            )
+            return select(cast(series, Date).label('day')).cte('days')
+        
+        days = select(literal(start_date.isoformat()).label('day')).cte('days', recursive=True)
+        return days.union_all(
+            select(func.date(days.c.day, '+1 day')).where(days.c.day < end_date.isoformat())
+        )
+    
     def get_daily_stats(self, days: int = 30) -> Dict:
-        """Statistiques journalières pour les graphiques"""
+        """Statistiques journalières pour les graphiques
+
+        Série dense et triée de `days` jours (aujourd'hui inclus): les jours sans
+        activité sont présents avec des zéros. Une seule requête: la série de jours
+        est jointe aux agrégats de revenus et de dépenses.
+        """
         end_date = datetime.utcnow().date()
-        start_date = end_date - timedelta(days=days)
+        start_date = end_date - timedelta(days=days - 1)
+        start_at = datetime.combine(start_date, time.min)
+        end_at = datetime.combine(end_date + timedelta(days=1), time.min)
+        
+        day_series = self._day_series(start_date, end_date)
         
-        # Requête pour les transactions quotidiennes
-        daily_transactions = self.db.query(
-            func.date(models.Transaction.created_at).label('date'),
-            func.sum(models.Transaction.amount).label('revenue'),
+        # Agrégats quotidiens des transactions
+        tx_day = func.date(models.Transaction.created_at)
+        daily_transactions = select(
+            tx_day.label('day'),
+            func.sum(models.Transaction.amount_minor).label('revenue'),
             func.count(models.Transaction.id).label('transactions')
-        ).filter(
+        ).where(
             models.Transaction.business_id == self.business_id,
-            func.date(models.Transaction.created_at) >= start_date
-        ).group_by(func.date(models.Transaction.created_at)).all()
-        
-        # Requête pour les dépenses quotidiennes
-        daily_expenses = self.db.query(
-            func.date(models.Expense.created_at).label('date'),
-            func.sum(models.Expense.amount).label('expenses'),
+            models.Transaction.created_at >= start_at,
+            models.Transaction.created_at < end_at
+        ).group_by(tx_day).subquery()
+        
+        # Agrégats quotidiens des dépenses
+        exp_day = func.date(models.Expense.created_at)
+        daily_expenses = select(
+            exp_day.label('day'),
+            func.sum(models.Expense.amount_minor).label('expenses'),
             func.count(models.Expense.id).label('expense_count')
-        ).filter(
+        ).where(
             models.Expense.business_id == self.business_id,
-            func.date(models.Expense.created_at) >= start_date
-        ).group_by(func.date(models.Expense.created_at)).all()
-        
-        # Créer un dictionnaire pour faciliter le merging
-        data_by_date = {}
-        
-        for t in daily_transactions:
-            # Vérifier le type de t[0] et le convertir en string si nécessaire
-            if hasattr(t[0], 'isoformat'):
-                date_str = t[0].isoformat()
-            else:
-                date_str = str(t[0])
-            
-            data_by_date[date_str] = {
-                "date": date_str,
-                "revenue": float(t[1]),
-                "transactions": t[2],
-                "expenses": 0,
-                "expense_count": 0,
-                "profit": float(t[1])
+            models.Expense.created_at >= start_at,
+            models.Expense.created_at < end_at
+        ).group_by(exp_day).subquery()
+        
+        revenue = func.coalesce(daily_transactions.c.revenue, 0)
+        expenses = func.coalesce(daily_expenses.c.expenses, 0)
+        
+        rows = self.db.execute(
+            select(
+                day_series.c.day,
+                revenue,
+                func.coalesce(daily_transactions.c.transactions, 0),
+                expenses,
+                func.coalesce(daily_expenses.c.expense_count, 0),
+                revenue - expenses
+            ).select_from(day_series).outerjoin(
+                daily_transactions, daily_transactions.c.day == day_series.c.day
+            ).outerjoin(
+                daily_expenses, daily_expenses.c.day == day_series.c.day
+            ).order_by(day_series.c.day)
+        ).all()
+        
+        result = [
+            {
+                "date": r[0].isoformat() if hasattr(r[0], 'isoformat') else str(r[0]),
+                "revenue": from_minor(r[1]),
+                "transactions": r[2],
+                "expenses": from_minor(r[3]),
+                "expense_count": r[4],
+                "profit": from_minor(r[5])
             }
-        
-        for e in daily_expenses:
-            # Vérifier le type de e[0] et le convertir en string si nécessaire
-            if hasattr(e[0], 'isoformat'):
-                date_str = e[0].isoformat()
-            else:
-                date_str = str(e[0])
-            
-            if date_str in data_by_date:
-                data_by_date[date_str]["expenses"] = float(e[1])
-                data_by_date[date_str]["expense_count"] = e[2]
-                data_by_date[date_str]["profit"] = data_by_date[date_str]["revenue"] - float(e[1])
-            else:
-                data_by_date[date_str] = {
-                    "date": date_str,
-                    "revenue": 0,
-                    "transactions": 0,
-                    "expenses": float(e[1]),
-                    "expense_count": e[2],
-                    "profit": -float(e[1])
-                }
-        
-        # Trier par date
-        result = sorted(data_by_date.values(), key=lambda x: x["date"])
+            for r in rows
+        ]
         
         return {
             "daily_data": result,
@@ -251,124 +337,136 @@ class AnalyticsService:
             "days_count": len(daily_data)
         }
     
-    def get_comparative_stats(self, year: int) -> Dict:
-        """Statistiques comparatives année précédente"""
-        current_year_data = self.get_monthly_revenue(year)
-        previous_year_data = self.get_monthly_revenue(year - 1)
+    def get_comparative_stats(self, year: int, years: int = 2, currency: Optional[str] = None) -> Dict:
+        """Statistiques comparatives avec les années précédentes
+
+        Une seule requête à agrégats conditionnels groupée par mois couvre les
+        `years` années [year - years + 1, year]; les résultats sont rangés dans
+        des tableaux de 12 mois indexés par numéro de mois. Avec `currency`, les
+        montants sont convertis dans l'agrégat SQL au taux du jour.
+        """
+        amount = models.Transaction.amount_minor
+        archived = models.ArchivedMonthlyTotal
+        archived_amount = None
+        business_currency = self.business.currency or fx_rates.base_currency
+        currency = currency or business_currency
+        if currency != business_currency:
+            fx_rates.ensure_loaded(self.db)
+            factor = fx_rates.factor(business_currency, currency)
+            amount = amount * factor
+            archived_amount = archived.amount_minor * factor
+        
+        compared_years = list(range(year - years + 1, year + 1))
+        range_start, _ = year_range(compared_years[0])
+        _, range_end = year_range(year)
+        
+        created_at = models.Transaction.created_at
+        columns = []
+        for y in compared_years:
+            start, end = year_range(y)
+            in_year = and_(created_at >= start, created_at < end)
+            columns.append(func.sum(case((in_year, amount), else_=0)))
+            columns.append(func.sum(case((in_year, 1), else_=0)))
         
-        growth = []
-        for i, current in enumerate(current_year_data):
-            prev_total = next((p["total"] for p in previous_year_data if p["month_num"] == current["month_num"]), 0)
-            growth_rate = ((current["total"] - prev_total) / prev_total * 100) if prev_total > 0 else 0
-            growth.append({
-                "month": current["month_name"],
-                "current_year": current["total"],
-                "previous_year": prev_total,
-                "growth_rate": round(growth_rate, 2)
-            })
+        results = self.db.query(
+            extract('month', created_at).label('month'),
+            *columns
+        ).filter(
+            models.Transaction.business_id == self.business_id,
+            created_at >= range_start,
+            created_at < range_end
+        ).group_by('month').all()
+        
+        # totals[i][m] / counts[i][m]: année compared_years[i], mois m + 1 (unités mineures)
+        totals = [[0] * 12 for _ in compared_years]
+        counts = [[0] * 12 for _ in compared_years]
+        for r in results:
+            m = int(r[0]) - 1
+            for i in range(len(compared_years)):
+                totals[i][m] = r[1 + 2 * i] or 0
+                counts[i][m] = int(r[2 + 2 * i] or 0)
+        
+        for y, month, total, count in self._archived(
+            "transaction", archived.year, archived.month,
+            filters=(archived.year >= compared_years[0], archived.year <= year),
+            amount=archived_amount
+        ):
+            i = compared_years.index(y)
+            totals[i][month - 1] += total or 0
+            counts[i][month - 1] += int(count or 0)
+        totals = [[from_minor(t) for t in year_totals] for year_totals in totals]
         
-        # Remplir les mois manquants de l'année précédente
         months_fr = [
             "Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
             "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"
         ]
         
-        for month_num, month_name in enumerate(months_fr, 1):
-            if not any(g["month"] == month_name for g in growth):
-                prev_total = next((p["total"] for p in previous_year_data if p["month_num"] == month_num), 0)
-                growth.append({
-                    "month": month_name,
-                    "current_year": 0,
-                    "previous_year": prev_total,
-                    "growth_rate": -100 if prev_total > 0 else 0
-                })
+        current, previous = totals[-1], totals[-2]
+        growth = []
+        for m, month_name in enumerate(months_fr):
+            prev_total = previous[m]
+            if counts[-1][m]:
+                growth_rate = round((current[m] - prev_total) / prev_total * 100, 2) if prev_total > 0 else 0
+            else:
+                # Aucune vente ce mois-ci: -100% si l'année précédente en avait
+                growth_rate = -100 if prev_total > 0 else 0
+            growth.append({
+                "month": month_name,
+                "current_year": current[m],
+                "previous_year": prev_total,
+                "growth_rate": growth_rate,
+                "by_year": {str(y): totals[i][m] for i, y in enumerate(compared_years)}
+            })
         
-        # Trier par mois
-        growth.sort(key=lambda x: months_fr.index(x["month"]))
+        rates = [g["growth_rate"] for g in growth if g["growth_rate"] != -100]
         
-        total_growth = sum(g["growth_rate"] for g in growth if g["growth_rate"] != -100)
-        months_with_data = len([g for g in growth if g["growth_rate"] != -100])
+        yearly_totals = [sum(t) for t in totals]
+        yearly_growth = [
+            {
+                "year": compared_years[i],
+                "total": yearly_totals[i],
+                "growth_rate": round((yearly_totals[i] - yearly_totals[i - 1]) / yearly_totals[i - 1] * 100, 2)
+                if i > 0 and yearly_totals[i - 1] > 0 else 0
+            }
+            for i in range(len(compared_years))
+        ]
         
         return {
             "year": year,
             "previous_year": year - 1,
+            "currency": currency,
+            "years": compared_years,
             "monthly_comparison": growth,
-            "year_over_year_growth": round(total_growth / months_with_data, 2) if months_with_data > 0 else 0
+            "year_over_year_growth": round(sum(rates) / len(rates), 2) if rates else 0,
+            "yearly_totals": yearly_growth
         }
     
     def get_cash_flow_analysis(self) -> Dict:
-        """Analyse avancée du cash flow"""
-        # Cash flow mensuel
-        monthly_cash_flow = self.db.query(
-            extract('month', models.Transaction.created_at).label('month'),
-            extract('year', models.Transaction.created_at).label('year'),
-            func.sum(case(
-                (models.Transaction.payment_method == 'cash', models.Transaction.amount),
-                else_=0
-            )).label('cash'),
-            func.sum(case(
-                (models.Transaction.payment_method == 'mobile_money', models.Transaction.amount),
-                else_=0
-            )).label('mobile_money'),
-            func.sum(case(
-                (models.Transaction.payment_method == 'card', models.Transaction.amount),
-                else_=0
-            )).label('card'),
-            func.sum(case(
-                (models.Transaction.payment_method == 'bank_transfer', models.Transaction.amount),
-                else_=0
-            )).label('bank_transfer'),
-            func.sum(models.Transaction.amount).label('total')
-        ).filter(
-            models.Transaction.business_id == self.business_id
-        ).group_by(
-            extract('year', models.Transaction.created_at),
-            extract('month', models.Transaction.created_at)
-        ).order_by('year', 'month').all()
-        
-        return {
-            "monthly_breakdown": [
-                {
-                    "period": f"{int(r[1])}-{int(r[0]):02d}",
-                    "cash": float(r[2] or 0),
-                    "mobile_money": float(r[3] or 0),
-                    "card": float(r[4] or 0),
-                    "bank_transfer": float(r[5] or 0),
-                    "total": float(r[6] or 0)
-                }
-                for r in monthly_cash_flow
-            ]
-        }
+        """Analyse avancée du cash flow (lue dans la table monthly_cash_flow)"""
+        return get_monthly_breakdown(self.db, self.business_id)
     
     def get_summary_stats(self) -> Dict:
         """Résumé des statistiques clés"""
-        # Total revenus
-        total_revenue = self.db.query(
-            func.sum(models.Transaction.amount)
-        ).filter(
-            models.Transaction.business_id == self.business_id
-        ).scalar() or 0
-        
-        # Total dépenses
-        total_expenses = self.db.query(
-            func.sum(models.Expense.amount)
-        ).filter(
-            models.Expense.business_id == self.business_id
-        ).scalar() or 0
-        
-        # Nombre de transactions
-        transaction_count = self.db.query(
-            func.count(models.Transaction.id)
-        ).filter(
-            models.Transaction.business_id == self.business_id
-        ).scalar() or 0
-        
-        # Nombre de dépenses
-        expense_count = self.db.query(
-            func.count(models.Expense.id)
-        ).filter(
-            models.Expense.business_id == self.business_id
-        ).scalar() or 0
+        # Totaux et nombres, mois archivés compris
+        totals = {}
+        for model, kind in ((models.Transaction, "transaction"), (models.Expense, "expense")):
+            rows = self._with_archive(
+                self.db.query(
+                    func.sum(model.amount_minor),
+                    func.count(model.id)
+                ).filter(
+                    model.business_id == self.business_id
+                ),
+                kind
+            )
+            totals[kind] = (int(rows[0][0] or 0), int(rows[0][1] or 0))
+        total_revenue, transaction_count = totals["transaction"]
+        total_expenses, expense_count = totals["expense"]
+        
+        # Bénéfice calculé sur les entiers, puis montants en unités principales
+        profit = from_minor(total_revenue - total_expenses)
+        total_revenue = from_minor(total_revenue)
+        total_expenses = from_minor(total_expenses)
         
         # Transaction moyenne
         avg_transaction = total_revenue / transaction_count if transaction_count > 0 else 0
@@ -376,15 +474,12 @@ class AnalyticsService:
         # Dépense moyenne
         avg_expense = total_expenses / expense_count if expense_count > 0 else 0
         
-        # Méthode de paiement principale
-        top_payment_method = self.db.query(
-            models.Transaction.payment_method,
-            func.count(models.Transaction.id).label('count')
-        ).filter(
-            models.Transaction.business_id == self.business_id
-        ).group_by(models.Transaction.payment_method).order_by(
-            func.count(models.Transaction.id).desc()
-        ).first()
+        # Méthode de paiement principale (en nombre de transactions)
+        top_payment_method = max(
+            ((method, int(count or 0)) for method, _, count in self._payment_method_totals()),
+            key=lambda r: r[1],
+            default=None
+        )
         
         method_names = {
             "cash": "Espèces",
@@ -395,10 +490,10 @@ class AnalyticsService:
         
         return {
             "totals": {
-                "revenue": float(total_revenue),
-                "expenses": float(total_expenses),
-                "profit": float(total_revenue - total_expenses),
-                "profit_margin": round(((total_revenue - total_expenses) / total_revenue * 100), 2) if total_revenue > 0 else 0
+                "revenue": total_revenue,
+                "expenses": total_expenses,
+                "profit": profit,
+                "profit_margin": round((profit / total_revenue * 100), 2) if total_revenue > 0 else 0
             },
             "counts": {
                 "transactions": transaction_count,
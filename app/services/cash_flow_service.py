@@ -0,0 +1,124 @@
+
+# AFRIFLOW/backend/app/services/cash_flow_service.py : cash flow mensuel par moyen de paiement (table matérialisée)
+
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete, extract, func, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.config.constants import MOBILE_MONEY_PROVIDERS, PAYMENT_METHODS
+from app.models import models
+from app.schemas.money import from_minor
+from app.services.partition_service import merge_totals
+
+
+def refresh_monthly_cash_flow(
+    connection,
+    business_ids: Optional[Iterable[int]] = None,
+    since: Optional[date] = None
+) -> int:
+    """Recalcule monthly_cash_flow depuis les transactions, à partir du mois de `since`
+
+    Rattrapage après des écritures hors ORM (seed bulk, imports, correction
+    manuelle): seuls les mois >= `since` des entreprises demandées sont
+    reconstruits. Les mois archivés (lignes sorties de transactions) sont
+    repris de archived_monthly_totals. Renvoie le nombre de lignes écrites.
+    Les écritures ORM sont reportées au commit (models._apply_cash_flow):
+    les valider avant un recalcul dans la même session.
+    """
+    cash_flow = models.MonthlyCashFlow.__table__
+    tx = models.Transaction.__table__
+    year = extract("year", tx.c.created_at)
+    month = extract("month", tx.c.created_at)
+
+    source = select(
+        tx.c.business_id,
+        year.label("year"),
+        month.label("month"),
+        tx.c.payment_method,
+        func.sum(tx.c.amount_minor).label("amount_minor"),
+        func.count().label("transaction_count")
+    ).group_by(tx.c.business_id, year, month, tx.c.payment_method)
+    cleanup = delete(cash_flow)
+    archived = models.ArchivedMonthlyTotal.__table__
+    archived_source = select(
+        archived.c.business_id, archived.c.year, archived.c.month, archived.c.payment_method,
+        func.sum(archived.c.amount_minor), func.sum(archived.c.entry_count)
+    ).where(archived.c.kind == "transaction").group_by(
+        archived.c.business_id, archived.c.year, archived.c.month, archived.c.payment_method
+    )
+
+    if business_ids is not None:
+        business_ids = list(business_ids)
+        source = source.where(tx.c.business_id.in_(business_ids))
+        cleanup = cleanup.where(cash_flow.c.business_id.in_(business_ids))
+        archived_source = archived_source.where(archived.c.business_id.in_(business_ids))
+    if since is not None:
+        # Comparaison sur created_at (index business_id, created_at) plutôt que sur extract
+        source = source.where(tx.c.created_at >= datetime(since.year, since.month, 1))
+        cleanup = cleanup.where(tuple_(cash_flow.c.year, cash_flow.c.month) >= (since.year, since.month))
+        archived_source = archived_source.where(tuple_(archived.c.year, archived.c.month) >= (since.year, since.month))
+
+    connection.execute(cleanup)
+    totals = merge_totals(
+        [
+            (r.business_id, int(r.year), int(r.month), r.payment_method, r.amount_minor, r.transaction_count)
+            for r in connection.execute(source)
+        ] + list(connection.execute(archived_source)),
+        key_size=4
+    )
+    rows = [
+        {
+            "business_id": business_id, "year": year, "month": month, "payment_method": method,
+            "amount_minor": int(amount), "transaction_count": int(count)
+        }
+        for business_id, year, month, method, amount, count in totals
+    ]
+    if rows:
+        connection.execute(insert(cash_flow), rows)
+    return len(rows)
+
+
+def get_monthly_breakdown(db: Session, business_id: int) -> Dict:
+    """Cash flow mensuel lu dans monthly_cash_flow: une colonne par moyen de paiement
+
+    Les moyens standards (PAYMENT_METHODS) sont toujours présents; tout autre
+    moyen rencontré (wave, orange_money...) devient une colonne. Les opérateurs
+    mobile money sont aussi cumulés dans "mobile_money".
+    """
+    rows = db.query(
+        models.MonthlyCashFlow.year,
+        models.MonthlyCashFlow.month,
+        models.MonthlyCashFlow.payment_method,
+        models.MonthlyCashFlow.amount_minor
+    ).filter(
+        models.MonthlyCashFlow.business_id == business_id,
+        models.MonthlyCashFlow.transaction_count > 0
+    ).order_by(
+        models.MonthlyCashFlow.year,
+        models.MonthlyCashFlow.month
+    ).all()
+
+    methods = set(PAYMENT_METHODS)
+    months = {}
+    for year, month, method, amount_minor in rows:
+        methods.add(method)
+        entry = months.setdefault((year, month), {"total": 0})
+        entry[method] = entry.get(method, 0) + amount_minor
+        if method in MOBILE_MONEY_PROVIDERS:
+            entry["mobile_money"] = entry.get("mobile_money", 0) + amount_minor
+        entry["total"] += amount_minor
+
+    methods = sorted(methods)
+    return {
+        "methods": methods,
+        "monthly_breakdown": [
+            {
+                "period": f"{year}-{month:02d}",
+                **{method: from_minor(totals.get(method, 0)) for method in methods},
+                "total": from_minor(totals["total"])
+            }
+            for (year, month), totals in months.items()
+        ]
+    }
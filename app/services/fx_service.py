@@ -0,0 +1,175 @@
+
+# AFRIFLOW/backend/app/services/fx_service.py : taux de change et conversions de devises
+
+import csv
+import hashlib
+import json
+import threading
+import time
+from bisect import bisect_right
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+
+from app.config import FX_CONFIG
+from app.config.constants import CURRENCIES, FCFA_EUR_PARITY
+from app.models import models
+
+# Parités fixes utilisées quand la table ne contient aucun taux: (base, devise) -> taux
+FIXED_RATES = {
+    ("FCFA", "EUR"): FCFA_EUR_PARITY,
+    ("EUR", "FCFA"): 1 / FCFA_EUR_PARITY,
+}
+
+
+class CurrencyConversionError(Exception):
+    """Devise inconnue ou taux de change manquant"""
+
+
+class FxRateCache:
+    """Cache mémoire des taux de change, indexé par devise puis par date
+
+    Les taux sont lus depuis la table fx_rates (rechargée au plus toutes les
+    `ttl_seconds`). Pour une date donnée, on retient le dernier taux connu à
+    cette date (recherche dichotomique dans la liste triée des dates).
+    """
+
+    def __init__(self, base_currency: str, ttl_seconds: int):
+        self.base_currency = base_currency
+        self.ttl_seconds = ttl_seconds
+        self._dates: Dict[str, List[date]] = {}
+        self._rates: Dict[str, List[float]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        # Empreinte des taux chargés: identique d'un worker à l'autre pour les mêmes taux (ETag)
+        self.version = ""
+
+    def invalidate(self):
+        """Force le rechargement au prochain accès"""
+        self._loaded_at = None
+
+    def ensure_loaded(self, db: Session):
+        """Charge (ou recharge après expiration) les taux depuis la base"""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return
+
+        with self._lock:
+            rows = db.query(
+                models.FxRate.currency,
+                models.FxRate.rate_date,
+                models.FxRate.rate
+            ).order_by(models.FxRate.currency, models.FxRate.rate_date).all()
+
+            dates: Dict[str, List[date]] = {}
+            rates: Dict[str, List[float]] = {}
+            for currency, rate_date, rate in rows:
+                dates.setdefault(currency, []).append(rate_date)
+                rates.setdefault(currency, []).append(rate)
+
+            self._dates, self._rates = dates, rates
+            self.version = hashlib.sha1(repr(rows).encode()).hexdigest()[:16]
+            self._loaded_at = time.monotonic()
+
+    def rate(self, currency: str, on: Optional[date] = None) -> float:
+        """Valeur d'une unité de `currency` en devise de base à la date `on`"""
+        if currency == self.base_currency:
+            return 1.0
+        if currency not in CURRENCIES:
+            raise CurrencyConversionError(f"Devise non supportée: {currency}")
+
+        on = on or datetime.utcnow().date()
+        dates = self._dates.get(currency)
+        if dates:
+            i = bisect_right(dates, on)
+            if i:
+                return self._rates[currency][i - 1]
+
+        fixed = FIXED_RATES.get((self.base_currency, currency))
+        if fixed:
+            return fixed
+        raise CurrencyConversionError(f"Aucun taux de change {currency}/{self.base_currency} au {on.isoformat()}")
+
+    def factor(self, from_currency: str, to_currency: str, on: Optional[date] = None) -> float:
+        """Facteur multiplicatif pour convertir un montant de from_currency vers to_currency"""
+        if from_currency == to_currency:
+            return 1.0
+        return self.rate(from_currency, on) / self.rate(to_currency, on)
+
+    def convert(self, amount: float, from_currency: str, to_currency: str, on: Optional[date] = None) -> float:
+        return amount * self.factor(from_currency, to_currency, on)
+
+    def sql_factor(self, currency_column, currencies: Iterable[str], to_currency: str, on: Optional[date] = None):
+        """Expression SQL CASE: facteur de conversion vers to_currency selon la devise de la ligne
+
+        S'utilise à l'intérieur des agrégats (sum(amount * facteur)) pour convertir
+        côté base, sans conversion ligne par ligne en Python.
+        """
+        return case(
+            {currency: self.factor(currency, to_currency, on) for currency in set(currencies)},
+            value=currency_column
+        )
+
+
+# Instance partagée par le processus
+fx_rates = FxRateCache(FX_CONFIG["base_currency"], FX_CONFIG["cache_ttl_seconds"])
+
+
+def _read_rates_file(path: Path) -> List[Dict]:
+    """Lit un fichier de taux: CSV (date,currency,rate) ou JSON ({"2026-01-01": {"EUR": 655.957}})"""
+    if path.suffix == ".json":
+        with open(path) as f:
+            content = json.load(f)
+        return [
+            {"rate_date": date.fromisoformat(day), "currency": currency, "rate": float(rate)}
+            for day, day_rates in content.items()
+            for currency, rate in day_rates.items()
+        ]
+
+    with open(path, newline="") as f:
+        return [
+            {"rate_date": date.fromisoformat(row["date"]), "currency": row["currency"].strip(), "rate": float(row["rate"])}
+            for row in csv.DictReader(f)
+        ]
+
+
+def load_rates_file(db: Session, path: Optional[str] = None) -> int:
+    """Importe (ou met à jour) les taux d'un fichier local dans fx_rates"""
+    path = Path(path or FX_CONFIG["rates_file"])
+    rows = _read_rates_file(path)
+
+    for row in rows:
+        if row["currency"] not in CURRENCIES:
+            raise CurrencyConversionError(f"Devise non supportée dans {path.name}: {row['currency']}")
+        if row["rate"] <= 0:
+            raise CurrencyConversionError(f"Taux invalide pour {row['currency']} au {row['rate_date']}")
+
+    if not rows:
+        return 0
+
+    existing = {
+        (r.currency, r.rate_date): r
+        for r in db.query(models.FxRate).filter(
+            models.FxRate.rate_date >= min(r["rate_date"] for r in rows),
+            models.FxRate.rate_date <= max(r["rate_date"] for r in rows)
+        ).all()
+    }
+    for row in rows:
+        current = existing.get((row["currency"], row["rate_date"]))
+        if current:
+            current.rate = row["rate"]
+        else:
+            db.add(models.FxRate(**row))
+
+    db.commit()
+    fx_rates.invalidate()
+    return len(rows)
+
+
+def format_money(amount: float, currency: str) -> str:
+    """Formate un montant pour les factures et exports (pas de décimales en FCFA)"""
+    if currency == "FCFA":
+        return f"{amount:,.0f} FCFA"
+    return f"{amount:,.2f} {currency}"
@@ -0,0 +1,114 @@
+
+# AFRIFLOW/backend/app/services/health_service.py : sondes de santé mises en cache
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from app.cache import get_redis
+from app.config import HEALTH_CONFIG
+from app.database import check_connection
+
+logger = logging.getLogger(__name__)
+
+
+class CachedProbe:
+    """Sonde exécutée au plus une fois toutes les `ttl` secondes, avec délai maximal
+
+    La vérification (bloquante) tourne dans un thread dédié; au-delà de `timeout`
+    la sonde est déclarée en échec sans attendre la fin de l'appel. Une seule
+    vérification à la fois (single-flight): les appelants concurrents attendent
+    la même, et une vérification bloquée est réutilisée au lieu d'empiler des
+    threads à chaque expiration du cache.
+    """
+
+    def __init__(self, name: str, check: Callable[[], bool], ttl: float, timeout: float):
+        self.name = name
+        self.check = check
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._result: Optional[Dict] = None
+        self._checked_at: Optional[float] = None
+        # Vérification en cours (ou dernière lancée) et son instant de départ
+        self._flight: Optional[Tuple[Future, float]] = None
+        self._result_flight: Optional[Future] = None
+
+    def invalidate(self):
+        """Oublie le résultat et la vérification en cours (qui se termine sans être attendue)"""
+        with self._lock:
+            self._result = None
+            self._checked_at = None
+            self._flight = None
+            self._result_flight = None
+
+    def _fresh(self) -> bool:
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.ttl
+
+    def _run(self, future: Future, check: Callable[[], bool]):
+        try:
+            future.set_result(check())
+        except BaseException as e:
+            future.set_exception(e)
+
+    def _start(self) -> Tuple[Future, float]:
+        """Vérification en cours, ou nouvelle si aucune ne tourne"""
+        with self._lock:
+            if self._flight is None or self._flight[0].done():
+                future = Future()
+                # Thread démon: une sonde bloquée n'empêche pas l'arrêt du processus
+                threading.Thread(
+                    target=self._run, args=(future, self.check), name=f"probe-{self.name}", daemon=True
+                ).start()
+                self._flight = (future, time.perf_counter())
+            return self._flight
+
+    async def result(self) -> Dict:
+        if self._fresh():
+            return self._result
+
+        future, started = self._start()
+        # Délai compté depuis le lancement: une vérification déjà bloquée échoue aussitôt
+        remaining = max(0.0, started + self.timeout - time.perf_counter())
+        try:
+            # shield: le délai dépassé n'annule pas la vérification partagée
+            ok = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), remaining)
+            status = "ok" if ok else "error"
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Sonde {self.name}: pas de réponse en {self.timeout}s")
+            status = "timeout"
+        except Exception as e:
+            logger.warning(f"⚠️ Sonde {self.name} en échec: {e}")
+            status = "error"
+
+        with self._lock:
+            # Un appelant concurrent a déjà enregistré le résultat de cette vérification
+            if self._result_flight is future and self._fresh():
+                return self._result
+            self._result = {
+                "status": status,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                "checked_at": datetime.utcnow().isoformat()
+            }
+            self._checked_at = time.monotonic()
+            self._result_flight = future
+            return self._result
+
+
+def _check_redis() -> bool:
+    return bool(get_redis().ping())
+
+
+database_probe = CachedProbe("database", check_connection, HEALTH_CONFIG["cache_seconds"], HEALTH_CONFIG["timeout_seconds"])
+redis_probe = CachedProbe("redis", _check_redis, HEALTH_CONFIG["cache_seconds"], HEALTH_CONFIG["timeout_seconds"])
+
+
+async def redis_status() -> Dict:
+    """Redis est optionnel: désactivé ou en échec, il ne rend pas l'API indisponible"""
+    if get_redis() is None:
+        return {"status": "disabled"}
+    return await redis_probe.result()
@@ -0,0 +1,312 @@
+
+# AFRIFLOW/backend/app/services/partition_service.py : partitions mensuelles (PostgreSQL) et archivage des mois froids
+#
+# transactions / expenses sont partitionnées par RANGE (created_at), une
+# partition par mois nommée <table>_pAAAA_MM, plus <table>_default qui reçoit
+# les lignes hors de toute partition (mois futur non encore créé, saisie
+# antidatée dans un mois archivé).
+#
+# Archivage d'un mois: export COPY compressé (zstd, sinon gzip) de la
+# partition encore attachée, puis, dans une transaction courte, agrégats figés
+# dans archived_monthly_totals, DETACH et DROP. restore_partition fait l'inverse.
+# Sur SQLite (tests, dev) les tables ne sont pas partitionnées: tout est no-op.
+
+import gzip
+import hashlib
+import logging
+import os
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import delete, insert, select, text
+
+from app.models import models
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Table partitionnée -> "kind" de ses agrégats archivés
+PARTITIONED_TABLES = {"transactions": "transaction", "expenses": "expense"}
+ADVISORY_LOCK_KEY = 0x41465250  # "AFRP": une seule opération de partitionnement à la fois
+
+
+class PartitionError(Exception):
+    """Opération de partitionnement impossible (pilote, archive manquante ou corrompue)"""
+
+
+def month_start(day: Union[date, datetime]) -> datetime:
+    return datetime(day.year, day.month, 1)
+
+
+def add_months(start: datetime, months: int) -> datetime:
+    index = start.year * 12 + start.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, start: datetime) -> str:
+    return f"{table}_p{start:%Y_%m}"
+
+
+def _bounds(start: datetime) -> Tuple[datetime, datetime]:
+    return start, add_months(start, 1)
+
+
+def _literal(moment: datetime) -> str:
+    # Valeur issue d'une date: pas d'injection possible dans le DDL (FOR VALUES n'accepte pas de paramètres)
+    return moment.strftime("'%Y-%m-%d %H:%M:%S'")
+
+
+def _require_copy(connection):
+    if connection.dialect.name != "postgresql" or connection.dialect.driver != "psycopg2":
+        raise PartitionError("Archivage des partitions: PostgreSQL avec psycopg2 requis (COPY)")
+
+
+def _lock(connection):
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+
+
+def is_partitioned(connection, table: str) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"), {"table": table}
+    ).first() is not None
+
+
+def list_partitions(connection, table: str) -> Dict[datetime, str]:
+    """Partitions mensuelles attachées: {début du mois: nom}"""
+    pattern = re.compile(rf"^{table}_p(\d{{4}})_(\d{{2}})$")
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": table}).scalars()
+    partitions = {}
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def _attach_month(connection, table: str, start: datetime, load=None) -> str:
+    """Crée et attache la partition du mois; `load(nom)` la remplit avant l'ATTACH
+
+    Les lignes du mois tombées dans la partition par défaut y sont déplacées
+    (sinon l'ATTACH échoue).
+    """
+    name = partition_name(table, start)
+    start, end = _bounds(start)
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    if load is not None:
+        load(name)
+    params = {"start": start, "end": end}
+    moved = connection.execute(text(
+        f"WITH moved AS (DELETE FROM {table}_default WHERE created_at >= :start AND created_at < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), params).rowcount
+    connection.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ({_literal(start)}) TO ({_literal(end)})"
+    ))
+    if moved:
+        logger.info(f"🧩 {moved} lignes déplacées de {table}_default vers {name}")
+    return name
+
+
+def ensure_partitions(connection, months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+    """Crée les partitions manquantes du mois courant à `months_ahead` mois; renvoie les noms créés"""
+    if not any(is_partitioned(connection, table) for table in PARTITIONED_TABLES):
+        return []
+    _lock(connection)
+    current = month_start(today or datetime.utcnow())
+    created = []
+    for table in PARTITIONED_TABLES:
+        existing = list_partitions(connection, table)
+        for offset in range(months_ahead + 1):
+            start = add_months(current, offset)
+            if start not in existing:
+                created.append(_attach_month(connection, table, start))
+    if created:
+        logger.info(f"🧩 Partitions créées: {', '.join(created)}")
+    return created
+
+
+def partitions_to_archive(connection, before: datetime) -> List[Tuple[str, datetime]]:
+    """Partitions (table, début du mois) entièrement antérieures à `before`"""
+    return [
+        (table, start)
+        for table in PARTITIONED_TABLES if is_partitioned(connection, table)
+        for start in sorted(list_partitions(connection, table))
+        if add_months(start, 1) <= before
+    ]
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def freeze_monthly_totals(connection, table: str, start: datetime, source: Optional[str] = None) -> int:
+    """Écrit dans archived_monthly_totals les agrégats du mois de `start`; renvoie le nombre de lignes
+
+    `source`: table lue (la partition du mois, par défaut la table elle-même).
+    """
+    kind = PARTITIONED_TABLES[table]
+    start, end = _bounds(start)
+    source = source or table
+    group_by = "business_id, category, payment_method" if kind == "transaction" else "business_id, category"
+    method = "payment_method" if kind == "transaction" else "''"
+    params = {"year": start.year, "month": start.month, "kind": kind, "start": start, "end": end}
+    in_month = "created_at >= :start AND created_at < :end"
+    connection.execute(text(
+        "INSERT INTO archived_monthly_totals "
+        "(business_id, year, month, kind, category, payment_method, amount_minor, entry_count) "
+        f"SELECT business_id, :year, :month, :kind, category, {method}, sum(amount_minor), count(*) "
+        f"FROM {source} WHERE {in_month} GROUP BY {group_by}"
+    ), params)
+    return connection.execute(text(f"SELECT count(*) FROM {source} WHERE {in_month}"), params).scalar()
+
+
+def _fingerprint(connection, name: str) -> Tuple[int, int]:
+    """(lignes, somme des hachés de lignes) d'une partition: détecte une écriture entre export et DETACH"""
+    count, digest = connection.execute(
+        text(f"SELECT count(*), coalesce(sum(hashtext(p::text)), 0) FROM {name} p")
+    ).one()
+    return count, digest
+
+
+def _export_partition(connection, name: str, path: Path, level: int) -> Tuple[int, int]:
+    """COPY compressé de la partition vers `path` (écrit à côté puis renommé); renvoie son empreinte
+
+    Empreinte et COPY lisent le même instantané (transaction REPEATABLE READ
+    de l'appelant).
+    """
+    fingerprint = _fingerprint(connection, name)
+    partial = path.with_name(path.name + ".part")
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        with open(partial, "wb") as raw:
+            if zstandard is not None:
+                writer = zstandard.ZstdCompressor(level=level).stream_writer(raw, closefd=False)
+            else:
+                writer = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=min(level, 9))
+            cursor.copy_expert(f"COPY {name} TO STDOUT", writer)
+            writer.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+        partial.rename(path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return fingerprint
+
+
+def archive_partition(engine, table: str, start: datetime, archive_dir: Union[str, Path], level: int = 9) -> Dict:
+    """Archive un mois: export COPY compressé, puis agrégats figés, DETACH et DROP
+
+    Deux transactions, chacune sur sa connexion de `engine`:
+      1. export de la partition encore attachée (REPEATABLE READ): aucun verrou
+         sur la table parente au-delà d'ACCESS SHARE, les écritures continuent
+         pendant COPY, compression et fsync;
+      2. transaction courte: agrégats figés, DETACH (ACCESS EXCLUSIVE sur la
+         parente jusqu'au commit), trace de l'archive et DROP.
+    Si la partition a changé entre les deux (saisie antidatée), l'étape 2
+    échoue avec PartitionError: rien n'est détaché, l'archive est supprimée.
+    """
+    name = partition_name(table, start)
+    start, end = _bounds(start)
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / f"{name}.copy{'.zst' if zstandard is not None else '.gz'}"
+
+    # 1. Export hors du verrou de la parente
+    with engine.connect().execution_options(isolation_level="REPEATABLE READ") as connection:
+        _require_copy(connection)
+        with connection.begin():
+            _lock(connection)
+            if start not in list_partitions(connection, table):
+                raise PartitionError(f"Partition non attachée: {name}")
+            row_count, digest = _export_partition(connection, name, path, level)
+    sha256 = _file_sha256(path)
+
+    # 2. Agrégats du mois (lus par les analytics à la place des lignes archivées), DETACH, DROP
+    try:
+        with engine.begin() as connection:
+            _lock(connection)
+            # Écritures bloquées sur ce seul mois le temps des deux lectures
+            connection.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+            if _fingerprint(connection, name) != (row_count, digest):
+                raise PartitionError(f"{name} modifiée pendant l'export: archivage à relancer")
+            freeze_monthly_totals(connection, table, start, source=name)
+            connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            connection.execute(insert(models.ArchivedPartition.__table__).values(
+                table_name=table, partition_name=name, range_start=start, range_end=end,
+                row_count=row_count, path=str(path), sha256=sha256, archived_at=datetime.utcnow()
+            ))
+            connection.execute(text(f"DROP TABLE {name}"))
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+
+    logger.info(f"🗄️ {name} archivée: {row_count} lignes -> {path.name}")
+    return {"partition": name, "rows": row_count, "path": str(path), "bytes": path.stat().st_size, "sha256": sha256}
+
+
+def restore_partition(connection, name: str) -> Dict:
+    """Recharge une partition archivée (COPY FROM), la rattache et supprime ses agrégats figés"""
+    _require_copy(connection)
+    _lock(connection)
+    archived = models.ArchivedPartition.__table__
+    record = connection.execute(select(archived).where(archived.c.partition_name == name)).first()
+    if record is None:
+        raise PartitionError(f"Partition archivée inconnue: {name}")
+    path = Path(record.path)
+    if not path.exists() or _file_sha256(path) != record.sha256:
+        raise PartitionError(f"Archive manquante ou corrompue: {path}")
+
+    def load(table_name):
+        with open(path, "rb") as raw:
+            if path.suffix == ".zst":
+                if zstandard is None:
+                    raise PartitionError("Archive zstd mais le paquet zstandard n'est pas installé")
+                reader = zstandard.ZstdDecompressor().stream_reader(raw)
+            else:
+                reader = gzip.GzipFile(fileobj=raw, mode="rb")
+            connection.connection.driver_connection.cursor().copy_expert(f"COPY {table_name} FROM STDIN", reader)
+        loaded = connection.execute(text(f"SELECT count(*) FROM {table_name}")).scalar()
+        if loaded != record.row_count:
+            raise PartitionError(f"{table_name}: {loaded} lignes rechargées, {record.row_count} attendues")
+
+    _attach_month(connection, record.table_name, month_start(record.range_start), load)
+    totals = models.ArchivedMonthlyTotal.__table__
+    connection.execute(delete(totals).where(
+        totals.c.kind == PARTITIONED_TABLES[record.table_name],
+        totals.c.year == record.range_start.year,
+        totals.c.month == record.range_start.month
+    ))
+    connection.execute(delete(archived).where(archived.c.id == record.id))
+
+    logger.info(f"♻️ {name} restaurée: {record.row_count} lignes")
+    return {"partition": name, "rows": record.row_count}
+
+
+def merge_totals(rows, key_size: int = 1) -> List[Tuple]:
+    """Additionne des lignes (clé..., valeurs...) de même clé: lignes vivantes + agrégats archivés"""
+    merged: Dict[Tuple, List] = {}
+    for row in rows:
+        key, values = tuple(row[:key_size]), row[key_size:]
+        entry = merged.get(key)
+        if entry is None:
+            merged[key] = [v or 0 for v in values]
+        else:
+            for i, value in enumerate(values):
+                entry[i] += value or 0
+    return [key + tuple(values) for key, values in merged.items()]
@@ -0,0 +1,293 @@
+
+# AFRIFLOW/backend/app/services/portfolio_service.py : analytics consolidées multi-entreprises
+
+from sqlalchemy.orm import Session
+from sqlalchemy import func, extract, exists
+from datetime import date, datetime
+from typing import Dict, Optional
+from app.models import models
+from app.services.analytics_service import year_range
+from app.services.fx_service import fx_rates
+from app.services.partition_service import merge_totals
+from app.schemas.money import from_minor
+
+
+class PortfolioService:
+    """Analytics sur toutes les entreprises d'un utilisateur
+
+    Chaque métrique est calculée en une requête groupée par business_id (au lieu
+    d'une série d'appels à AnalyticsService par entreprise). Les totaux consolidés
+    sont ventilés par devise: on n'additionne jamais des FCFA et des EUR. Les
+    cumuls se font sur les entiers en unités mineures, convertis à la sortie.
+
+    Avec `currency`, chaque métrique ajoute un total "converted" dans cette devise,
+    converti dans l'agrégat SQL (sum(amount_minor * taux)) aux taux du jour `as_of`.
+
+    Comme AnalyticsService, les mois archivés sont lus dans archived_monthly_totals.
+    """
+
+    def __init__(self, db: Session, user_id: int, currency: Optional[str] = None, as_of: Optional[date] = None):
+        self.db = db
+        self.user_id = user_id
+        self.currency = currency
+        self.as_of = as_of or datetime.utcnow().date()
+        self.businesses = self._load_businesses()
+        self._has_archive = None
+
+        self._fx_factor = None
+        if currency and self.businesses:
+            fx_rates.ensure_loaded(db)
+            # Entreprise sans devise: devise de base (comme AnalyticsService), en SQL comme en Python
+            self._fx_factor = fx_rates.sql_factor(
+                func.coalesce(models.Business.currency, fx_rates.base_currency),
+                {self._currency(b) for b in self.businesses.values()},
+                currency,
+                self.as_of
+            )
+
+    def _load_businesses(self) -> Dict[int, models.Business]:
+        """Entreprises de l'utilisateur, indexées par id"""
+        businesses = self.db.query(models.Business).filter(
+            models.Business.owner_id == self.user_id
+        ).order_by(models.Business.id).all()
+        return {b.id: b for b in businesses}
+
+    @staticmethod
+    def _currency(business: models.Business) -> str:
+        return business.currency or fx_rates.base_currency
+
+    def _business_info(self, business_id: int) -> Dict:
+        business = self.businesses[business_id]
+        return {
+            "business_id": business.id,
+            "name": business.name,
+            "currency": self._currency(business)
+        }
+
+    def _grouped(self, model, *columns, filters=()):
+        """Agrégats groupés par business_id (+ colonnes) sur les entreprises de l'utilisateur
+
+        En mode conversion, une colonne sum(amount_minor * taux) est ajoutée en dernier.
+        """
+        if self._fx_factor is not None:
+            columns += (func.sum(model.amount_minor * self._fx_factor),)
+
+        query = self.db.query(model.business_id, *columns)
+        if self._fx_factor is not None:
+            query = query.join(models.Business, models.Business.id == model.business_id)
+        return query.filter(
+            model.business_id.in_(list(self.businesses)),
+            *filters
+        )
+
+    def _with_archive(self, rows, kind: str, *columns, filters=()):
+        """Lignes (business_id, clés..., montant, nombre[, converti]) cumulées avec les mois archivés"""
+        archived = models.ArchivedMonthlyTotal
+        if self._has_archive is None:
+            self._has_archive = self.db.query(
+                exists().where(archived.business_id.in_(list(self.businesses)))
+            ).scalar()
+        if not self._has_archive:
+            return rows
+
+        archived_rows = self._grouped(
+            archived,
+            *columns,
+            func.sum(archived.amount_minor),
+            func.sum(archived.entry_count),
+            filters=(archived.kind == kind, *filters)
+        ).group_by(archived.business_id, *columns).all()
+        return merge_totals(list(rows) + archived_rows, key_size=1 + len(columns))
+
+    def _converted_info(self, **totals) -> Dict:
+        return {"currency": self.currency, "as_of": self.as_of.isoformat(), **totals}
+
+    def get_summary(self) -> Dict:
+        """Revenus, dépenses et profit par entreprise, totaux par devise"""
+        if not self.businesses:
+            return {"businesses": [], "totals_by_currency": {}}
+
+        revenue = {
+            r[0]: (int(r[1] or 0), int(r[2] or 0), (r[3] or 0) if len(r) > 3 else None)
+            for r in self._with_archive(self._grouped(
+                models.Transaction,
+                func.sum(models.Transaction.amount_minor),
+                func.count(models.Transaction.id)
+            ).group_by(models.Transaction.business_id).all(), "transaction")
+        }
+        expenses = {
+            r[0]: (int(r[1] or 0), int(r[2] or 0), (r[3] or 0) if len(r) > 3 else None)
+            for r in self._with_archive(self._grouped(
+                models.Expense,
+                func.sum(models.Expense.amount_minor),
+                func.count(models.Expense.id)
+            ).group_by(models.Expense.business_id).all(), "expense")
+        }
+
+        rows = []
+        totals = {}
+        converted_revenue = converted_expenses = 0.0
+        for business_id in self.businesses:
+            total_revenue, transaction_count, revenue_converted = revenue.get(business_id, (0, 0, 0.0))
+            total_expenses, expense_count, expenses_converted = expenses.get(business_id, (0, 0, 0.0))
+            converted_revenue += float(revenue_converted or 0)
+            converted_expenses += float(expenses_converted or 0)
+            profit = from_minor(total_revenue - total_expenses)
+            row = {
+                **self._business_info(business_id),
+                "revenue": from_minor(total_revenue),
+                "expenses": from_minor(total_expenses),
+                "profit": profit,
+                "profit_margin": round(profit / from_minor(total_revenue) * 100, 2) if total_revenue > 0 else 0,
+                "transactions": transaction_count,
+                "expense_count": expense_count
+            }
+            rows.append(row)
+
+            currency_totals = totals.setdefault(row["currency"], {
+                "revenue": 0, "expenses": 0, "profit": 0,
+                "transactions": 0, "expense_count": 0, "businesses": 0
+            })
+            currency_totals["revenue"] += total_revenue
+            currency_totals["expenses"] += total_expenses
+            currency_totals["profit"] += total_revenue - total_expenses
+            currency_totals["transactions"] += transaction_count
+            currency_totals["expense_count"] += expense_count
+            currency_totals["businesses"] += 1
+
+        for currency_totals in totals.values():
+            for key in ("revenue", "expenses", "profit"):
+                currency_totals[key] = from_minor(currency_totals[key])
+
+        result = {"businesses": rows, "totals_by_currency": totals}
+        if self._fx_factor is not None:
+            result["converted"] = self._converted_info(
+                revenue=from_minor(converted_revenue),
+                expenses=from_minor(converted_expenses),
+                profit=from_minor(converted_revenue - converted_expenses)
+            )
+        return result
+
+    def get_monthly_revenue(self, year: Optional[int] = None) -> Dict:
+        """Revenus mensuels de l'année par entreprise, totaux mensuels par devise"""
+        year = year or datetime.utcnow().year
+        if not self.businesses:
+            return {"year": year, "businesses": [], "totals_by_currency": {}}
+
+        start, end = year_range(year)
+        month = extract('month', models.Transaction.created_at)
+        results = self._grouped(
+            models.Transaction,
+            month.label('month'),
+            func.sum(models.Transaction.amount_minor),
+            func.count(models.Transaction.id),
+            filters=(
+                models.Transaction.created_at >= start,
+                models.Transaction.created_at < end
+            )
+        ).group_by(models.Transaction.business_id, month).all()
+        archived = models.ArchivedMonthlyTotal
+        results = self._with_archive(
+            [(r[0], int(r[1]), *r[2:]) for r in results],
+            "transaction",
+            archived.month,
+            filters=(archived.year == year,)
+        )
+
+        months_fr = [
+            "Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
+            "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"
+        ]
+
+        # 12 mois par entreprise, indexés par numéro de mois
+        monthly = {
+            business_id: [
+                {"month_num": m, "month_name": months_fr[m - 1], "total": 0.0, "transaction_count": 0}
+                for m in range(1, 13)
+            ]
+            for business_id in self.businesses
+        }
+        totals = {}
+        converted = [0.0] * 12
+        for business_id, month_num, total, count, *converted_total in results:
+            if converted_total:
+                converted[int(month_num) - 1] += float(converted_total[0] or 0)
+            slot = monthly[business_id][int(month_num) - 1]
+            slot["total"] = from_minor(total)
+            slot["transaction_count"] = int(count or 0)
+
+            currency = self._currency(self.businesses[business_id])
+            currency_months = totals.setdefault(currency, [0] * 12)
+            currency_months[int(month_num) - 1] += int(total or 0)
+
+        result = {
+            "year": year,
+            "businesses": [
+                {**self._business_info(business_id), "months": months}
+                for business_id, months in monthly.items()
+            ],
+            "totals_by_currency": {
+                currency: [
+                    {"month_num": m + 1, "month_name": months_fr[m], "total": from_minor(total)}
+                    for m, total in enumerate(values)
+                ]
+                for currency, values in totals.items()
+            }
+        }
+        if self._fx_factor is not None:
+            result["converted"] = self._converted_info(months=[
+                {"month_num": m + 1, "month_name": months_fr[m], "total": from_minor(total)}
+                for m, total in enumerate(converted)
+            ])
+        return result
+
+    def get_cash_flow_by_method(self) -> Dict:
+        """Encaissements par moyen de paiement et par entreprise, totaux par devise"""
+        if not self.businesses:
+            return {"businesses": [], "totals_by_currency": {}}
+
+        results = self._grouped(
+            models.Transaction,
+            models.Transaction.payment_method,
+            func.sum(models.Transaction.amount_minor),
+            func.count(models.Transaction.id)
+        ).group_by(models.Transaction.business_id, models.Transaction.payment_method).all()
+        results = self._with_archive(results, "transaction", models.ArchivedMonthlyTotal.payment_method)
+
+        by_business = {
+            business_id: {"methods": {}, "total": 0, "count": 0}
+            for business_id in self.businesses
+        }
+        totals = {}
+        converted = {}
+        for business_id, method, total, count, *converted_total in results:
+            if converted_total:
+                converted[method] = converted.get(method, 0.0) + float(converted_total[0] or 0)
+            total = int(total or 0)
+            entry = by_business[business_id]
+            entry["methods"][method] = total
+            entry["total"] += total
+            entry["count"] += int(count or 0)
+
+            currency_totals = totals.setdefault(self._currency(self.businesses[business_id]), {"methods": {}, "total": 0})
+            currency_totals["methods"][method] = currency_totals["methods"].get(method, 0) + total
+            currency_totals["total"] += total
+
+        # Conversion en unités principales une fois les cumuls entiers terminés
+        for entry in list(by_business.values()) + list(totals.values()):
+            entry["methods"] = {method: from_minor(total) for method, total in entry["methods"].items()}
+            entry["total"] = from_minor(entry["total"])
+
+        result = {
+            "businesses": [
+                {**self._business_info(business_id), **entry}
+                for business_id, entry in by_business.items()
+            ],
+            "totals_by_currency": totals
+        }
+        if self._fx_factor is not None:
+            result["converted"] = self._converted_info(
+                methods={method: from_minor(total) for method, total in converted.items()},
+                total=from_minor(sum(converted.values()))
+            )
+        return result
@@ -0,0 +1,291 @@
+
+# AFRIFLOW/backend/app/services/tenant_export_service.py : export / import logique d'une entreprise (migration, archivage)
+#
+# Archive: NDJSON compressé (zstd si disponible, sinon gzip), une ligne par enregistrement:
+#   {"format": "afriflow.business", "version": 1, "business_id": 12, ...}   en-tête
+#   {"table": "transactions", "columns": ["id", "amount_minor", ...]}      début de table
+#   [1, 250000, "cash", ...]                                                 une ligne = un tableau
+#   {"end": true, "counts": {"users": 1, "transactions": 48211, ...}}      fin (détecte la troncature)
+#
+# Les colonnes ne sont écrites qu'une fois par table: le fichier reste compact
+# et se lit en flux. monthly_cash_flow (dérivée) et fx_rates (globale) ne sont
+# pas exportées: le cash flow est recalculé à l'import. Des mois archivés
+# (partitions détachées) seuls les agrégats archived_monthly_totals suivent.
+# Les secrets d'authentification (password_hash, token_version) ne quittent
+# jamais la base: un propriétaire créé à l'import reçoit un mot de passe
+# inutilisable et doit le réinitialiser.
+
+import gzip
+import io
+import json
+import logging
+import secrets
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+from sqlalchemy import Date, DateTime, insert, select
+from sqlalchemy.orm import Session
+
+from app.auth import hash_password
+from app.models import models
+from app.services.cash_flow_service import refresh_monthly_cash_flow
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = "afriflow.business"
+ARCHIVE_VERSION = 1
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+users = models.User.__table__
+businesses = models.Business.__table__
+transactions = models.Transaction.__table__
+expenses = models.Expense.__table__
+archived_totals = models.ArchivedMonthlyTotal.__table__
+
+# Ordre d'export = ordre d'import (parents avant enfants)
+EXPORT_TABLES = (users, businesses, transactions, expenses, archived_totals)
+
+# Colonnes jamais écrites dans une archive (identifiants de connexion)
+EXCLUDED_COLUMNS = {"users": ("password_hash", "token_version")}
+
+
+class TenantArchiveError(Exception):
+    """Archive invalide, tronquée ou entreprise introuvable"""
+
+
+def archive_suffix() -> str:
+    return ".ndjson.zst" if zstandard is not None else ".ndjson.gz"
+
+
+def _open_archive(path: Path, mode: str, level: int = 3):
+    """Flux texte compressé; à la lecture, le format est détecté par son en-tête"""
+    if mode == "w":
+        if zstandard is not None:
+            return zstandard.open(path, "wt", cctx=zstandard.ZstdCompressor(level=level), encoding="utf-8")
+        return gzip.open(path, "wt", compresslevel=min(level, 9), encoding="utf-8")
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    if magic == ZSTD_MAGIC:
+        if zstandard is None:
+            raise TenantArchiveError("Archive zstd mais le paquet zstandard n'est pas installé")
+        return zstandard.open(path, "rt", encoding="utf-8")
+    return gzip.open(path, "rt", encoding="utf-8")
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decoders(table, columns: List[str]):
+    """Convertisseurs JSON -> Python par colonne (dates relues depuis ISO 8601)"""
+    decoders = []
+    for name in columns:
+        column_type = table.c[name].type
+        if isinstance(column_type, DateTime):
+            decoders.append(lambda v: datetime.fromisoformat(v) if v is not None else None)
+        elif isinstance(column_type, Date):
+            decoders.append(lambda v: date.fromisoformat(v) if v is not None else None)
+        else:
+            decoders.append(None)
+    return decoders
+
+
+def _exported_columns(table) -> List:
+    excluded = EXCLUDED_COLUMNS.get(table.name, ())
+    return [c for c in table.columns if c.name not in excluded]
+
+
+def _scope(table, business_id: int):
+    """Lignes d'une table appartenant à l'entreprise"""
+    if table is users:
+        return users.c.id == select(businesses.c.owner_id).where(businesses.c.id == business_id).scalar_subquery()
+    if table is businesses:
+        return businesses.c.id == business_id
+    return table.c.business_id == business_id
+
+
+# ========== Export ==========
+
+def export_business(
+    db: Session,
+    business_id: int,
+    path: Union[str, Path],
+    batch_size: int = 10_000,
+    level: int = 3
+) -> Dict:
+    """Écrit l'entreprise (propriétaire, transactions, dépenses) dans une archive NDJSON compressée
+
+    Les lignes sont lues par curseur serveur (yield_per) et écrites au fil de
+    l'eau: la mémoire reste bornée à `batch_size` lignes. Sur PostgreSQL, toutes
+    les tables sont lues dans la même transaction REPEATABLE READ (instantané
+    cohérent); appeler sur une session neuve.
+    """
+    path = Path(path)
+    options = {"isolation_level": "REPEATABLE READ"} if db.get_bind().dialect.name == "postgresql" else {}
+    connection = db.connection(execution_options=options)
+
+    if connection.execute(select(businesses.c.id).where(businesses.c.id == business_id)).first() is None:
+        raise TenantArchiveError(f"Entreprise introuvable: {business_id}")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".part")
+    counts = {}
+    try:
+        with _open_archive(partial, "w", level) as out:
+            out.write(json.dumps({
+                "format": ARCHIVE_FORMAT,
+                "version": ARCHIVE_VERSION,
+                "business_id": business_id,
+                "exported_at": datetime.utcnow().isoformat()
+            }) + "\n")
+
+            for table in EXPORT_TABLES:
+                columns = _exported_columns(table)
+                out.write(json.dumps({"table": table.name, "columns": [c.name for c in columns]}) + "\n")
+                result = connection.execution_options(yield_per=batch_size).execute(
+                    select(*columns).where(_scope(table, business_id)).order_by(*table.primary_key.columns)
+                )
+                count = 0
+                for rows in result.partitions():
+                    out.write("".join(json.dumps([_encode(v) for v in row], ensure_ascii=False) + "\n" for row in rows))
+                    count += len(rows)
+                counts[table.name] = count
+
+            out.write(json.dumps({"end": True, "counts": counts}) + "\n")
+        partial.rename(path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+    logger.info(f"📦 Entreprise {business_id} exportée: {counts} -> {path.name}")
+    return {"path": str(path), "counts": counts, "bytes": path.stat().st_size}
+
+
+# ========== Import ==========
+
+def _read_archive(path: Path) -> Iterator:
+    """Itère (table, colonnes, ligne); contrôle l'en-tête et le bloc de fin"""
+    with _open_archive(path, "r") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != ARCHIVE_FORMAT or header.get("version") != ARCHIVE_VERSION:
+            raise TenantArchiveError(f"Format d'archive non reconnu: {path.name}")
+
+        table = columns = None
+        counts: Dict[str, int] = {}
+        for line in f:
+            record = json.loads(line)
+            if isinstance(record, list):
+                if table is None:
+                    raise TenantArchiveError("Ligne de données avant la déclaration de table")
+                counts[table] += 1
+                yield table, columns, record
+            elif record.get("end"):
+                if record["counts"] != counts:
+                    raise TenantArchiveError(f"Archive incohérente: {counts} != {record['counts']}")
+                return
+            else:
+                table, columns = record["table"], record["columns"]
+                counts[table] = 0
+        raise TenantArchiveError(f"Archive tronquée: {path.name}")
+
+
+def _copy_field(value) -> str:
+    """Valeur au format texte de COPY (NULL = \\N)"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def _write_batch(connection, table, columns: List[str], rows: List[List]) -> None:
+    """COPY sur PostgreSQL (psycopg2), executemany sinon"""
+    if not rows:
+        return
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+        buffer = io.StringIO("".join("\t".join(map(_copy_field, row)) + "\n" for row in rows))
+        cursor = connection.connection.driver_connection.cursor()
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT text)", buffer)
+    else:
+        connection.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+
+def import_business(db: Session, path: Union[str, Path], batch_size: int = 10_000) -> Dict:
+    """Charge une archive d'export comme nouvelle entreprise; renvoie le nouvel id et les comptages
+
+    Les ids sont réattribués par la base cible: le propriétaire est rattaché au
+    compte de même email s'il existe déjà, sinon créé avec un mot de passe
+    inutilisable (l'archive ne contient pas son hash), l'entreprise reçoit un nouvel id, et
+    transactions / dépenses sont chargées par lots (COPY) avec business_id
+    réécrit. Tout se fait dans la transaction de `db`: au commit de l'appelant,
+    l'entreprise apparaît entière; une archive tronquée n'écrit rien.
+    """
+    path = Path(path)
+    connection = db.connection()
+    user_ids: Dict[int, int] = {}
+    business_id: Optional[int] = None
+    counts = {table.name: 0 for table in EXPORT_TABLES}
+    tables = {table.name: table for table in EXPORT_TABLES}
+    batch: List[List] = []
+    table = written = decoders = None
+
+    def flush():
+        if batch:
+            _write_batch(connection, table, written, batch)
+            batch.clear()
+
+    for table_name, columns, row in _read_archive(path):
+        if table is None or table.name != table_name:
+            flush()
+            table = tables.get(table_name)
+            if table is None:
+                raise TenantArchiveError(f"Table inconnue dans l'archive: {table_name}")
+            written = [c for c in columns if c != "id"]
+            decoders = _decoders(table, columns)
+        counts[table_name] += 1
+        values = dict(zip(columns, (d(v) if d else v for d, v in zip(decoders, row))))
+
+        if table is users:
+            existing = connection.execute(select(users.c.id).where(users.c.email == values["email"])).scalar()
+            if existing is None:
+                owner = {k: v for k, v in values.items() if k != "id" and k not in EXCLUDED_COLUMNS["users"]}
+                # Mot de passe aléatoire jamais communiqué: connexion impossible avant réinitialisation
+                owner["password_hash"] = hash_password(secrets.token_urlsafe(32))
+                existing = connection.execute(insert(users).values(owner).returning(users.c.id)).scalar_one()
+            user_ids[values["id"]] = existing
+
+        elif table is businesses:
+            if business_id is not None:
+                raise TenantArchiveError("Une archive ne contient qu'une entreprise")
+            values = {k: v for k, v in values.items() if k not in ("id", "data_version")}
+            values["owner_id"] = user_ids.get(values["owner_id"])
+            if values["owner_id"] is None:
+                raise TenantArchiveError("Propriétaire de l'entreprise absent de l'archive")
+            business_id = connection.execute(insert(businesses).values(values).returning(businesses.c.id)).scalar_one()
+
+        else:
+            if business_id is None:
+                raise TenantArchiveError(f"{table_name} avant l'entreprise dans l'archive")
+            values["business_id"] = business_id
+            batch.append([values[c] for c in written])
+            if len(batch) >= batch_size:
+                flush()
+    flush()
+
+    if business_id is None:
+        raise TenantArchiveError(f"Aucune entreprise dans l'archive: {path.name}")
+
+    # Insertions Core hors ORM: cash flow mensuel recalculé pour la nouvelle entreprise
+    refresh_monthly_cash_flow(connection, [business_id])
+    logger.info(f"📥 Archive {path.name} importée: entreprise {business_id}, {counts}")
+    return {"business_id": business_id, "owner_id": next(iter(user_ids.values()), None), "counts": counts}
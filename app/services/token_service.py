@@ -0,0 +1,148 @@
+
+# AFRIFLOW/backend/app/services/token_service.py : jetons de rafraîchissement (rotation et révocation)
+#
+# Le jeton remis au client est une valeur aléatoire opaque; la base n'en garde
+# que le HMAC-SHA256 (clé SECRET_KEY): une fuite de la table ne donne aucun
+# jeton utilisable, et la vérification coûte une microseconde là où bcrypt
+# (login) en coûte des centaines de millisecondes.
+#
+# Rotation: chaque /users/refresh consomme le jeton (used_at) et en émet un
+# nouveau de la même famille. Un jeton déjà consommé présenté à nouveau
+# signale un vol (l'attaquant ou la victime rejoue un ancien jeton): toute la
+# famille est révoquée et l'utilisateur doit se reconnecter.
+# Exception: rejoué moins de REFRESH_REUSE_GRACE_SECONDS après sa consommation
+# alors que son successeur n'a jamais servi, c'est un client qui réessaie
+# après une réponse perdue (réseau mobile): le successeur, dont la valeur en
+# clair n'est pas gardée, est révoqué et remplacé dans la même famille.
+
+import hashlib
+import hmac
+import logging
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import REFRESH_REUSE_GRACE_SECONDS, REFRESH_TOKEN_EXPIRE_DAYS, SECRET_KEY
+from app.models import models
+
+logger = logging.getLogger(__name__)
+
+refresh_tokens = models.RefreshToken.__table__
+
+
+class RefreshTokenError(Exception):
+    """Jeton de rafraîchissement inconnu, expiré, révoqué ou réutilisé"""
+
+
+def hash_refresh_token(token: str) -> str:
+    return hmac.new(SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+
+def issue_refresh_token(db: Session, user_id: int, family_id: Optional[str] = None) -> str:
+    """Crée un jeton (nouvelle famille par défaut) et renvoie sa valeur en clair, jamais stockée"""
+    token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    db.execute(refresh_tokens.insert().values(
+        user_id=user_id,
+        family_id=family_id or secrets.token_hex(16),
+        token_hash=hash_refresh_token(token),
+        created_at=now,
+        expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+
+def revoke_family(db: Session, family_id: str) -> int:
+    return db.execute(
+        update(refresh_tokens)
+        .where(refresh_tokens.c.family_id == family_id, refresh_tokens.c.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    ).rowcount
+
+
+def revoke_user_refresh_tokens(db: Session, user_id: int) -> int:
+    """Révocation en masse: tous les jetons de l'utilisateur (tous appareils)"""
+    return db.execute(
+        update(refresh_tokens)
+        .where(refresh_tokens.c.user_id == user_id, refresh_tokens.c.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    ).rowcount
+
+
+def revoke_refresh_token(db: Session, token: str) -> int:
+    """Déconnexion d'un appareil: révoque la famille du jeton (sans erreur si inconnu)"""
+    family_id = db.execute(
+        select(refresh_tokens.c.family_id).where(refresh_tokens.c.token_hash == hash_refresh_token(token))
+    ).scalar()
+    return revoke_family(db, family_id) if family_id else 0
+
+
+def _replace_unused_successor(db: Session, record, now: datetime) -> bool:
+    """Révoque les successeurs de `record` s'il est consommé depuis moins que le délai de grâce
+
+    Renvoie False si le délai est passé ou si un successeur a déjà servi
+    (le client l'a bien reçu: le rejeu est alors suspect).
+    """
+    used_at = db.execute(select(refresh_tokens.c.used_at).where(refresh_tokens.c.id == record.id)).scalar()
+    if used_at is None or now - used_at > timedelta(seconds=REFRESH_REUSE_GRACE_SECONDS):
+        return False
+    successors = (refresh_tokens.c.family_id == record.family_id, refresh_tokens.c.created_at >= used_at)
+    if db.execute(select(refresh_tokens.c.id).where(*successors, refresh_tokens.c.used_at.isnot(None))).first():
+        return False
+    db.execute(
+        update(refresh_tokens)
+        .where(*successors, refresh_tokens.c.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+    return True
+
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[int, str]:
+    """Consomme `token` et émet son successeur; renvoie (user_id, nouveau jeton)
+
+    La consommation est un UPDATE conditionnel (used_at IS NULL): de deux
+    requêtes concurrentes avec le même jeton, une seule gagne, l'autre est
+    traitée comme une réutilisation (sauf délai de grâce, voir en tête du
+    module). Valider (commit) dans tous les cas: une révocation de famille
+    doit persister même si la requête échoue.
+    """
+    record = db.execute(
+        select(refresh_tokens).where(refresh_tokens.c.token_hash == hash_refresh_token(token))
+    ).first()
+    now = datetime.utcnow()
+    if record is None or record.revoked_at is not None or record.expires_at <= now:
+        raise RefreshTokenError("Jeton de rafraîchissement invalide ou expiré")
+
+    consumed = db.execute(
+        update(refresh_tokens)
+        .where(refresh_tokens.c.id == record.id, refresh_tokens.c.used_at.is_(None))
+        .values(used_at=now)
+    ).rowcount
+    if not consumed:
+        if _replace_unused_successor(db, record, now):
+            logger.info(f"🔁 Rafraîchissement rejoué dans le délai de grâce (utilisateur {record.user_id})")
+            return record.user_id, issue_refresh_token(db, record.user_id, record.family_id)
+        revoked = revoke_family(db, record.family_id)
+        logger.warning(
+            f"🚨 Réutilisation d'un jeton de rafraîchissement (utilisateur {record.user_id}): "
+            f"famille révoquée ({revoked} jetons)"
+        )
+        raise RefreshTokenError("Jeton de rafraîchissement déjà utilisé: session révoquée")
+
+    return record.user_id, issue_refresh_token(db, record.user_id, record.family_id)
+
+
+def purge_refresh_tokens(db: Session, older_than_days: int = 7) -> int:
+    """Supprime les jetons expirés ou révoqués depuis plus de `older_than_days` jours
+
+    Les jetons consommés mais encore valides sont gardés: ils servent à
+    détecter la réutilisation.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    return db.execute(delete(refresh_tokens).where(or_(
+        refresh_tokens.c.expires_at < cutoff,
+        refresh_tokens.c.revoked_at < cutoff
+    ))).rowcount
@@ -0,0 +1,133 @@
+
+# AFRIFLOW/backend/scripts/bench_compression.py : taille et coût CPU de la compression des réponses
+#
+# Usage:
+#   python scripts/bench_compression.py                   # listes de 1k / 10k transactions, dashboard, analytics
+#   python scripts/bench_compression.py --rows 50000 --repeat 5
+#
+# Pour chaque charge utile JSON typique de l'API, compare gzip (niveaux 1, 6, 9)
+# et brotli (qualités 1, 4, 6, 11 si le paquet est installé): taux de
+# compression, temps de compression et débit. Sert à choisir les valeurs par
+# défaut de COMPRESSION_CONFIG (gzip 6, brotli 4).
+
+import argparse
+import os
+import random
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import orjson
+
+from app.schemas import schemas
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def transaction_list(rows: int, seed: int) -> bytes:
+    """Même forme que GET /transactions/"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    return schemas.TransactionRowsAdapter.dump_json([
+        {
+            "id": i + 1,
+            "amount": float(rng.randint(500, 200_000)),
+            "payment_method": rng.choice(["cash", "mobile_money", "card"]),
+            "category": rng.choice(["Vente", "Service", "Abonnement"]),
+            "description": "Vente",
+            "created_at": start + timedelta(seconds=rng.randint(0, 365 * 86400)),
+            "business_id": 1
+        }
+        for i in range(rows)
+    ])
+
+
+def daily_stats(days: int, seed: int) -> bytes:
+    """Même forme que GET /analytics/{id}/daily-stats"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    series = []
+    for d in range(days):
+        revenue = rng.randint(0, 500_000)
+        expenses = rng.randint(0, 300_000)
+        series.append({
+            "date": (start + timedelta(days=d)).date().isoformat(),
+            "revenue": revenue,
+            "expenses": expenses,
+            "profit": revenue - expenses,
+            "transaction_count": rng.randint(0, 80)
+        })
+    return orjson.dumps({"business_id": 1, "period_days": days, "daily_stats": series})
+
+
+def dashboard(businesses: int, seed: int) -> bytes:
+    """Même forme que GET /dashboard/"""
+    rng = random.Random(seed)
+    return orjson.dumps({
+        "total_revenue": rng.randint(0, 10**8),
+        "total_expenses": rng.randint(0, 10**8),
+        "businesses": [
+            {"id": i, "name": f"Entreprise {i}", "revenue": rng.randint(0, 10**7), "expenses": rng.randint(0, 10**7)}
+            for i in range(businesses)
+        ]
+    })
+
+
+def codecs():
+    cases = [(f"gzip-{level}", lambda data, level=level: _gzip(data, level)) for level in (1, 6, 9)]
+    if brotli is not None:
+        cases += [
+            (f"br-{quality}", lambda data, quality=quality: brotli.compress(data, quality=quality))
+            for quality in (1, 4, 6, 11)
+        ]
+    return cases
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def run(rows: int, repeat: int, seed: int):
+    payloads = [
+        ("dashboard (20 entreprises)", dashboard(20, seed)),
+        ("daily-stats (365 jours)", daily_stats(365, seed)),
+        ("transactions (1k)", transaction_list(1_000, seed)),
+        (f"transactions ({rows // 1000}k)", transaction_list(rows, seed)),
+    ]
+    if brotli is None:
+        print("⚠️ brotli non installé: seuls les niveaux gzip sont mesurés")
+
+    print(f"{'charge utile':<28} {'codec':<8} {'Ko brut':>9} {'Ko comp.':>9} {'ratio':>7} {'ms':>9} {'Mo/s':>8}")
+    for name, data in payloads:
+        for codec, compress in codecs():
+            best, compressed = float("inf"), b""
+            for _ in range(repeat):
+                started = time.process_time()
+                compressed = compress(data)
+                best = min(best, time.process_time() - started)
+            throughput = len(data) / 1e6 / best if best > 0 else float("inf")
+            print(
+                f"{name:<28} {codec:<8} {len(data) / 1024:>9.1f} {len(compressed) / 1024:>9.1f} "
+                f"{len(data) / len(compressed):>6.1f}x {best * 1000:>9.2f} {throughput:>8.0f}"
+            )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de compression des réponses JSON")
+    parser.add_argument("--rows", type=int, default=10_000, help="Taille de la grande liste de transactions")
+    parser.add_argument("--repeat", type=int, default=3, help="Répétitions (meilleur temps CPU retenu)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run(args.rows, args.repeat, args.seed)
@@ -0,0 +1,145 @@
+
+# AFRIFLOW/backend/scripts/bench_list_serialization.py : coût de sérialisation des listes de transactions
+#
+# Usage:
+#   python scripts/bench_list_serialization.py                 # 10k et 100k lignes, SQLite temporaire
+#   python scripts/bench_list_serialization.py --rows 10000 50000 --url postgresql://...
+#
+# Compare, pour GET /transactions/:
+#   - orm + response_model : objets ORM, validation Pydantic par ligne puis json stdlib (ancien chemin)
+#   - orm + orjson         : idem avec ORJSONResponse comme classe de réponse par défaut
+#   - lignes + TypeAdapter : tuples de colonnes sérialisés en bloc par pydantic-core (nouveau chemin)
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.database import Base
+from app.models import models
+from app.schemas import schemas
+
+ResponseModelAdapter = TypeAdapter(List[schemas.TransactionOut])
+
+
+def _populate(engine, rows: int, seed: int):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User.__table__), [{"id": 1, "email": "bench@afriflow.com", "password_hash": "x"}])
+        conn.execute(insert(models.Business.__table__), [{"id": 1, "name": "Bench", "currency": "FCFA", "owner_id": 1}])
+        conn.execute(insert(models.Transaction.__table__), [
+            {
+                "amount_minor": rng.randint(500, 200_000) * 100,
+                "payment_method": rng.choice(["cash", "mobile_money", "card"]),
+                "category": rng.choice(["Vente", "Service", "Abonnement"]),
+                "description": "Vente",
+                "created_at": start + timedelta(seconds=rng.randint(0, 365 * 86400)),
+                "business_id": 1
+            }
+            for _ in range(rows)
+        ])
+
+
+def orm_response_model(db, dumps) -> bytes:
+    """Chemin FastAPI avec response_model: validation puis sérialisation en objets Python, puis JSON"""
+    transactions = db.query(models.Transaction).filter(models.Transaction.business_id == 1).all()
+    validated = ResponseModelAdapter.validate_python(transactions, from_attributes=True)
+    return dumps(ResponseModelAdapter.dump_python(validated, mode="json"))
+
+
+def rows_type_adapter(db) -> bytes:
+    """Nouveau chemin: colonnes seules et dump_json en bloc"""
+    query = db.query(
+        models.Transaction.id,
+        models.Transaction.amount_column(),
+        models.Transaction.payment_method,
+        models.Transaction.category,
+        models.Transaction.description,
+        models.Transaction.created_at,
+        models.Transaction.business_id
+    ).filter(models.Transaction.business_id == 1)
+    return schemas.TransactionRowsAdapter.dump_json([row._asdict() for row in query])
+
+
+def stdlib_dumps(content) -> bytes:
+    # Équivalent de JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def orjson_dumps(content) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _best_of(session_factory, fn, repeat: int):
+    best, payload = float("inf"), b""
+    for _ in range(repeat):
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            payload = fn(db)
+            best = min(best, time.perf_counter() - started)
+        finally:
+            db.close()
+    return best, payload
+
+
+def run(url: str, sizes: List[int], repeat: int, seed: int):
+    print(f"{'lignes':>8} {'chemin':<24} {'temps (ms)':>12} {'Mo':>8} {'vs ancien':>10}")
+    for rows in sizes:
+        engine = create_engine(url)
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        try:
+            _populate(engine, rows, seed)
+            session_factory = sessionmaker(bind=engine)
+
+            cases = [
+                ("orm + response_model", lambda db: orm_response_model(db, stdlib_dumps)),
+                ("orm + orjson", lambda db: orm_response_model(db, orjson_dumps)),
+                ("lignes + TypeAdapter", rows_type_adapter),
+            ]
+            baseline = None
+            payloads = []
+            for name, fn in cases:
+                elapsed, payload = _best_of(session_factory, fn, repeat)
+                baseline = baseline or elapsed
+                payloads.append(payload)
+                print(f"{rows:>8,} {name:<24} {elapsed * 1000:>12.1f} {len(payload) / 1e6:>8.2f} {baseline / elapsed:>9.2f}x")
+
+            # Les trois chemins produisent le même JSON
+            decoded = [json.loads(p) for p in payloads]
+            assert decoded[0] == decoded[1] == decoded[2], "Sorties JSON différentes"
+        finally:
+            Base.metadata.drop_all(engine)
+            engine.dispose()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de sérialisation des listes de transactions")
+    parser.add_argument("--url", help="URL de base de données (défaut: SQLite temporaire)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000], help="Tailles de liste")
+    parser.add_argument("--repeat", type=int, default=3, help="Répétitions (meilleur temps retenu)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        run(url, args.rows, args.repeat, args.seed)
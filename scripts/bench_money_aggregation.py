@@ -0,0 +1,139 @@
+
+# AFRIFLOW/backend/scripts/bench_money_aggregation.py : coût des agrégats FLOAT vs BIGINT (unités mineures)
+#
+# Usage:
+#   python scripts/bench_money_aggregation.py                       # SQLite temporaire
+#   python scripts/bench_money_aggregation.py --url postgresql://...  --rows 2000000
+#
+# Crée deux tables jetables (float et bigint) avec les mêmes montants, puis
+# mesure SUM global et SUM ... GROUP BY business_id, mois. Affiche aussi
+# l'écart entre la somme float et la somme exacte.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+import numpy as np
+from sqlalchemy import (
+    BigInteger, Column, DateTime, Float, Integer, MetaData, Table, create_engine, extract, func, insert, select
+)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.schemas.money import MINOR_UNITS
+
+metadata = MetaData()
+
+float_table = Table(
+    "bench_amount_float", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("business_id", Integer, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("amount", Float, nullable=False),
+)
+
+minor_table = Table(
+    "bench_amount_minor", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("business_id", Integer, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("amount_minor", BigInteger, nullable=False),
+)
+
+
+def _populate(engine, rows: int, businesses: int, chunk_size: int, seed: int) -> int:
+    """Remplit les deux tables avec les mêmes montants; renvoie la somme exacte en unités mineures"""
+    rng = np.random.default_rng(seed)
+    # Montants avec centimes pour rendre visible la dérive du float
+    minor = rng.integers(50_000, 20_000_000, size=rows, dtype=np.int64)
+    business_ids = rng.integers(1, businesses + 1, size=rows)
+    created_at = (
+        np.datetime64("2025-01-01T00:00:00") + rng.integers(0, 365 * 86400, size=rows).astype("timedelta64[s]")
+    ).astype(object)
+
+    with engine.begin() as conn:
+        for offset in range(0, rows, chunk_size):
+            sl = slice(offset, offset + chunk_size)
+            chunk = list(zip(business_ids[sl].tolist(), created_at[sl].tolist(), minor[sl].tolist()))
+            conn.execute(insert(float_table), [
+                {"business_id": b, "created_at": c, "amount": m / MINOR_UNITS} for b, c, m in chunk
+            ])
+            conn.execute(insert(minor_table), [
+                {"business_id": b, "created_at": c, "amount_minor": m} for b, c, m in chunk
+            ])
+    return int(minor.sum())
+
+
+def _best_of(engine, statement, repeat: int):
+    """Meilleur temps sur `repeat` exécutions et dernier résultat"""
+    best, result = float("inf"), None
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = conn.execute(statement).all()
+            best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run(url: str, rows: int, businesses: int, repeat: int, chunk_size: int, seed: int):
+    engine = create_engine(url)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    try:
+        print(f"📦 {rows:,} lignes, {businesses} entreprises ({engine.dialect.name})")
+        exact_minor = _populate(engine, rows, businesses, chunk_size, seed)
+
+        cases = [
+            ("SUM", select(func.sum(float_table.c.amount)), select(func.sum(minor_table.c.amount_minor))),
+            (
+                "SUM GROUP BY business, mois",
+                select(
+                    float_table.c.business_id,
+                    extract("month", float_table.c.created_at).label("month"),
+                    func.sum(float_table.c.amount)
+                ).group_by(float_table.c.business_id, "month"),
+                select(
+                    minor_table.c.business_id,
+                    extract("month", minor_table.c.created_at).label("month"),
+                    func.sum(minor_table.c.amount_minor)
+                ).group_by(minor_table.c.business_id, "month"),
+            ),
+        ]
+
+        print(f"{'requête':<30} {'float (ms)':>12} {'bigint (ms)':>12} {'ratio':>8}")
+        float_total = None
+        for name, float_stmt, minor_stmt in cases:
+            float_time, float_result = _best_of(engine, float_stmt, repeat)
+            minor_time, _ = _best_of(engine, minor_stmt, repeat)
+            if name == "SUM":
+                float_total = float_result[0][0]
+            print(f"{name:<30} {float_time * 1000:>12.1f} {minor_time * 1000:>12.1f} {float_time / minor_time:>8.2f}")
+
+        exact = Decimal(exact_minor) / MINOR_UNITS
+        drift = Decimal(repr(float_total)) - exact
+        print(f"🎯 Somme exacte: {exact}  |  somme float: {float_total!r}  |  écart: {drift}")
+    finally:
+        metadata.drop_all(engine)
+        engine.dispose()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark des agrégats de montants FLOAT vs BIGINT")
+    parser.add_argument("--url", help="URL de base de données (défaut: SQLite temporaire)")
+    parser.add_argument("--rows", type=int, default=500_000, help="Nombre de lignes")
+    parser.add_argument("--businesses", type=int, default=100, help="Nombre d'entreprises")
+    parser.add_argument("--repeat", type=int, default=5, help="Répétitions par requête (meilleur temps retenu)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Taille des lots d'insertion")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        run(url, args.rows, args.businesses, args.repeat, args.chunk_size, args.seed)
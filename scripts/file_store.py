@@ -0,0 +1,308 @@
+
+# AFRIFLOW/backend/scripts/file_store.py : sauvegarde incrémentale des fichiers (chunks adressés par contenu)
+#
+# Organisation du dépôt (BACKUP_DIR/files):
+#   chunks/ab/abcdef....zst        contenu compressé, nommé par le sha256 du contenu brut
+#   manifests/files_manifest_<horodatage>.json.gz
+#                                  chemin relatif -> taille, mtime, sha256, liste des chunks
+#
+# Un fichier inchangé (taille + mtime identiques au manifeste précédent) n'est
+# pas relu; un fichier modifié n'écrit que ses chunks encore inconnus. Chaque
+# manifeste décrit l'état complet à son horodatage: restaurer un point dans le
+# temps revient à réassembler les chunks qu'il référence.
+#
+# Avec un client S3, le même arbre est répliqué sous s3://<bucket>/backups/files/:
+# la restauration y lit les chunks absents du disque, et la rétention purge
+# les deux copies.
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PREFIX = "files_manifest_"
+MANIFEST_SUFFIX = ".json.gz"
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+S3_PREFIX = "backups/files"
+# Limite de delete_objects
+S3_DELETE_BATCH = 1000
+
+
+class FileStoreError(Exception):
+    """Manifeste introuvable, chunk manquant ou contenu corrompu"""
+
+
+def _compress(data: bytes, level: int) -> Tuple[bytes, str]:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=level).compress(data), ".zst"
+    return gzip.compress(data, compresslevel=min(level, 9)), ".gz"
+
+
+def _decompress(data: bytes, suffix: str) -> bytes:
+    if suffix == ".zst":
+        if zstandard is None:
+            raise FileStoreError("Chunk zstd mais le paquet zstandard n'est pas installé")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _manifest_timestamp(name: str) -> str:
+    return name[len(MANIFEST_PREFIX):-len(MANIFEST_SUFFIX)]
+
+
+def _expired(names: List[str], limit: str) -> List[str]:
+    """Manifestes antérieurs à `limit`; le plus récent est toujours gardé"""
+    return [n for n in sorted(names)[:-1] if _manifest_timestamp(n) < limit]
+
+
+def _referenced_chunks(manifest: Dict) -> Set[str]:
+    return {digest for entry in manifest["files"].values() for digest in entry["chunks"]}
+
+
+class FileStore:
+    """Dépôt de chunks adressés par contenu + manifestes horodatés (répliqués sur S3 si configuré)"""
+
+    def __init__(
+        self,
+        root: Path,
+        chunk_size: int = 4 * 1024 * 1024,
+        compression_level: int = 3,
+        s3_client=None,
+        bucket: Optional[str] = None
+    ):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+        self.compression_level = compression_level
+        self.chunks_dir = self.root / "chunks"
+        self.manifests_dir = self.root / "manifests"
+        self.s3 = s3_client
+        self.bucket = bucket
+
+    # ----- S3 -----
+
+    def s3_key(self, path: Path) -> str:
+        """Clé S3 d'un chunk ou manifeste du dépôt local"""
+        return f"{S3_PREFIX}/{Path(path).relative_to(self.root).as_posix()}"
+
+    def _s3_keys(self, prefix: str) -> Iterator[str]:
+        for page in self.s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=f"{S3_PREFIX}/{prefix}"):
+            for item in page.get("Contents", []):
+                yield item["Key"]
+
+    def _s3_read(self, key: str) -> bytes:
+        return self.s3.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def _s3_delete(self, keys: List[str]) -> None:
+        for start in range(0, len(keys), S3_DELETE_BATCH):
+            self.s3.delete_objects(Bucket=self.bucket, Delete={
+                "Objects": [{"Key": key} for key in keys[start:start + S3_DELETE_BATCH]],
+                "Quiet": True
+            })
+
+    # ----- Chunks -----
+
+    def chunk_path(self, digest: str) -> Optional[Path]:
+        for suffix in (".zst", ".gz"):
+            path = self.chunks_dir / digest[:2] / f"{digest}{suffix}"
+            if path.exists():
+                return path
+        return None
+
+    def put_chunk(self, data: bytes) -> Tuple[str, Optional[Path]]:
+        """Stocke un chunk s'il est inconnu; renvoie (sha256, chemin écrit ou None si déjà présent)"""
+        digest = hashlib.sha256(data).hexdigest()
+        if self.chunk_path(digest) is not None:
+            return digest, None
+        compressed, suffix = _compress(data, self.compression_level)
+        path = self.chunks_dir / digest[:2] / f"{digest}{suffix}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Écriture atomique: un chunk visible est toujours complet
+        partial = path.with_name(path.name + ".part")
+        partial.write_bytes(compressed)
+        partial.rename(path)
+        return digest, path
+
+    def read_chunk(self, digest: str) -> bytes:
+        """Contenu brut d'un chunk, lu sur disque ou à défaut sur S3"""
+        path = self.chunk_path(digest)
+        if path is not None:
+            compressed, suffix, source = path.read_bytes(), path.suffix, str(path)
+        else:
+            # Disque perdu ou chunk purgé localement: la copie S3 fait foi
+            key = next(self._s3_keys(f"chunks/{digest[:2]}/{digest}."), None) if self.s3 is not None else None
+            if key is None:
+                raise FileStoreError(f"Chunk manquant: {digest}")
+            compressed, suffix, source = self._s3_read(key), Path(key).suffix, f"s3://{self.bucket}/{key}"
+        data = _decompress(compressed, suffix)
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise FileStoreError(f"Chunk corrompu: {source}")
+        return data
+
+    # ----- Manifestes -----
+
+    def manifest_names(self) -> List[str]:
+        return sorted(p.name for p in self.manifests_dir.glob(f"{MANIFEST_PREFIX}*{MANIFEST_SUFFIX}"))
+
+    def load_manifest(self, at: str = "latest") -> Dict:
+        """Manifeste `latest`, par nom, ou le dernier pris au plus tard à l'horodatage YYYYmmdd_HHMMSS"""
+        names = self.manifest_names()
+        if at == "latest":
+            candidates = names
+        elif at in names:
+            candidates = [at]
+        else:
+            candidates = [n for n in names if _manifest_timestamp(n) <= at]
+        if not candidates:
+            raise FileStoreError(f"Aucun manifeste pour {at}")
+        with gzip.open(self.manifests_dir / candidates[-1], "rt", encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest["name"] = candidates[-1]
+        return manifest
+
+    def _previous_files(self) -> Dict:
+        try:
+            return self.load_manifest("latest")["files"]
+        except FileStoreError:
+            return {}
+
+    # ----- Sauvegarde -----
+
+    def _hash_file(self, path: Path, new_chunks: List[Path]) -> Dict:
+        file_hash = hashlib.sha256()
+        chunks = []
+        with open(path, "rb") as f:
+            for data in iter(lambda: f.read(self.chunk_size), b""):
+                file_hash.update(data)
+                digest, written = self.put_chunk(data)
+                chunks.append(digest)
+                if written is not None:
+                    new_chunks.append(written)
+        return {"sha256": file_hash.hexdigest(), "chunks": chunks}
+
+    def backup(self, sources: Iterable[Path], timestamp: datetime) -> Dict:
+        """Sauvegarde incrémentale de `sources`; renvoie le manifeste écrit et les statistiques
+
+        Les chemins sont relatifs au parent de chaque source (invoices/2026/f.pdf),
+        ce qui évite les collisions entre fichiers de même nom.
+        """
+        previous = self._previous_files()
+        files = {}
+        new_chunks: List[Path] = []
+        changed = 0
+
+        for source in map(Path, sources):
+            if not source.exists():
+                continue
+            for path in sorted(p for p in source.rglob("*") if p.is_file() and not p.is_symlink()):
+                relative = path.relative_to(source.parent).as_posix()
+                try:
+                    stat = path.stat()
+                    entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                    known = previous.get(relative)
+                    if known and known["size"] == entry["size"] and known["mtime_ns"] == entry["mtime_ns"]:
+                        # Inchangé: ni lecture ni hachage
+                        entry.update(sha256=known["sha256"], chunks=known["chunks"])
+                    else:
+                        entry.update(self._hash_file(path, new_chunks))
+                        changed += 1
+                except FileNotFoundError:
+                    # Supprimé pendant la sauvegarde (rotation de logs...)
+                    logger.warning(f"⚠️ Fichier disparu pendant la sauvegarde: {path}")
+                    continue
+                files[relative] = entry
+
+        name = f"{MANIFEST_PREFIX}{timestamp.strftime(TIMESTAMP_FORMAT)}{MANIFEST_SUFFIX}"
+        manifest_path = self.manifests_dir / name
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+        with gzip.open(manifest_path, "wt", encoding="utf-8") as f:
+            json.dump({"created_at": timestamp.isoformat(), "chunk_size": self.chunk_size, "files": files}, f)
+
+        return {
+            "manifest": manifest_path,
+            "files": len(files),
+            "changed": changed,
+            "deleted": len(set(previous) - set(files)),
+            "new_chunks": new_chunks,
+            "new_bytes": sum(p.stat().st_size for p in new_chunks)
+        }
+
+    # ----- Restauration -----
+
+    def restore(self, target: Path, at: str = "latest", paths: Optional[Iterable[str]] = None) -> int:
+        """Réassemble les fichiers du manifeste `at` sous `target` (tous, ou ceux sous `paths`)"""
+        manifest = self.load_manifest(at)
+        prefixes = [p.rstrip("/") for p in paths] if paths else None
+        restored = 0
+
+        for relative, entry in manifest["files"].items():
+            if prefixes and not any(relative == p or relative.startswith(p + "/") for p in prefixes):
+                continue
+            destination = Path(target) / relative
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            file_hash = hashlib.sha256()
+            with open(destination, "wb") as f:
+                for digest in entry["chunks"]:
+                    data = self.read_chunk(digest)
+                    file_hash.update(data)
+                    f.write(data)
+            if file_hash.hexdigest() != entry["sha256"]:
+                raise FileStoreError(f"Empreinte invalide après restauration: {relative}")
+            os.utime(destination, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+            restored += 1
+
+        logger.info(f"✅ {restored} fichiers restaurés depuis {manifest['name']}")
+        return restored
+
+    # ----- Rétention -----
+
+    def prune(self, cutoff: datetime) -> Dict:
+        """Supprime les manifestes antérieurs à `cutoff` (le dernier est gardé) et les chunks orphelins
+
+        Avec S3, la même règle s'applique à la copie distante.
+        """
+        limit = cutoff.strftime(TIMESTAMP_FORMAT)
+        expired = _expired(self.manifest_names(), limit)
+        for name in expired:
+            (self.manifests_dir / name).unlink()
+
+        referenced = set()
+        for name in self.manifest_names():
+            referenced |= _referenced_chunks(self.load_manifest(name))
+
+        removed = 0
+        for path in self.chunks_dir.glob("*/*"):
+            if path.name.split(".")[0] not in referenced:
+                path.unlink()
+                removed += 1
+
+        result = {"manifests": len(expired), "chunks": removed}
+        if self.s3 is not None:
+            result.update(self._prune_s3(limit, referenced))
+        return result
+
+    def _prune_s3(self, limit: str, referenced: Set[str]) -> Dict:
+        """Rétention côté S3: manifestes expirés, puis chunks qu'aucun manifeste restant ne référence"""
+        names = [key.rsplit("/", 1)[1] for key in self._s3_keys(f"manifests/{MANIFEST_PREFIX}")]
+        expired = _expired(names, limit)
+        self._s3_delete([f"{S3_PREFIX}/manifests/{name}" for name in expired])
+
+        # Manifestes présents seulement sur S3 (disque local perdu ou purgé): leurs chunks restent
+        referenced = set(referenced)
+        local = set(self.manifest_names())
+        for name in sorted(set(names) - set(expired) - local):
+            referenced |= _referenced_chunks(json.loads(gzip.decompress(self._s3_read(f"{S3_PREFIX}/manifests/{name}"))))
+
+        orphans = [key for key in self._s3_keys("chunks/") if key.rsplit("/", 1)[1].split(".")[0] not in referenced]
+        self._s3_delete(orphans)
+        return {"s3_manifests": len(expired), "s3_chunks": len(orphans)}
@@ -0,0 +1,65 @@
+# AFRIFLOW/backend/scripts/migrate.py : migrations Alembic au déploiement (pre-deploy Render)
+
+#!/usr/bin/env python
+"""Applique les migrations Alembic jusqu'à head
+
+Les bases créées avant Alembic (create_tables()) ont déjà le schéma 0001
+mais pas de table alembic_version: `alembic upgrade head` y rejouerait
+CREATE TABLE users et échouerait. Elles sont d'abord marquées 0001
+(alembic stamp), une seule fois, puis migrées normalement.
+
+    python scripts/migrate.py
+"""
+
+import logging
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PROCESS_ROLE", "cron")
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+
+from app.config import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Révision correspondant au schéma de create_tables()
+BASELINE_REVISION = "0001"
+
+
+def alembic_config(url: str) -> Config:
+    config = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BASE_DIR, "alembic"))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def stamp_legacy_database(config: Config, url: str) -> bool:
+    """Marque BASELINE_REVISION une base créée par create_tables(); renvoie True si marquée"""
+    engine = create_engine(url)
+    try:
+        tables = set(inspect(engine).get_table_names())
+    finally:
+        engine.dispose()
+    if "users" in tables and "alembic_version" not in tables:
+        command.stamp(config, BASELINE_REVISION)
+        logger.info(f"🏷️ Base existante sans historique Alembic: marquée {BASELINE_REVISION}")
+        return True
+    return False
+
+
+def migrate(url: str) -> None:
+    config = alembic_config(url)
+    stamp_legacy_database(config, url)
+    command.upgrade(config, "head")
+    logger.info("✅ Migrations appliquées (head)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL non définie")
+    migrate(DATABASE_URL)
@@ -0,0 +1,260 @@
+
+# AFRIFLOW/backend/scripts/restore.py : restauration de la base (disque local ou S3) avec pg_restore -j et vérification
+#
+# Usage (via backup.py):
+#   python scripts/backup.py restore --target-url postgresql://... [--backup latest] [--source s3] [--jobs 4]
+#
+# Phases chronométrées (RTO): téléchargement + décompression + contrôle sha256,
+# pg_restore, puis vérification du nombre de lignes par table contre les
+# comptages enregistrés au moment du dump (même snapshot que pg_dump).
+
+import hashlib
+import json
+import logging
+import subprocess
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from scripts.backup import COMPRESSION_SUFFIXES, table_row_counts, zstandard
+
+logger = logging.getLogger(__name__)
+
+DUMP_PREFIX = "db_backup_"
+
+
+class RestoreError(Exception):
+    """Sauvegarde introuvable, checksum invalide ou pg_restore en échec"""
+
+
+def open_decompressor(compression: str):
+    """Décompresseur incrémental (méthode decompress) pour le flux écrit par stream_command"""
+    if compression == "zstd":
+        if zstandard is None:
+            raise RestoreError("Sauvegarde zstd mais le paquet zstandard n'est pas installé")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+def _compression_of(name: str) -> str:
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if name.endswith(f".dump{suffix}"):
+            return compression
+    raise RestoreError(f"Extension de sauvegarde inconnue: {name}")
+
+
+def _is_dump(name: str) -> bool:
+    return name.startswith(DUMP_PREFIX) and any(name.endswith(f".dump{s}") for s in COMPRESSION_SUFFIXES.values())
+
+
+class AfriflowRestore:
+    """Restauration d'un dump produit par AfriflowBackup.backup_database"""
+
+    def __init__(
+        self,
+        backup_dir: Path,
+        s3_client=None,
+        bucket: Optional[str] = None,
+        workdir: Optional[Path] = None,
+        chunk_size: int = 1024 * 1024
+    ):
+        self.backup_dir = Path(backup_dir)
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.workdir = Path(workdir) if workdir else self.backup_dir
+        self.chunk_size = chunk_size
+
+    # ----- Sélection de la sauvegarde -----
+
+    def find_backup(self, name: str = "latest", source: str = "local") -> Dict:
+        """Localise la sauvegarde `name` (ou la plus récente) sur le disque local ou S3"""
+        if source == "s3":
+            if self.s3_client is None:
+                raise RestoreError("S3 non configuré")
+            keys = []
+            for page in self.s3_client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix="backups/"):
+                keys += [obj["Key"] for obj in page.get("Contents", []) if _is_dump(obj["Key"].rsplit("/", 1)[-1])]
+            candidates = {key.rsplit("/", 1)[-1]: key for key in keys}
+        else:
+            candidates = {p.name: p for p in self.backup_dir.glob(f"{DUMP_PREFIX}*") if _is_dump(p.name)}
+
+        if not candidates:
+            raise RestoreError(f"Aucune sauvegarde de base ({source})")
+        chosen = max(candidates) if name == "latest" else name
+        if chosen not in candidates:
+            raise RestoreError(f"Sauvegarde introuvable ({source}): {name}")
+        return {"name": chosen, "source": source, "location": candidates[chosen]}
+
+    def _metadata(self, ref: Dict) -> Dict:
+        """Métadonnées du dump (sha256, comptages); à défaut, le sidecar .sha256"""
+        try:
+            if ref["source"] == "s3":
+                body = self.s3_client.get_object(Bucket=self.bucket, Key=f"{ref['location']}.json")["Body"].read()
+            else:
+                body = ref["location"].with_name(ref["name"] + ".json").read_bytes()
+            return json.loads(body)
+        except Exception:
+            logger.warning(f"⚠️ Métadonnées absentes pour {ref['name']}: pas de vérification des lignes")
+        if ref["source"] == "s3":
+            try:
+                checksum = self.s3_client.get_object(Bucket=self.bucket, Key=f"{ref['location']}.sha256")["Body"].read()
+                return {"sha256": checksum.decode().split()[0]}
+            except Exception:
+                pass
+        return {}
+
+    @contextmanager
+    def open_backup(self, ref: Dict):
+        if ref["source"] == "s3":
+            body = self.s3_client.get_object(Bucket=self.bucket, Key=ref["location"])["Body"]
+            try:
+                yield body
+            finally:
+                body.close()
+        else:
+            with open(ref["location"], "rb") as f:
+                yield f
+
+    # ----- Phases -----
+
+    def fetch(self, reader: BinaryIO, sink: BinaryIO, compression: str, expected_sha256: Optional[str]) -> Dict:
+        """Lit, décompresse et écrit le dump dans `sink` en un seul passage; contrôle le sha256 du flux compressé"""
+        decompressor = open_decompressor(compression)
+        digest = hashlib.sha256()
+        compressed = raw = 0
+        for chunk in iter(lambda: reader.read(self.chunk_size), b""):
+            digest.update(chunk)
+            compressed += len(chunk)
+            try:
+                data = decompressor.decompress(chunk)
+            except Exception as e:
+                raise RestoreError(f"Dump illisible (corrompu ?): {e}") from e
+            raw += len(data)
+            sink.write(data)
+        if expected_sha256 and digest.hexdigest() != expected_sha256:
+            raise RestoreError(f"Checksum invalide: {digest.hexdigest()} != {expected_sha256}")
+        return {"compressed_bytes": compressed, "raw_bytes": raw, "sha256": digest.hexdigest()}
+
+    def pg_restore_command(self, target_url: str, jobs: int, dump_path: Optional[Path], clean: bool = False) -> List[str]:
+        """pg_restore parallèle sur un fichier; sans fichier, lecture de stdin (un seul job possible)"""
+        cmd = ["pg_restore", "--no-owner", "--no-privileges", "--exit-on-error", "-d", target_url]
+        if clean:
+            cmd += ["--clean", "--if-exists"]
+        if dump_path is not None:
+            cmd += ["-j", str(jobs), str(dump_path)]
+        return cmd
+
+    def verify(self, target_url: str, expected: Dict[str, int]) -> Dict:
+        """Compare le nombre de lignes par table avec les comptages pris au moment du dump"""
+        engine = create_engine(target_url, poolclass=NullPool)
+        try:
+            with engine.connect() as conn:
+                actual = table_row_counts(conn)
+        finally:
+            engine.dispose()
+        return {
+            name: {"expected": count, "actual": actual.get(name)}
+            for name, count in expected.items()
+            if actual.get(name) != count
+        }
+
+    # ----- Restauration complète -----
+
+    def restore(
+        self,
+        target_url: str,
+        name: str = "latest",
+        source: str = "local",
+        jobs: int = 4,
+        clean: bool = False,
+        verify: bool = True
+    ) -> Dict:
+        """Restaure la sauvegarde dans `target_url`; renvoie le rapport chronométré
+
+        Avec jobs > 1, le dump décompressé est d'abord écrit dans `workdir`
+        (pg_restore -j exige un fichier) et son checksum est contrôlé avant tout
+        chargement. Avec jobs = 1, il est envoyé directement sur l'entrée de
+        pg_restore, sans disque, et le checksum est contrôlé en fin de flux.
+        """
+        started = time.perf_counter()
+        ref = self.find_backup(name, source)
+        metadata = self._metadata(ref)
+        compression = metadata.get("compression") or _compression_of(ref["name"])
+        phases = {}
+        logger.info(f"♻️ Restauration de {ref['name']} ({source}) vers la base cible, {jobs} job(s)")
+
+        with tempfile.TemporaryFile() as stderr:
+            if jobs > 1:
+                self.workdir.mkdir(parents=True, exist_ok=True)
+                dump_path = self.workdir / (ref["name"].rsplit(".", 1)[0] + ".restore")
+                try:
+                    phase = time.perf_counter()
+                    with self.open_backup(ref) as reader, open(dump_path, "wb") as sink:
+                        fetched = self.fetch(reader, sink, compression, metadata.get("sha256"))
+                    phases["download"] = time.perf_counter() - phase
+
+                    phase = time.perf_counter()
+                    cmd = self.pg_restore_command(target_url, jobs, dump_path, clean)
+                    returncode = subprocess.run(cmd, stderr=stderr).returncode
+                    phases["pg_restore"] = time.perf_counter() - phase
+                finally:
+                    dump_path.unlink(missing_ok=True)
+            else:
+                phase = time.perf_counter()
+                process = subprocess.Popen(
+                    self.pg_restore_command(target_url, 1, None, clean), stdin=subprocess.PIPE, stderr=stderr
+                )
+                try:
+                    with self.open_backup(ref) as reader:
+                        fetched = self.fetch(reader, process.stdin, compression, metadata.get("sha256"))
+                except BrokenPipeError:
+                    fetched = None
+                except BaseException:
+                    process.kill()
+                    raise
+                finally:
+                    try:
+                        process.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                    returncode = process.wait()
+                phases["download_and_pg_restore"] = time.perf_counter() - phase
+
+            if returncode != 0 or fetched is None:
+                stderr.seek(0)
+                raise RestoreError(f"pg_restore failed ({returncode}): {stderr.read().decode(errors='replace')[-2000:]}")
+
+        mismatches = {}
+        if verify and metadata.get("row_counts"):
+            phase = time.perf_counter()
+            mismatches = self.verify(target_url, metadata["row_counts"])
+            phases["verify"] = time.perf_counter() - phase
+
+        report = {
+            "backup": ref["name"],
+            "source": source,
+            "restored_at": datetime.utcnow().isoformat(),
+            "jobs": jobs,
+            "raw_bytes": fetched["raw_bytes"],
+            "compressed_bytes": fetched["compressed_bytes"],
+            "tables": len(metadata.get("row_counts", {})),
+            "verified": bool(verify and metadata.get("row_counts")),
+            "mismatches": mismatches,
+            "phases": {key: round(value, 3) for key, value in phases.items()},
+            "total_seconds": round(time.perf_counter() - started, 3)
+        }
+
+        for key, value in report["phases"].items():
+            logger.info(f"⏱️ {key}: {value:.1f}s")
+        if mismatches:
+            logger.error(f"❌ Lignes différentes après restauration: {mismatches}")
+        else:
+            logger.info(f"✅ Restauration terminée en {report['total_seconds']:.1f}s")
+        return report
@@ -1,79 +1,346 @@
-
 # AFRIFLOW/backend/scripts/seed_data.py : script pour générer des données de test
 
 #!/usr/bin/env python
-"""Script pour générer des données de test réalistes"""
+"""Script pour générer des données de test réalistes
+
+Deux modes:
+- démo (par défaut): un utilisateur demo@afriflow.com avec 3 entreprises sur 6 mois
+- bulk (--bulk): N utilisateurs × M entreprises × X années, générés avec NumPy
+  et écrits par lots (COPY sur PostgreSQL, executemany ailleurs)
 
+Exemples:
+    python scripts/seed_data.py --idempotent
+    python scripts/seed_data.py --bulk --users 200 --businesses 5 --years 3
+"""
+
+import argparse
+import io
 import random
 import sys
 import os
+import time
 from datetime import datetime, timedelta
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Pool de connexions dimensionné pour ce rôle (voir app.config.get_db_pool_config)
+os.environ.setdefault("PROCESS_ROLE", "cron")
+
+import numpy as np
+from sqlalchemy import exists, func, insert, select
 
-from app.database import SessionLocal
+from app.database import SessionLocal, engine
 from app.models import models
+from app.schemas.money import MINOR_UNITS
+from app.services.cash_flow_service import refresh_monthly_cash_flow
 from app.auth import hash_password
 
-def generate_test_data():
+DEMO_EMAIL = "demo@afriflow.com"
+DEMO_PASSWORD = "demo123"
+BULK_EMAIL_TEMPLATE = "loadtest+{}@afriflow.com"
+
+TRANSACTION_CATEGORIES = ["Vente", "Service", "Produit"]
+EXPENSE_CATEGORIES = ["Loyer", "Salaires", "Fournitures", "Transport"]
+
+# Répartition réaliste des moyens de paiement (marchés d'Afrique de l'Ouest)
+PAYMENT_METHOD_MIX = {
+    "mobile_money": 0.45,
+    "cash": 0.38,
+    "card": 0.12,
+    "bank_transfer": 0.05,
+}
+
+
+def generate_test_data(idempotent: bool = False):
     """Génère des données de test pour la démo"""
     db = SessionLocal()
-    
-    # Créer un utilisateur de démo
-    demo_user = models.User(
-        email="demo@afriflow.com",
-        password_hash=hash_password("demo123")
-    )
-    db.add(demo_user)
-    db.commit()
-    db.refresh(demo_user)
-    
-    # Créer plusieurs businesses
-    businesses = []
-    for i in range(3):
-        business = models.Business(
-            name=f"Entreprise {i+1}",
-            sector=random.choice(["Commerce", "Service", "Agriculture"]),
-            currency="FCFA",
-            owner_id=demo_user.id
+
+    try:
+        if idempotent:
+            existing = db.query(models.User).filter(models.User.email == DEMO_EMAIL).first()
+            if existing:
+                print(f"ℹ️  Utilisateur de démo déjà présent ({DEMO_EMAIL}), rien à faire")
+                return
+
+        # Créer un utilisateur de démo
+        demo_user = models.User(
+            email=DEMO_EMAIL,
+            password_hash=hash_password(DEMO_PASSWORD)
         )
-        db.add(business)
-        businesses.append(business)
-    db.commit()
-    
-    # Générer des transactions sur 6 mois
-    categories = ["Vente", "Service", "Produit"]
-    methods = ["cash", "mobile_money", "card"]
-    
-    for business in businesses:
-        for days_ago in range(180):
-            date = datetime.utcnow() - timedelta(days=days_ago)
-            
-            # 1-3 transactions par jour
-            for _ in range(random.randint(1, 3)):
-                transaction = models.Transaction(
-                    amount=random.randint(5000, 200000),
-                    payment_method=random.choice(methods),
-                    category=random.choice(categories),
-                    description="Vente",
-                    created_at=date,
-                    business_id=business.id
-                )
-                db.add(transaction)
-            
-            # Dépenses 2-3 fois par semaine
-            if random.random() < 0.3:
-                expense = models.Expense(
-                    amount=random.randint(10000, 50000),
-                    category=random.choice(["Loyer", "Salaires", "Fournitures", "Transport"]),
-                    description="Dépense",
-                    created_at=date,
-                    business_id=business.id
-                )
-                db.add(expense)
-    
-    db.commit()
-    print("✅ Données de test générées avec succès!")
-    print(f"👤 Utilisateur de démo: demo@afriflow.com / demo123")
-    
+        db.add(demo_user)
+        db.commit()
+        db.refresh(demo_user)
+
+        # Créer plusieurs businesses
+        businesses = []
+        for i in range(3):
+            business = models.Business(
+                name=f"Entreprise {i+1}",
+                sector=random.choice(["Commerce", "Service", "Agriculture"]),
+                currency="FCFA",
+                owner_id=demo_user.id
+            )
+            db.add(business)
+            businesses.append(business)
+        db.commit()
+
+        # Générer des transactions sur 6 mois
+        methods = ["cash", "mobile_money", "card"]
+
+        for business in businesses:
+            for days_ago in range(180):
+                date = datetime.utcnow() - timedelta(days=days_ago)
+
+                # 1-3 transactions par jour
+                for _ in range(random.randint(1, 3)):
+                    transaction = models.Transaction(
+                        amount=random.randint(5000, 200000),
+                        payment_method=random.choice(methods),
+                        category=random.choice(TRANSACTION_CATEGORIES),
+                        description="Vente",
+                        created_at=date,
+                        business_id=business.id
+                    )
+                    db.add(transaction)
+
+                # Dépenses 2-3 fois par semaine
+                if random.random() < 0.3:
+                    expense = models.Expense(
+                        amount=random.randint(10000, 50000),
+                        category=random.choice(EXPENSE_CATEGORIES),
+                        description="Dépense",
+                        created_at=date,
+                        business_id=business.id
+                    )
+                    db.add(expense)
+
+        db.commit()
+        print("✅ Données de test générées avec succès!")
+        print(f"👤 Utilisateur de démo: {DEMO_EMAIL} / {DEMO_PASSWORD}")
+    finally:
+        db.close()
+
+
+# ============================================
+# MODE BULK (tests de capacité)
+# ============================================
+
+def _seasonality(start: np.datetime64, days: int) -> np.ndarray:
+    """Facteur multiplicatif d'activité par jour (saison, semaine, fêtes de fin d'année)"""
+    dates = start + np.arange(days).astype("timedelta64[D]")
+    day_of_year = (dates - dates.astype("datetime64[Y]")).astype(int)
+    # 1970-01-01 était un jeudi: 0 = lundi
+    weekday = (dates.astype("datetime64[D]").astype(int) + 3) % 7
+    month = dates.astype("datetime64[M]").astype(int) % 12 + 1
+
+    season = 1.0 + 0.2 * np.sin(2 * np.pi * (day_of_year - 80) / 365.25)
+    week = np.where(weekday >= 5, 1.35, 1.0)  # samedi/dimanche: jours de marché
+    holidays = np.where(month == 12, 1.5, 1.0)
+    return season * week * holidays
+
+
+def _write_rows(conn, table, columns, arrays, chunk_size: int) -> int:
+    """Écrit des colonnes NumPy par lots: COPY sur PostgreSQL, executemany sinon"""
+    total = len(arrays[0])
+    use_copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+
+    for offset in range(0, total, chunk_size):
+        chunk = [a[offset:offset + chunk_size] for a in arrays]
+
+        if use_copy:
+            buffer = io.StringIO()
+            np.savetxt(buffer, np.column_stack([c.astype(str) for c in chunk]), fmt="%s", delimiter="\t")
+            buffer.seek(0)
+            cursor = conn.connection.driver_connection.cursor()
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT text)",
+                buffer
+            )
+        else:
+            values = [c.tolist() for c in chunk]
+            conn.execute(insert(table), [dict(zip(columns, row)) for row in zip(*values)])
+
+    return total
+
+
+def generate_bulk_data(
+    users: int = 10,
+    businesses_per_user: int = 3,
+    years: int = 1,
+    daily_transactions: float = 8.0,
+    chunk_size: int = 50_000,
+    seed: int = 42,
+    idempotent: bool = False,
+):
+    """Génère un jeu de données volumineux pour les tests de capacité
+
+    Les lignes sont générées colonne par colonne avec NumPy (saisonnalité,
+    mix de moyens de paiement) puis écrites par lots de ``chunk_size``.
+
+    ``idempotent``: ne crée que les utilisateurs et entreprises manquants et
+    ne remplit que les entreprises encore sans activité; une exécution
+    interrompue ou un ``users`` plus grand reprennent là où il faut.
+    """
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    emails = [BULK_EMAIL_TEMPLATE.format(i) for i in range(users)]
+
+    with engine.begin() as conn:
+        existing = set()
+        if idempotent:
+            existing = set(conn.execute(
+                select(models.User.email).where(models.User.email.in_(emails))
+            ).scalars())
+        missing = [email for email in emails if email not in existing]
+
+        if missing:
+            # Un seul hash bcrypt pour tous les comptes de test
+            password_hash = hash_password(DEMO_PASSWORD)
+            conn.execute(
+                insert(models.User.__table__),
+                [{"email": email, "password_hash": password_hash, "created_at": datetime.utcnow()} for email in missing]
+            )
+        user_ids = conn.execute(
+            select(models.User.id).where(models.User.email.in_(emails))
+        ).scalars().all()
+
+        # Entreprises manquantes par utilisateur (toutes, hors mode idempotent)
+        owned = dict(conn.execute(
+            select(models.Business.owner_id, func.count())
+            .where(models.Business.owner_id.in_(user_ids))
+            .group_by(models.Business.owner_id)
+        ).all())
+        sectors = np.array(["Commerce", "Service", "Agriculture"])
+        business_rows = [
+            {
+                "name": f"Entreprise {uid}-{j + 1}",
+                "sector": str(rng.choice(sectors)),
+                "currency": "FCFA",
+                "owner_id": uid,
+            }
+            for uid in user_ids
+            for j in range(owned.get(uid, 0), businesses_per_user)
+        ]
+        if business_rows:
+            conn.execute(insert(models.Business.__table__), business_rows)
+
+        # Activité écrite par groupe dans une transaction: une entreprise sans
+        # transaction n'a pas été traitée (premier passage ou exécution interrompue)
+        pending = select(models.Business.id).where(models.Business.owner_id.in_(user_ids))
+        if idempotent:
+            pending = pending.where(~exists().where(models.Transaction.business_id == models.Business.id))
+        business_ids = np.array(conn.execute(pending.order_by(models.Business.id)).scalars().all())
+
+    if idempotent and len(business_ids) == 0:
+        print(f"ℹ️  Données bulk déjà présentes ({len(user_ids)} utilisateurs), rien à faire")
+        return
+
+    days = years * 365
+    end = np.datetime64(datetime.utcnow().date(), "D")
+    start = end - np.timedelta64(days - 1, "D")
+    season = _seasonality(start, days)
+
+    methods = np.array(list(PAYMENT_METHOD_MIX))
+    method_probs = np.array(list(PAYMENT_METHOD_MIX.values()))
+    tx_categories = np.array(TRANSACTION_CATEGORIES)
+    exp_categories = np.array(EXPENSE_CATEGORIES)
+
+    tx_columns = ["amount_minor", "payment_method", "category", "description", "created_at", "business_id"]
+    exp_columns = ["amount_minor", "category", "description", "created_at", "business_id"]
+    tx_total = exp_total = 0
+
+    # Traiter les entreprises par groupes pour borner la mémoire (~chunk_size lignes)
+    group_size = max(1, int(chunk_size // max(daily_transactions * days, 1)))
+
+    for g in range(0, len(business_ids), group_size):
+        group = business_ids[g:g + group_size]
+
+        # Chaque entreprise a sa propre taille et son propre panier moyen
+        scale = rng.lognormal(mean=0.0, sigma=0.5, size=len(group))
+        counts = rng.poisson(daily_transactions * scale[:, None] * season[None, :])
+        n = int(counts.sum())
+
+        business_col = np.repeat(np.repeat(group, days), counts.ravel())
+        day_col = np.repeat(np.tile(np.arange(days), len(group)), counts.ravel())
+        # Heures d'ouverture: 7h-21h
+        seconds = rng.integers(7 * 3600, 21 * 3600, size=n)
+        created_at = (start + day_col.astype("timedelta64[D]")).astype("datetime64[s]") + seconds.astype("timedelta64[s]")
+
+        basket = np.repeat(np.repeat(rng.lognormal(10.5, 0.4, size=len(group)), days), counts.ravel())
+        amounts = np.round(basket * rng.lognormal(0.0, 0.6, size=n), -2).clip(500, None)
+        # Montants stockés en unités mineures (entiers)
+        amounts_minor = amounts.astype(np.int64) * MINOR_UNITS
+
+        with engine.begin() as conn:
+            tx_total += _write_rows(
+                conn,
+                models.Transaction.__table__,
+                tx_columns,
+                [
+                    amounts_minor,
+                    rng.choice(methods, size=n, p=method_probs),
+                    rng.choice(tx_categories, size=n),
+                    np.full(n, "Vente"),
+                    created_at.astype(datetime),
+                    business_col,
+                ],
+                chunk_size,
+            )
+
+            # Dépenses: ~30% des jours, plus le loyer le 1er de chaque mois
+            expense_days = rng.random((len(group), days)) < 0.3
+            dates = start + np.arange(days).astype("timedelta64[D]")
+            expense_days |= (dates.astype("datetime64[D]") == dates.astype("datetime64[M]").astype("datetime64[D]"))[None, :]
+            b_idx, d_idx = np.nonzero(expense_days)
+            m = len(b_idx)
+
+            exp_total += _write_rows(
+                conn,
+                models.Expense.__table__,
+                exp_columns,
+                [
+                    np.round(rng.uniform(10_000, 50_000, size=m), -2).astype(np.int64) * MINOR_UNITS,
+                    rng.choice(exp_categories, size=m),
+                    np.full(m, "Dépense"),
+                    ((start + d_idx.astype("timedelta64[D]")).astype("datetime64[s]") + np.timedelta64(9 * 3600, "s")).astype(datetime),
+                    group[b_idx],
+                ],
+                chunk_size,
+            )
+
+            # Insertions Core hors ORM: cash flow mensuel recalculé pour le groupe
+            refresh_monthly_cash_flow(conn, group.tolist())
+
+        print(f"   … {g + len(group)}/{len(business_ids)} entreprises, {tx_total:,} transactions")
+
+    elapsed = time.perf_counter() - started
+    print("✅ Données bulk générées avec succès!")
+    print(f"👥 {len(missing)} utilisateurs créés, 🏢 {len(business_ids)} entreprises remplies")
+    print(f"💳 {tx_total:,} transactions, 💸 {exp_total:,} dépenses en {elapsed:.1f}s ({tx_total / elapsed:,.0f} lignes/s)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Génération de données de test Afriflow")
+    parser.add_argument("--bulk", action="store_true", help="Mode bulk pour les tests de capacité")
+    parser.add_argument("--users", type=int, default=10, help="Nombre d'utilisateurs (bulk)")
+    parser.add_argument("--businesses", type=int, default=3, help="Entreprises par utilisateur (bulk)")
+    parser.add_argument("--years", type=int, default=1, help="Années d'historique (bulk)")
+    parser.add_argument("--daily-transactions", type=float, default=8.0, help="Transactions moyennes par jour et par entreprise (bulk)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Taille des lots d'insertion (bulk)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire (bulk)")
+    parser.add_argument("--idempotent", action="store_true", help="Ne créer que les données manquantes")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    generate_test_data()
\ No newline at end of file
+    args = parse_args()
+    if args.bulk:
+        generate_bulk_data(
+            users=args.users,
+            businesses_per_user=args.businesses,
+            years=args.years,
+            daily_transactions=args.daily_transactions,
+            chunk_size=args.chunk_size,
+            seed=args.seed,
+            idempotent=args.idempotent,
+        )
+    else:
+        generate_test_data(idempotent=args.idempotent)
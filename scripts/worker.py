@@ -20,31 +20,43 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 import redis
-from sqlalchemy import create_engine, text, extract, func  # 👈 AJOUT DE extract ICI
+from sqlalchemy import create_engine, text, func
 from sqlalchemy.orm import sessionmaker, Session
-import pandas as pd
 import io
-import aiohttp
 from pathlib import Path
 
 # Ajouter le chemin parent pour les imports
 sys.path.append(str(Path(__file__).parent.parent))
+# Pool de connexions dimensionné pour ce rôle (voir app.config.get_db_pool_config)
+os.environ.setdefault("PROCESS_ROLE", "worker")
 
-from app.database import SessionLocal
+from app.database import SessionLocal, ReadSessionLocal, engine
 from app.models import models
-from app.config import DATABASE_URL, REDIS_URL, SMTP_CONFIG
-
-# Configuration logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/data/logs/worker.log'),
-        logging.StreamHandler()
-    ]
+from app.services.analytics_service import year_range
+from app.services.fx_service import format_money, load_rates_file
+from app.services.cash_flow_service import refresh_monthly_cash_flow
+from app.services.tenant_export_service import archive_suffix, export_business, import_business
+from app.services.token_service import purge_refresh_tokens
+from app.services.partition_service import (
+    add_months, archive_partition, ensure_partitions, month_start, partitions_to_archive
 )
+from app.schemas.money import from_minor
+from app.config import DATABASE_URL, REDIS_URL, SMTP_CONFIG, PARTITION_CONFIG
+from app.config.constants import CURRENCY_ISO_CODES
+
 logger = logging.getLogger(__name__)
 
+def configure_logging():
+    """Configuration logging (au lancement du worker, pas à l'import)"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('/data/logs/worker.log'),
+            logging.StreamHandler()
+        ]
+    )
+
 class AfriflowWorker:
     """Worker principal pour les tâches asynchrones"""
     
@@ -61,6 +73,12 @@ class AfriflowWorker:
             'generate_invoice': self.handle_generate_invoice,
             'backup_data': self.handle_backup_data,
             'send_sms': self.handle_send_sms,
+            'load_fx_rates': self.handle_load_fx_rates,
+            'refresh_cash_flow': self.handle_refresh_cash_flow,
+            'export_business': self.handle_export_business,
+            'import_business': self.handle_import_business,
+            'ensure_partitions': self.handle_ensure_partitions,
+            'archive_partitions': self.handle_archive_partitions,
         }
     
     async def run(self):
@@ -144,38 +162,33 @@ class AfriflowWorker:
         format_type = data.get('format', 'pdf')  # Renommé 'format' en 'format_type'
         date_range = data.get('date_range', {})
         
-        # Récupérer les données
-        db = SessionLocal()
+        # Récupérer les données (lecture seule: réplique si configurée)
+        db = ReadSessionLocal()
         
         try:
             if report_type == 'monthly':
-                # Rapport mensuel
-                transactions = db.query(models.Transaction).filter(
-                    models.Transaction.business_id == business_id,
-                    models.Transaction.created_at >= date_range['start'],
-                    models.Transaction.created_at <= date_range['end']
-                ).all()
-                
-                expenses = db.query(models.Expense).filter(
-                    models.Expense.business_id == business_id,
-                    models.Expense.created_at >= date_range['start'],
-                    models.Expense.created_at <= date_range['end']
-                ).all()
+                # Rapport mensuel: la date de fin est incluse, d'où la borne [début, fin + 1 jour)
+                start = datetime.fromisoformat(date_range['start'])
+                end = datetime.fromisoformat(date_range['end']) + timedelta(days=1)
                 
             elif report_type == 'annual':
-                # Rapport annuel avec comparaisons
-                current_year = datetime.now().year
-                
-                # ✅ Utilisation correcte de extract avec SQLAlchemy 2.0
-                transactions = db.query(models.Transaction).filter(
-                    models.Transaction.business_id == business_id,
-                    extract('year', models.Transaction.created_at) == current_year
-                ).all()
-                
-                expenses = db.query(models.Expense).filter(
-                    models.Expense.business_id == business_id,
-                    extract('year', models.Expense.created_at) == current_year
-                ).all()
+                # Rapport annuel: plage [1er janvier, 1er janvier suivant) pour rester indexable
+                start, end = year_range(datetime.now().year)
+
+            else:
+                raise ValueError(f"Type de rapport non supporté: {report_type}")
+
+            transactions = db.query(models.Transaction).filter(
+                models.Transaction.business_id == business_id,
+                models.Transaction.created_at >= start,
+                models.Transaction.created_at < end
+            ).all()
+            
+            expenses = db.query(models.Expense).filter(
+                models.Expense.business_id == business_id,
+                models.Expense.created_at >= start,
+                models.Expense.created_at < end
+            ).all()
         finally:
             db.close()
         
@@ -255,8 +268,16 @@ class AfriflowWorker:
                     file.unlink()
                     cleaned += 1
         
-        logger.info(f"🧹 Nettoyage: {cleaned} fichiers supprimés")
-        return {"cleaned": cleaned}
+        # Jetons de rafraîchissement expirés / révoqués
+        db = SessionLocal()
+        try:
+            purged = purge_refresh_tokens(db, days_old)
+            db.commit()
+        finally:
+            db.close()
+        
+        logger.info(f"🧹 Nettoyage: {cleaned} fichiers supprimés, {purged} jetons de rafraîchissement purgés")
+        return {"cleaned": cleaned, "refresh_tokens_purged": purged}
     
     async def handle_process_payment(self, data: Dict) -> Dict:
         """Traitement des paiements asynchrones"""
@@ -265,6 +286,9 @@ class AfriflowWorker:
         amount = data['amount']
         phone = data['phone']
         
+        # Import différé: aiohttp n'est chargé que par les tâches de paiement
+        import aiohttp
+        
         # Simuler appel API au fournisseur
         async with aiohttp.ClientSession() as session:
             if provider == 'orange_money':
@@ -280,7 +304,7 @@ class AfriflowWorker:
                 headers = {"X-Reference-Id": payment_id}
                 payload = {
                     "amount": str(amount),
-                    "currency": "XOF",
+                    "currency": CURRENCY_ISO_CODES.get(data.get('currency', 'FCFA'), 'XOF'),
                     "externalId": payment_id,
                     "payer": {"partyIdType": "MSISDN", "partyId": phone},
                     "payerMessage": "Paiement Afriflow",
@@ -343,16 +367,17 @@ class AfriflowWorker:
             # Tableau des transactions
             table_data = [['Date', 'Montant', 'Méthode', 'Catégorie']]
             total = 0
+            currency = business.currency or "FCFA"
             for t in transactions:
                 table_data.append([
                     t.created_at.strftime('%d/%m/%Y'),
-                    f"{t.amount:,.0f} FCFA",
+                    format_money(t.amount, currency),
                     t.payment_method,
                     t.category
                 ])
-                total += t.amount
+                total += t.amount_minor
             
-            table_data.append(['', f"Total: {total:,.0f} FCFA", '', ''])
+            table_data.append(['', f"Total: {format_money(from_minor(total), currency)}", '', ''])
             
             table = Table(table_data)
             table.setStyle(TableStyle([
@@ -379,7 +404,98 @@ class AfriflowWorker:
         finally:
             db.close()
         
-        return {"path": pdf_path, "transactions": len(transactions), "total": total}
+        return {"path": pdf_path, "transactions": len(transactions), "total": from_minor(total)}
+    
+    async def handle_load_fx_rates(self, data: Dict) -> Dict:
+        """Import des taux de change journaliers depuis un fichier local"""
+        db = SessionLocal()
+        try:
+            count = load_rates_file(db, data.get('path'))
+        finally:
+            db.close()
+        
+        logger.info(f"💱 {count} taux de change importés")
+        return {"status": "loaded", "rates": count}
+    
+    async def handle_refresh_cash_flow(self, data: Dict) -> Dict:
+        """Recalcul de monthly_cash_flow après des écritures hors ORM (imports, corrections)"""
+        business_ids = data.get('business_ids')
+        since = datetime.fromisoformat(data['since']).date() if data.get('since') else None
+        
+        db = SessionLocal()
+        try:
+            rows = refresh_monthly_cash_flow(db.connection(), business_ids, since)
+            db.commit()
+        finally:
+            db.close()
+        
+        logger.info(f"📊 Cash flow mensuel recalculé: {rows} lignes")
+        return {"status": "refreshed", "rows": rows}
+    
+    async def handle_export_business(self, data: Dict) -> Dict:
+        """Export logique d'une entreprise (départ d'un marchand, migration, archivage)"""
+        business_id = data['business_id']
+        path = data.get('path') or (
+            f"/data/exports/business_{business_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{archive_suffix()}"
+        )
+        
+        # Base principale: l'export doit refléter les dernières écritures
+        db = SessionLocal()
+        try:
+            result = export_business(db, business_id, path)
+        finally:
+            db.close()
+        
+        return {"status": "exported", **result}
+    
+    async def handle_import_business(self, data: Dict) -> Dict:
+        """Import d'une archive export_business comme nouvelle entreprise (ids réattribués)"""
+        db = SessionLocal()
+        try:
+            result = import_business(db, data['path'])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        
+        return {"status": "imported", **result}
+    
+    async def handle_ensure_partitions(self, data: Dict) -> Dict:
+        """Crée à l'avance les partitions mensuelles de transactions / expenses (PostgreSQL)"""
+        months_ahead = data.get('months_ahead', PARTITION_CONFIG['months_ahead'])
+        
+        db = SessionLocal()
+        try:
+            created = ensure_partitions(db.connection(), months_ahead)
+            db.commit()
+        finally:
+            db.close()
+        
+        return {"status": "ok", "created": created}
+    
+    async def handle_archive_partitions(self, data: Dict) -> Dict:
+        """Archive les mois plus anciens que archive_after_months (partition par partition)"""
+        months = data.get('archive_after_months', PARTITION_CONFIG['archive_after_months'])
+        if months <= 0:
+            return {"status": "disabled", "archived": []}
+        before = add_months(month_start(datetime.utcnow()), -months)
+        
+        with engine.connect() as connection:
+            candidates = partitions_to_archive(connection, before)
+        
+        # Chaque partition gère ses transactions (export, puis DETACH court)
+        archived = [
+            archive_partition(
+                engine, table, start,
+                PARTITION_CONFIG['archive_dir'], PARTITION_CONFIG['compression_level']
+            )
+            for table, start in candidates
+        ]
+        
+        logger.info(f"🗄️ {len(archived)} partitions archivées (avant {before:%Y-%m})")
+        return {"status": "archived", "archived": archived}
     
     async def handle_backup_data(self, data: Dict) -> Dict:
         """Backup des données"""
@@ -421,6 +537,9 @@ class AfriflowWorker:
     
     async def create_excel_report(self, transactions, expenses, business_id):
         """Crée un rapport Excel"""
+        # Import différé: pandas/openpyxl ne servent qu'aux exports Excel
+        import pandas as pd
+        
         output = io.BytesIO()
         
         with pd.ExcelWriter(output, engine='openpyxl') as writer:
@@ -450,13 +569,13 @@ class AfriflowWorker:
                 df_exp.to_excel(writer, sheet_name='Dépenses', index=False)
             
             # Sheet Résumé
-            total_revenue = sum(t.amount for t in transactions)
-            total_expenses = sum(e.amount for e in expenses)
+            total_revenue = sum(t.amount_minor for t in transactions)
+            total_expenses = sum(e.amount_minor for e in expenses)
             
             summary = {
-                'Total Revenus': total_revenue,
-                'Total Dépenses': total_expenses,
-                'Profit Net': total_revenue - total_expenses,
+                'Total Revenus': from_minor(total_revenue),
+                'Total Dépenses': from_minor(total_expenses),
+                'Profit Net': from_minor(total_revenue - total_expenses),
                 'Nb Transactions': len(transactions),
                 'Nb Dépenses': len(expenses),
                 'Période du': min((t.created_at for t in transactions), default=None).strftime('%d/%m/%Y') if transactions else None,
@@ -497,6 +616,8 @@ class AfriflowWorker:
         
         if not last_cleanup or (datetime.now().timestamp() - float(last_cleanup)) > 3600:
             await self.handle_cleanup_temp({"days_old": 7})
+            # Partitions des prochains mois toujours prêtes (no-op hors PostgreSQL)
+            await self.handle_ensure_partitions({})
             self.redis_client.set('afriflow:last_cleanup', datetime.now().timestamp())
 
 async def main():
@@ -513,4 +634,5 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    configure_logging()
     asyncio.run(main())
\ No newline at end of file
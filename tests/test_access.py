@@ -0,0 +1,101 @@
+# AFRIFLOW/backend/tests/test_access.py : tests du cache de contrôle d'accès aux entreprises
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.access import BusinessAccessCache, business_access, check_business_access
+from app.database import Base
+from app.models import models
+
+# Base de données de test
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class TestBusinessAccess:
+    def setup_method(self):
+        Base.metadata.create_all(bind=engine)
+        business_access.invalidate()
+        db = TestingSessionLocal()
+        owner = models.User(email="owner@test.com", password_hash="x")
+        other = models.User(email="other@test.com", password_hash="x")
+        db.add_all([models.Business(name="Boutique", owner=owner), models.Business(name="Autre", owner=other)])
+        db.commit()
+        self.owner_id, self.other_id = owner.id, other.id
+        self.business_id, self.foreign_id = owner.businesses[0].id, other.businesses[0].id
+        db.close()
+
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def teardown_method(self):
+        event.remove(engine, "before_cursor_execute", self._record)
+        Base.metadata.drop_all(bind=engine)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM businesses" in statement:
+            self.statements.append(statement)
+
+    def test_lookups_cached_across_sessions(self):
+        for _ in range(3):
+            db = TestingSessionLocal()
+            assert business_access.has_access(db, self.owner_id, self.business_id)
+            assert business_access.has_access(db, self.owner_id, self.business_id)
+            db.close()
+        assert len(self.statements) == 1
+
+    def test_foreign_business_denied_after_one_reload(self):
+        db = TestingSessionLocal()
+        assert business_access.has_access(db, self.owner_id, self.business_id)
+        db.close()
+
+        db = TestingSessionLocal()
+        with pytest.raises(HTTPException) as exc:
+            check_business_access(db, self.owner_id, self.foreign_id)
+        assert exc.value.status_code == 403
+        # Absente du cache: relue une fois, pas à chaque contrôle de la requête
+        assert not business_access.has_access(db, self.owner_id, self.foreign_id)
+        db.close()
+        assert len(self.statements) == 2
+
+    def test_business_created_elsewhere_found_without_invalidation(self):
+        cache = BusinessAccessCache(ttl_seconds=60)
+        db = TestingSessionLocal()
+        assert cache.owned(db, self.owner_id) == {self.business_id}
+
+        # Créée par une autre session: le cache local n'en sait rien
+        writer = TestingSessionLocal()
+        created = models.Business(name="Nouvelle", owner_id=self.owner_id)
+        writer.add(created)
+        writer.commit()
+
+        assert cache.has_access(TestingSessionLocal(), self.owner_id, created.id)
+        writer.close()
+        db.close()
+
+    def test_commit_invalidates_owner(self):
+        db = TestingSessionLocal()
+        assert business_access.owned(db, self.owner_id) == {self.business_id}
+
+        created = models.Business(name="Nouvelle", owner_id=self.owner_id)
+        db.add(created)
+        db.commit()
+        assert business_access.owned(db, self.owner_id) == {self.business_id, created.id}
+
+        db.delete(db.get(models.Business, self.business_id))
+        db.commit()
+        assert business_access.owned(TestingSessionLocal(), self.owner_id) == {created.id}
+        db.close()
+
+    def test_rollback_keeps_cache(self):
+        db = TestingSessionLocal()
+        business_access.owned(db, self.owner_id)
+        db.add(models.Business(name="Annulée", owner_id=self.owner_id))
+        db.flush()
+        db.rollback()
+        db.close()
+
+        assert business_access.owned(TestingSessionLocal(), self.owner_id) == {self.business_id}
+        assert len(self.statements) == 1
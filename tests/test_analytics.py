@@ -286,7 +286,29 @@ class TestAnalytics:
         # Vérifier la cohérence
         assert summary["total_revenue"] >= 0
         assert summary["days_count"] <= 30
-    
+
+    def test_daily_stats_dense_series(self):
+        """La série journalière est dense, triée et se termine aujourd'hui"""
+        response = client.get(
+            f"/analytics/{self.business_id}/daily-stats?days=7",
+            headers=self.headers
+        )
+        assert response.status_code == 200
+        daily_data = response.json()["daily_data"]
+
+        # Un point par jour, y compris les jours sans activité
+        assert len(daily_data) == 7
+        dates = [datetime.fromisoformat(d["date"]).date() for d in daily_data]
+        assert dates == [dates[0] + timedelta(days=i) for i in range(7)]
+        assert dates[-1] == datetime.utcnow().date()
+
+        # Les jours passés sont remplis de zéros, aujourd'hui porte toutes les données de test
+        for day in daily_data[:-1]:
+            assert day["revenue"] == 0 and day["transactions"] == 0 and day["expenses"] == 0
+        today = daily_data[-1]
+        assert today["transactions"] == 15
+        assert today["profit"] == today["revenue"] - today["expenses"]
+
     def test_comparative_stats(self):
         """Test des statistiques comparatives"""
         current_year = datetime.now().year
@@ -306,7 +328,50 @@ class TestAnalytics:
         # Vérifier que l'année est correcte
         assert data["year"] == current_year
         assert data["previous_year"] == current_year - 1
-    
+
+        # Les 12 mois sont toujours présents, dans l'ordre
+        assert len(data["monthly_comparison"]) == 12
+        assert data["monthly_comparison"][0]["month"] == "Janvier"
+
+    def test_comparative_stats_multiple_years(self):
+        """Comparaison sur N années en une seule réponse"""
+        current_year = datetime.now().year
+        response = client.get(
+            f"/analytics/{self.business_id}/comparative/{current_year}?years=3",
+            headers=self.headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["years"] == [current_year - 2, current_year - 1, current_year]
+        assert len(data["yearly_totals"]) == 3
+
+        # Toutes les données de test sont de cette année
+        this_month = data["monthly_comparison"][datetime.now().month - 1]
+        assert set(this_month["by_year"]) == {str(y) for y in data["years"]}
+        assert this_month["by_year"][str(current_year)] == this_month["current_year"] > 0
+        assert this_month["previous_year"] == 0
+        assert data["yearly_totals"][-1]["total"] == sum(m["current_year"] for m in data["monthly_comparison"])
+
+    def test_comparative_stats_rejects_single_year(self):
+        """years doit être >= 2"""
+        current_year = datetime.now().year
+        response = client.get(
+            f"/analytics/{self.business_id}/comparative/{current_year}?years=1",
+            headers=self.headers
+        )
+        assert response.status_code == 422
+
+    def test_out_of_range_year_rejected(self):
+        """Une année hors bornes renvoie 422 (et non 403 via le ValueError de datetime)"""
+        for url in (
+            f"/analytics/{self.business_id}/comparative/1",
+            f"/analytics/{self.business_id}/comparative/9999",
+            f"/analytics/{self.business_id}/monthly-revenue?year=9999",
+            "/portfolio/monthly-revenue?year=0",
+        ):
+            assert client.get(url, headers=self.headers).status_code == 422, url
+
     def test_cash_flow_analysis(self):
         """Test de l'analyse du cash flow"""
         response = client.get(
@@ -3,10 +3,18 @@
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.database import Base, get_db
+from app.access import business_access
+from app.auth import create_access_token, pwd_context, revoked_tokens
+from app.config import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.models.models import RefreshToken
+from app.services import token_service
+from app.services.token_service import hash_refresh_token
+from jose import jwt
+import time
 import uuid
 
 # Base de données de test
@@ -178,4 +186,155 @@ class TestAuth:
         headers = {"Authorization": f"Bearer {token}"}
         response = client.get("/businesses/", headers=headers)
         # Peut être 200 (succès) ou 404 (pas de business)
-        assert response.status_code in [200, 404]
\ No newline at end of file
+        assert response.status_code in [200, 404]
+
+class TestTokenClaims:
+    def setup_method(self):
+        Base.metadata.create_all(bind=engine)
+        client.post("/users/register", json={"email": "claims@test.com", "password": "Test123!"})
+        self.token = self._login()
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+
+    def teardown_method(self):
+        revoked_tokens._local.clear()
+        business_access.invalidate()
+        Base.metadata.drop_all(bind=engine)
+
+    def _login(self):
+        response = client.post("/users/login", json={"email": "claims@test.com", "password": "Test123!"})
+        assert response.status_code == 200
+        return response.json()["access_token"]
+
+    def test_token_carries_user_and_business_scope(self):
+        business_id = client.post("/businesses/", json={"name": "Boutique"}, headers=self.headers).json()["id"]
+        claims = jwt.get_unverified_claims(self._login())
+        assert claims["sub"] == "claims@test.com"
+        assert claims["ver"] == 1
+        assert claims["bids"] == [business_id]
+        assert claims["bids_exp"] > time.time()
+
+    def test_authorized_from_token_alone(self):
+        business_id = client.post("/businesses/", json={"name": "Boutique"}, headers=self.headers).json()["id"]
+        headers = {"Authorization": f"Bearer {self._login()}"}
+        business_access.invalidate()
+
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.get(f"/transactions/?business_id={business_id}", headers=headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert response.status_code == 200
+        assert not [s for s in statements if "FROM businesses" in s]
+        # Sans Redis, seule la version du jeton est vérifiée en base
+        assert all(s.startswith("SELECT users.token_version") for s in statements if "FROM users" in s)
+
+    def test_logout_all_seen_by_other_workers_without_redis(self):
+        assert client.post("/users/logout-all", headers=self.headers).status_code == 200
+        # Un autre worker n'a pas la révocation en mémoire: la version est relue en base
+        revoked_tokens._local.clear()
+        assert client.get("/businesses/", headers=self.headers).status_code == 401
+
+    def test_logout_all_revokes_issued_tokens(self):
+        legacy = create_access_token({"sub": "claims@test.com"})
+        assert client.get("/businesses/", headers={"Authorization": f"Bearer {legacy}"}).status_code == 200
+
+        assert client.post("/users/logout-all", headers=self.headers).status_code == 200
+        assert client.get("/businesses/", headers=self.headers).status_code == 401
+        assert client.get("/businesses/", headers={"Authorization": f"Bearer {legacy}"}).status_code == 401
+
+        fresh = {"Authorization": f"Bearer {self._login()}"}
+        assert jwt.get_unverified_claims(fresh["Authorization"][7:])["ver"] == 2
+        assert client.get("/businesses/", headers=fresh).status_code == 200
+
+
+class TestRefreshTokens:
+    def setup_method(self):
+        Base.metadata.create_all(bind=engine)
+        client.post("/users/register", json={"email": "refresh@test.com", "password": "Test123!"})
+        response = client.post("/users/login", json={"email": "refresh@test.com", "password": "Test123!"})
+        assert response.status_code == 200
+        self.tokens = response.json()
+
+    def teardown_method(self):
+        revoked_tokens._local.clear()
+        Base.metadata.drop_all(bind=engine)
+
+    def _refresh(self, refresh_token):
+        return client.post("/users/refresh", json={"refresh_token": refresh_token})
+
+    def test_login_returns_short_lived_access_and_refresh_token(self):
+        assert self.tokens["refresh_token"]
+        assert self.tokens["expires_in"] == ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        claims = jwt.get_unverified_claims(self.tokens["access_token"])
+        assert claims["exp"] - time.time() <= ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    def test_refresh_rotates_and_skips_bcrypt(self, monkeypatch):
+        def no_bcrypt(*args):
+            raise AssertionError("bcrypt appelé au rafraîchissement")
+        monkeypatch.setattr(pwd_context, "verify", no_bcrypt)
+
+        response = self._refresh(self.tokens["refresh_token"])
+        assert response.status_code == 200
+        rotated = response.json()
+        assert rotated["refresh_token"] != self.tokens["refresh_token"]
+        headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+        assert client.get("/businesses/", headers=headers).status_code == 200
+
+    def test_only_hash_stored(self):
+        db = TestingSessionLocal()
+        stored = db.query(RefreshToken.token_hash).scalar()
+        db.close()
+        assert stored == hash_refresh_token(self.tokens["refresh_token"])
+        assert self.tokens["refresh_token"] not in stored
+
+    def test_reuse_revokes_family(self, monkeypatch):
+        monkeypatch.setattr(token_service, "REFRESH_REUSE_GRACE_SECONDS", 0)
+        first = self._refresh(self.tokens["refresh_token"]).json()
+        time.sleep(0.01)
+
+        # Ancien jeton rejoué: refusé, et son successeur légitime est révoqué aussi
+        reused = self._refresh(self.tokens["refresh_token"])
+        assert reused.status_code == 401
+        assert "déjà utilisé" in reused.json()["detail"]
+        assert self._refresh(first["refresh_token"]).status_code == 401
+
+    def test_lost_response_retry_within_grace(self):
+        # Réponse du premier rafraîchissement perdue: le client réessaie avec le même jeton
+        lost = self._refresh(self.tokens["refresh_token"]).json()
+        retried = self._refresh(self.tokens["refresh_token"])
+        assert retried.status_code == 200
+
+        # Le jeton jamais reçu est remplacé; la session continue avec celui de la nouvelle tentative
+        assert self._refresh(lost["refresh_token"]).status_code == 401
+        assert self._refresh(retried.json()["refresh_token"]).status_code == 200
+
+    def test_reuse_after_successor_used_revokes_family_within_grace(self):
+        first = self._refresh(self.tokens["refresh_token"]).json()
+        second = self._refresh(first["refresh_token"]).json()
+
+        # Le successeur a servi: le client avait bien reçu la réponse, le rejeu est suspect
+        assert self._refresh(self.tokens["refresh_token"]).status_code == 401
+        assert self._refresh(second["refresh_token"]).status_code == 401
+
+    def test_other_device_unaffected_by_reuse(self, monkeypatch):
+        monkeypatch.setattr(token_service, "REFRESH_REUSE_GRACE_SECONDS", 0)
+        other = client.post("/users/login", json={"email": "refresh@test.com", "password": "Test123!"}).json()
+        self._refresh(self.tokens["refresh_token"])
+        self._refresh(self.tokens["refresh_token"])
+        assert self._refresh(other["refresh_token"]).status_code == 200
+
+    def test_logout_and_logout_all(self):
+        other = client.post("/users/login", json={"email": "refresh@test.com", "password": "Test123!"}).json()
+
+        assert client.post("/users/logout", json={"refresh_token": self.tokens["refresh_token"]}).status_code == 200
+        assert self._refresh(self.tokens["refresh_token"]).status_code == 401
+
+        headers = {"Authorization": f"Bearer {other['access_token']}"}
+        assert client.post("/users/logout-all", headers=headers).status_code == 200
+        assert self._refresh(other["refresh_token"]).status_code == 401
+
+    def test_unknown_token(self):
+        assert self._refresh("inconnu").status_code == 401
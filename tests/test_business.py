@@ -238,6 +238,27 @@ class TestBusiness:
         assert data["total_revenue"] == 225000  # 50000 + 75000 + 100000
         assert data["total_expenses"] == 55000   # 25000 + 30000
     
+    def test_list_transactions_and_expenses(self):
+        """Les listes renvoient le même JSON que les schémas TransactionOut / ExpenseOut"""
+        business_id = self._create_test_business("Boutique Liste")
+        created = client.post("/transactions/",
+            json={"amount": 19.99, "payment_method": "card", "category": "Vente", "business_id": business_id},
+            headers=self.headers
+        ).json()
+        expense = client.post("/expenses/",
+            json={"amount": 5000, "category": "Loyer", "description": "Mars", "business_id": business_id},
+            headers=self.headers
+        ).json()
+        
+        response = client.get(f"/transactions/?business_id={business_id}", headers=self.headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == [created]
+        
+        response = client.get("/expenses/", headers=self.headers)
+        assert response.status_code == 200
+        assert response.json() == [expense]
+    
     def test_delete_business(self):
         """Test de suppression d'une entreprise"""
         business_id = self._create_test_business("À Supprimer")
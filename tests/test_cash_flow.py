@@ -0,0 +1,172 @@
+# AFRIFLOW/backend/tests/test_cash_flow.py : tests du cash flow mensuel matérialisé
+
+from datetime import date, datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, extract, func, insert
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.database import Base, get_db
+from app.models import models
+from app.services.cash_flow_service import refresh_monthly_cash_flow
+
+# Base de données de test
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+
+def recomputed(db, business_id):
+    """Agrégat de référence calculé directement sur les transactions"""
+    rows = db.query(
+        extract("year", models.Transaction.created_at),
+        extract("month", models.Transaction.created_at),
+        models.Transaction.payment_method,
+        func.sum(models.Transaction.amount_minor),
+        func.count()
+    ).filter(models.Transaction.business_id == business_id).group_by(
+        extract("year", models.Transaction.created_at),
+        extract("month", models.Transaction.created_at),
+        models.Transaction.payment_method
+    ).all()
+    return {(int(y), int(m), method): (int(amount), count) for y, m, method, amount, count in rows}
+
+
+def materialised(db, business_id):
+    rows = db.query(models.MonthlyCashFlow).filter(
+        models.MonthlyCashFlow.business_id == business_id,
+        models.MonthlyCashFlow.transaction_count > 0
+    ).all()
+    return {(r.year, r.month, r.payment_method): (r.amount_minor, r.transaction_count) for r in rows}
+
+
+class TestMonthlyCashFlow:
+    def setup_method(self):
+        """Un utilisateur et une entreprise"""
+        Base.metadata.create_all(bind=engine)
+
+        client.post("/users/register", json={"email": "cashflow@test.com", "password": "Test123!"})
+        token = client.post("/users/login", json={"email": "cashflow@test.com", "password": "Test123!"}).json()["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.business_id = client.post("/businesses/", json={"name": "Boutique"}, headers=self.headers).json()["id"]
+        self.db = TestingSessionLocal()
+
+    def teardown_method(self):
+        """Supprimer les tables après chaque test"""
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def _add(self, amount, method, created_at):
+        transaction = models.Transaction(
+            amount=amount, payment_method=method, category="Vente",
+            created_at=created_at, business_id=self.business_id
+        )
+        self.db.add(transaction)
+        self.db.commit()
+        return transaction
+
+    def test_applied_once_at_commit(self):
+        """Pas d'upsert à chaque flush: deltas cumulés, appliqués au commit, oubliés au rollback"""
+        for amount in (1000, 2000):
+            self.db.add(models.Transaction(
+                amount=amount, payment_method="cash", category="Vente",
+                created_at=datetime(2026, 1, 5), business_id=self.business_id
+            ))
+            self.db.flush()
+            assert materialised(self.db, self.business_id) == {}
+        self.db.commit()
+        assert materialised(self.db, self.business_id) == {(2026, 1, "cash"): (300000, 2)}
+
+        self.db.add(models.Transaction(
+            amount=500, payment_method="cash", category="Vente",
+            created_at=datetime(2026, 1, 6), business_id=self.business_id
+        ))
+        self.db.flush()
+        self.db.rollback()
+        self.db.commit()
+        assert materialised(self.db, self.business_id) == recomputed(self.db, self.business_id)
+
+    def test_maintained_on_insert_update_delete(self):
+        first = self._add(1000, "cash", datetime(2026, 1, 5))
+        self._add(250.5, "wave", datetime(2026, 1, 20))
+        third = self._add(400, "card", datetime(2026, 2, 1))
+        assert materialised(self.db, self.business_id) == recomputed(self.db, self.business_id)
+
+        # Changement de mois, de moyen et de montant
+        first.created_at = datetime(2026, 2, 10)
+        first.payment_method = "orange_money"
+        first.amount = 1200
+        self.db.commit()
+        assert materialised(self.db, self.business_id) == recomputed(self.db, self.business_id)
+
+        self.db.delete(third)
+        self.db.commit()
+        assert materialised(self.db, self.business_id) == recomputed(self.db, self.business_id)
+        assert materialised(self.db, self.business_id)[(2026, 2, "orange_money")] == (120000, 1)
+
+    def test_rollback_leaves_view_unchanged(self):
+        self._add(1000, "cash", datetime(2026, 1, 5))
+        self.db.add(models.Transaction(
+            amount=500, payment_method="cash", category="Vente",
+            created_at=datetime(2026, 1, 6), business_id=self.business_id
+        ))
+        self.db.flush()
+        self.db.rollback()
+        assert materialised(self.db, self.business_id) == {(2026, 1, "cash"): (100000, 1)}
+
+    def test_endpoint_dynamic_method_columns(self):
+        self._add(1000, "cash", datetime(2026, 1, 5))
+        self._add(300, "wave", datetime(2026, 1, 6))
+        self._add(200, "mobile_money", datetime(2026, 1, 7))
+        self._add(50, "orange_money", datetime(2026, 3, 1))
+
+        response = client.get(f"/analytics/{self.business_id}/cash-flow-analysis", headers=self.headers)
+        assert response.status_code == 200
+        data = response.json()
+
+        assert {"cash", "card", "bank_transfer", "mobile_money", "wave", "orange_money"} <= set(data["methods"])
+        january, march = data["monthly_breakdown"]
+        assert january["period"] == "2026-01"
+        assert january["cash"] == 1000
+        assert january["wave"] == 300
+        # Les opérateurs sont cumulés dans mobile_money
+        assert january["mobile_money"] == 500
+        assert january["orange_money"] == 0
+        assert january["total"] == 1500
+        assert march["period"] == "2026-03"
+        assert march["orange_money"] == 50
+        assert march["total"] == 50
+
+    def test_refresh_after_bulk_insert(self):
+        self._add(1000, "cash", datetime(2026, 1, 5))
+        # Écritures Core: hors ORM, la table n'est pas maintenue
+        with engine.begin() as conn:
+            conn.execute(insert(models.Transaction.__table__), [
+                {"amount_minor": 5000, "payment_method": "card", "category": "Vente",
+                 "created_at": datetime(2026, 2, day), "business_id": self.business_id}
+                for day in range(1, 11)
+            ])
+        assert materialised(self.db, self.business_id) != recomputed(self.db, self.business_id)
+
+        # Rattrapage incrémental: seuls les mois >= février sont reconstruits
+        with engine.begin() as conn:
+            assert refresh_monthly_cash_flow(conn, [self.business_id], date(2026, 2, 1)) == 1
+        self.db.expire_all()
+        assert materialised(self.db, self.business_id) == recomputed(self.db, self.business_id)
+
+    def test_business_deletion_removes_rows(self):
+        self._add(1000, "cash", datetime(2026, 1, 5))
+        response = client.delete(f"/businesses/{self.business_id}", headers=self.headers)
+        assert response.status_code == 200
+        assert self.db.query(models.MonthlyCashFlow).count() == 0
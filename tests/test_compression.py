@@ -0,0 +1,134 @@
+# AFRIFLOW/backend/tests/test_compression.py : tests de la compression des réponses
+
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from app.main import app
+from app.database import Base, get_db
+from app.compression import CompressionMiddleware, negotiate_encoding
+
+# Base de données de test
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+LARGE_PAYLOAD = [{"id": i, "category": "Vente", "payment_method": "mobile_money"} for i in range(200)]
+
+
+def _streaming(request):
+    async def chunks():
+        for i in range(5):
+            yield ("ligne %d " % i * 200).encode()
+    return StreamingResponse(chunks(), media_type="text/csv")
+
+
+# Petite application isolée pour tester le middleware seul
+demo = Starlette(routes=[
+    Route("/large", lambda request: JSONResponse(LARGE_PAYLOAD)),
+    Route("/small", lambda request: JSONResponse({"ok": True})),
+    Route("/image", lambda request: Response(b"\x89PNG" * 1000, media_type="image/png")),
+    Route("/stream", _streaming),
+])
+demo.add_middleware(CompressionMiddleware, minimum_size=500)
+demo_client = TestClient(demo)
+
+
+class TestNegotiation:
+    def test_prefers_brotli_then_gzip(self):
+        pytest.importorskip("brotli")
+        assert negotiate_encoding("gzip, deflate, br") == "br"
+        assert negotiate_encoding("gzip, deflate, br", brotli_enabled=False) == "gzip"
+
+    def test_q_values_and_identity(self):
+        assert negotiate_encoding("br;q=0, gzip;q=0.5") == "gzip"
+        assert negotiate_encoding("identity") is None
+        assert negotiate_encoding("") is None
+        assert negotiate_encoding("*;q=0") is None
+
+
+class TestCompressionMiddleware:
+    def test_gzip_large_json(self):
+        response = demo_client.get("/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert response.json() == LARGE_PAYLOAD
+
+    def test_brotli_large_json(self):
+        pytest.importorskip("brotli")
+        response = demo_client.get("/large", headers={"Accept-Encoding": "br, gzip"})
+        assert response.headers["Content-Encoding"] == "br"
+        assert response.json() == LARGE_PAYLOAD
+
+    def test_below_threshold_not_compressed(self):
+        response = demo_client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+        assert response.json() == {"ok": True}
+
+    def test_identity_and_binary_untouched(self):
+        response = demo_client.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in response.headers
+
+        response = demo_client.get("/image", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+        assert response.content == b"\x89PNG" * 1000
+
+    def test_streaming_response_compressed(self):
+        with demo_client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert "Content-Length" not in response.headers
+            raw = b"".join(response.iter_raw())
+        expected = b"".join(("ligne %d " % i * 200).encode() for i in range(5))
+        assert gzip.decompress(raw) == expected
+        assert len(raw) < len(expected)
+
+
+class TestApiCompression:
+    def setup_method(self):
+        """Un utilisateur, une entreprise et une liste de transactions"""
+        Base.metadata.create_all(bind=engine)
+
+        client.post("/users/register", json={"email": "gzip@test.com", "password": "Test123!"})
+        token = client.post("/users/login", json={"email": "gzip@test.com", "password": "Test123!"}).json()["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.business_id = client.post("/businesses/", json={"name": "Boutique"}, headers=self.headers).json()["id"]
+        for i in range(30):
+            client.post("/transactions/", json={
+                "amount": 1000 + i, "payment_method": "cash", "category": "Vente", "business_id": self.business_id
+            }, headers=self.headers)
+
+    def teardown_method(self):
+        """Supprimer les tables après chaque test"""
+        Base.metadata.drop_all(bind=engine)
+
+    def test_transaction_list_gzip(self):
+        response = client.get(
+            f"/transactions/?business_id={self.business_id}",
+            headers={**self.headers, "Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert len(response.json()) == 30
+
+    def test_not_modified_has_no_body_encoding(self):
+        response = client.get("/dashboard/", headers={**self.headers, "Accept-Encoding": "gzip"})
+        etag = response.headers["ETag"]
+        response = client.get("/dashboard/", headers={**self.headers, "Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert response.status_code == 304
+        assert "Content-Encoding" not in response.headers
@@ -0,0 +1,149 @@
+# AFRIFLOW/backend/tests/test_conditional.py : tests des ETag et GET conditionnels
+
+import pytest
+from datetime import date
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.database import Base, get_db
+from app.models import models
+from app.services.fx_service import fx_rates
+from app.routes import analytics as analytics_routes
+
+# Base de données de test
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+class TestConditionalGet:
+    def setup_method(self):
+        """Un utilisateur avec deux entreprises"""
+        Base.metadata.create_all(bind=engine)
+
+        client.post("/users/register", json={"email": "etag@test.com", "password": "Test123!"})
+        token = client.post("/users/login", json={"email": "etag@test.com", "password": "Test123!"}).json()["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.business_id = client.post("/businesses/", json={"name": "Boutique"}, headers=self.headers).json()["id"]
+        self.other_id = client.post("/businesses/", json={"name": "Autre"}, headers=self.headers).json()["id"]
+
+    def teardown_method(self):
+        """Supprimer les tables après chaque test"""
+        fx_rates.invalidate()
+        Base.metadata.drop_all(bind=engine)
+
+    def _add_transaction(self, business_id, amount=1000):
+        response = client.post("/transactions/", json={
+            "amount": amount, "payment_method": "cash", "category": "Vente", "business_id": business_id
+        }, headers=self.headers)
+        assert response.status_code == 200
+
+    def _get(self, url, etag=None):
+        headers = dict(self.headers)
+        if etag:
+            headers["If-None-Match"] = etag
+        return client.get(url, headers=headers)
+
+    def test_dashboard_not_modified_until_write(self):
+        response = self._get("/dashboard/")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+        response = self._get("/dashboard/", etag)
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        # Une écriture sur n'importe quelle entreprise change le dashboard global
+        self._add_transaction(self.other_id)
+        response = self._get("/dashboard/", etag)
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_analytics_304_skips_aggregation(self, monkeypatch):
+        url = f"/analytics/{self.business_id}/summary"
+        etag = self._get(url).headers["ETag"]
+
+        class FailingService:
+            def __init__(self, *args, **kwargs):
+                raise AssertionError("agrégation exécutée malgré le 304")
+
+        monkeypatch.setattr(analytics_routes, "AnalyticsService", FailingService)
+        assert self._get(url, etag).status_code == 304
+
+    def test_etag_per_business_and_parameters(self):
+        url = f"/analytics/{self.business_id}/daily-stats?days=7"
+        etag = self._get(url).headers["ETag"]
+
+        # Écriture sur une autre entreprise: inchangé
+        self._add_transaction(self.other_id)
+        assert self._get(url, etag).status_code == 304
+
+        # Autres paramètres: autre représentation
+        assert self._get(f"/analytics/{self.business_id}/daily-stats?days=14", etag).status_code == 200
+
+        # Écriture sur cette entreprise: recalcul
+        self._add_transaction(self.business_id)
+        response = self._get(url, etag)
+        assert response.status_code == 200
+        assert response.json()["summary"]["total_revenue"] == 1000
+
+    def test_converted_response_revalidated_after_fx_reload(self):
+        """Des taux rechargés changent l'ETag des réponses ?currency= (données inchangées)"""
+        url = f"/analytics/{self.business_id}/comparative/{date.today().year}?currency=EUR"
+        etag = self._get(url).headers["ETag"]
+        assert self._get(url, etag).status_code == 304
+
+        db = TestingSessionLocal()
+        try:
+            db.add(models.FxRate(currency="EUR", rate_date=date.today(), rate=650.0))
+            db.commit()
+        finally:
+            db.close()
+        fx_rates.invalidate()
+
+        response = self._get(url, etag)
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_foreign_business_is_not_cached(self):
+        """Sans accès à l'entreprise, pas d'ETag: l'endpoint renvoie son erreur"""
+        response = self._get("/analytics/9999/summary")
+        assert response.status_code == 403
+        assert "ETag" not in response.headers
+
+    def test_data_version_bumped_once_at_commit(self):
+        """Pas d'UPDATE businesses à chaque flush: une incrémentation au commit, aucune au rollback"""
+        db = TestingSessionLocal()
+        try:
+            def version():
+                return db.query(models.Business.data_version).filter(models.Business.id == self.business_id).scalar()
+
+            before = version()
+
+            for amount in (1000, 2000):
+                db.add(models.Transaction(amount=amount, payment_method="cash", category="Vente", business_id=self.business_id))
+                db.flush()
+                assert version() == before
+            db.commit()
+            assert version() == before + 1
+
+            db.add(models.Transaction(amount=500, payment_method="cash", category="Vente", business_id=self.business_id))
+            db.flush()
+            db.rollback()
+            db.commit()
+            assert version() == before + 1
+        finally:
+            db.close()
@@ -0,0 +1,57 @@
+# AFRIFLOW/backend/tests/test_database.py : tests du pool de connexions
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import exc
+from sqlalchemy.pool import NullPool
+from app.main import app
+from app.config import get_db_pool_config
+from app.database import InstrumentedQueuePool, build_engine, get_pool_metrics
+
+client = TestClient(app)
+
+class TestConnectionPool:
+    def test_pool_size_per_role(self, monkeypatch):
+        """Chaque rôle a son dimensionnement, surchargeable par variable d'environnement"""
+        monkeypatch.delenv("DB_POOL_SIZE", raising=False)
+        monkeypatch.delenv("DB_MAX_OVERFLOW", raising=False)
+        assert get_db_pool_config("api")["pool_size"] == 3
+        assert get_db_pool_config("cron")["max_overflow"] == 0
+
+        monkeypatch.setenv("DB_POOL_SIZE", "7")
+        assert get_db_pool_config("worker")["pool_size"] == 7
+
+    def test_checkout_metrics_and_timeout(self, tmp_path, monkeypatch):
+        """Attente, saturation et timeouts sont comptés au checkout"""
+        monkeypatch.setenv("DB_POOL_TIMEOUT", "0.1")
+        engine = build_engine(f"sqlite:///{tmp_path / 'pool.db'}", role="cron")
+        assert isinstance(engine.pool, InstrumentedQueuePool)
+
+        conn = engine.connect()
+        metrics = get_pool_metrics(engine)
+        assert metrics["checked_out"] == 1
+        assert metrics["saturation"] == 1.0
+
+        # Pool de 1 sans débordement: la seconde connexion attend puis échoue
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        conn.close()
+
+        metrics = get_pool_metrics(engine)
+        assert metrics["timeouts"] == 1
+        assert metrics["checkouts"] == 1
+        assert metrics["saturation"] == 0
+        assert metrics["peak_saturation"] == 1.0
+        engine.dispose()
+
+    def test_pgbouncer_mode_uses_null_pool(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DB_PGBOUNCER", "true")
+        engine = build_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+        assert isinstance(engine.pool, NullPool)
+        assert get_pool_metrics(engine)["mode"] == "pgbouncer"
+        engine.dispose()
+
+    def test_health_exposes_pool_metrics(self):
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert "saturation" in response.json()["database_pool"]
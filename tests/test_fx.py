@@ -0,0 +1,144 @@
+# AFRIFLOW/backend/tests/test_fx.py : tests des taux de change et conversions
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.database import Base, get_db
+from app.models.models import Business
+from app.services.fx_service import fx_rates, load_rates_file, CurrencyConversionError, format_money
+from datetime import date, datetime, timedelta
+
+# Base de données de test
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+class TestFx:
+    def setup_method(self):
+        """Taux USD et NGN sur deux dates, deux entreprises FCFA et USD"""
+        Base.metadata.create_all(bind=engine)
+        fx_rates.invalidate()
+
+        self.today = datetime.utcnow().date()
+        self.db = TestingSessionLocal()
+
+        client.post("/users/register", json={"email": "fx@test.com", "password": "Test123!"})
+        token = client.post("/users/login", json={"email": "fx@test.com", "password": "Test123!"}).json()["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+        self.fcfa_id = client.post("/businesses/", json={"name": "Dakar", "currency": "FCFA"}, headers=self.headers).json()["id"]
+        self.usd_id = client.post("/businesses/", json={"name": "Lagos", "currency": "USD"}, headers=self.headers).json()["id"]
+        client.post("/transactions/", json={"amount": 120000, "payment_method": "cash", "category": "Vente", "business_id": self.fcfa_id}, headers=self.headers)
+        client.post("/transactions/", json={"amount": 100, "payment_method": "card", "category": "Vente", "business_id": self.usd_id}, headers=self.headers)
+
+    def teardown_method(self):
+        """Supprimer les tables après chaque test"""
+        self.db.close()
+        fx_rates.invalidate()
+        Base.metadata.drop_all(bind=engine)
+
+    def _load_rates(self, tmp_path):
+        rates_file = tmp_path / "rates.csv"
+        rates_file.write_text(
+            "date,currency,rate\n"
+            f"{self.today - timedelta(days=10)},USD,580\n"
+            f"{self.today - timedelta(days=1)},USD,600\n"
+            f"{self.today - timedelta(days=1)},NGN,0.4\n"
+        )
+        return load_rates_file(self.db, str(rates_file))
+
+    def test_load_rates_file_and_date_lookup(self, tmp_path):
+        """Le dernier taux connu à la date demandée est utilisé"""
+        assert self._load_rates(tmp_path) == 3
+        fx_rates.ensure_loaded(self.db)
+
+        assert fx_rates.rate("USD", self.today) == 600
+        assert fx_rates.rate("USD", self.today - timedelta(days=5)) == 580
+        assert fx_rates.rate("FCFA") == 1.0
+        assert fx_rates.convert(10, "USD", "FCFA", self.today) == 6000
+        # Parité fixe FCFA/EUR sans taux en base
+        assert fx_rates.factor("EUR", "FCFA") == pytest.approx(655.957)
+
+        with pytest.raises(CurrencyConversionError):
+            fx_rates.rate("USD", self.today - timedelta(days=30))
+        with pytest.raises(CurrencyConversionError):
+            fx_rates.rate("XYZ")
+
+    def test_reload_updates_existing_rates(self, tmp_path):
+        """Réimporter un fichier met à jour les taux existants sans doublons"""
+        self._load_rates(tmp_path)
+        self._load_rates(tmp_path)
+        fx_rates.ensure_loaded(self.db)
+        assert fx_rates.rate("NGN", self.today) == 0.4
+
+    def test_portfolio_converted_totals(self, tmp_path):
+        """Les totaux convertis additionnent FCFA et USD dans la devise cible"""
+        self._load_rates(tmp_path)
+
+        response = client.get("/portfolio/summary?currency=FCFA", headers=self.headers)
+        assert response.status_code == 200
+        converted = response.json()["converted"]
+        assert converted["currency"] == "FCFA"
+        assert converted["revenue"] == pytest.approx(120000 + 100 * 600)
+
+        response = client.get("/portfolio/cash-flow?currency=USD", headers=self.headers)
+        assert response.status_code == 200
+        converted = response.json()["converted"]
+        assert converted["methods"]["cash"] == pytest.approx(200)
+        assert converted["total"] == pytest.approx(300)
+
+    def test_business_without_currency_uses_base(self, tmp_path):
+        """Une entreprise sans devise est convertie depuis la devise de base, pas ignorée"""
+        self._load_rates(tmp_path)
+        legacy_id = client.post("/businesses/", json={"name": "Thiès"}, headers=self.headers).json()["id"]
+        client.post("/transactions/", json={"amount": 6000, "payment_method": "cash", "category": "Vente", "business_id": legacy_id}, headers=self.headers)
+        # Entreprise antérieure au défaut de la colonne: devise NULL
+        self.db.execute(update(Business).where(Business.id == legacy_id).values(currency=None))
+        self.db.commit()
+
+        response = client.get("/portfolio/summary?currency=USD", headers=self.headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["converted"]["revenue"] == pytest.approx((120000 + 6000) / 600 + 100)
+        assert data["totals_by_currency"]["FCFA"]["businesses"] == 2
+
+        # Même repli pour les revenus mensuels et le cash flow par moyen de paiement
+        year = datetime.utcnow().year
+        for url in (f"/portfolio/monthly-revenue?year={year}", "/portfolio/cash-flow"):
+            totals = client.get(url, headers=self.headers).json()["totals_by_currency"]
+            assert set(totals) == {"FCFA", "USD"}, url
+        cash_flow = client.get("/portfolio/cash-flow", headers=self.headers).json()
+        assert cash_flow["totals_by_currency"]["FCFA"]["total"] == 126000
+
+    def test_comparative_stats_in_other_currency(self, tmp_path):
+        """Les statistiques comparatives peuvent être exprimées dans une autre devise"""
+        self._load_rates(tmp_path)
+        year = datetime.utcnow().year
+
+        response = client.get(f"/analytics/{self.fcfa_id}/comparative/{year}?currency=USD", headers=self.headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["currency"] == "USD"
+        assert data["monthly_comparison"][datetime.utcnow().month - 1]["current_year"] == pytest.approx(200)
+
+    def test_unknown_currency_rejected(self):
+        """Une devise inconnue renvoie 400"""
+        response = client.get("/portfolio/summary?currency=XYZ", headers=self.headers)
+        assert response.status_code == 400
+
+    def test_format_money(self):
+        assert format_money(1234567, "FCFA") == "1,234,567 FCFA"
+        assert format_money(12.5, "EUR") == "12.50 EUR"
@@ -0,0 +1,86 @@
+# AFRIFLOW/backend/tests/test_health.py : tests des sondes de santé
+
+import asyncio
+import threading
+import time
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.health_service import CachedProbe, database_probe
+
+client = TestClient(app)
+
+class TestHealth:
+    def setup_method(self):
+        database_probe.invalidate()
+
+    def teardown_method(self):
+        database_probe.invalidate()
+
+    def test_liveness(self):
+        response = client.get("/health/live")
+        assert response.status_code == 200
+        assert response.json()["status"] == "alive"
+
+    def test_readiness_and_summary(self):
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["database"]["status"] == "ok"
+        assert "saturation" in data["database_pool"]
+        assert data["redis"]["status"] == "disabled"
+
+        data = client.get("/health").json()
+        assert data["status"] == "healthy"
+        assert data["database"] == "connected"
+
+    def test_probe_result_is_cached(self, monkeypatch):
+        """La base n'est interrogée qu'une fois pendant la durée du cache"""
+        calls = []
+        monkeypatch.setattr(database_probe, "check", lambda: calls.append(1) or True)
+
+        for _ in range(5):
+            assert client.get("/health/ready").status_code == 200
+        assert len(calls) == 1
+
+    def test_probe_timeout_marks_not_ready(self, monkeypatch):
+        monkeypatch.setattr(database_probe, "timeout", 0.05)
+        monkeypatch.setattr(database_probe, "check", lambda: time.sleep(0.5) or True)
+
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["database"]["status"] == "timeout"
+
+    def test_failed_probe_marks_not_ready(self, monkeypatch):
+        monkeypatch.setattr(database_probe, "check", lambda: False)
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert client.get("/health").json()["status"] == "unhealthy"
+
+    def test_concurrent_callers_share_one_check(self):
+        """Cache expiré: une seule vérification pour tous les appelants simultanés"""
+        calls = []
+        probe = CachedProbe("test", lambda: calls.append(1) or time.sleep(0.05) or True, ttl=60, timeout=1)
+
+        async def burst():
+            return await asyncio.gather(*(probe.result() for _ in range(20)))
+
+        results = asyncio.run(burst())
+        assert len(calls) == 1
+        assert all(r is results[0] and r["status"] == "ok" for r in results)
+
+    def test_hung_check_not_restarted(self):
+        """Une vérification bloquée est réutilisée après expiration du cache, sans nouveau thread"""
+        release = threading.Event()
+        calls = []
+        probe = CachedProbe("test", lambda: calls.append(1) or release.wait(5), ttl=0, timeout=0.05)
+
+        for _ in range(3):
+            assert asyncio.run(probe.result())["status"] == "timeout"
+        assert len(calls) == 1
+
+        # Terminée, elle laisse place à une nouvelle vérification
+        release.set()
+        time.sleep(0.05)
+        assert asyncio.run(probe.result())["status"] == "ok"
+        assert len(calls) == 2
@@ -0,0 +1,58 @@
+# AFRIFLOW/backend/tests/test_import_time.py : budget de démarrage (python -X importtime)
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).parent.parent
+
+# Budget d'import de app.main (cumulé, en ms); ajustable sur une machine lente
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2500"))
+
+# Modules lourds qui ne doivent jamais être chargés au démarrage
+HEAVY_MODULES = {"pandas", "matplotlib", "prophet", "sklearn", "scipy", "reportlab", "aiohttp", "openpyxl", "boto3"}
+
+
+def importtime_report(statement: str, tmp_path: Path):
+    """Exécute `statement` sous -X importtime; renvoie {module: temps cumulé en µs} et la sortie standard
+
+    Base SQLite jetable dans `tmp_path` (l'import crée le fichier), sauf DATABASE_URL explicite.
+    """
+    env = {**os.environ, "DATABASE_URL": os.getenv("DATABASE_URL", f"sqlite:///{tmp_path / 'import_time.db'}")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumul, name = line.split("|")
+        if cumul.strip().isdigit():
+            cumulative[name.strip()] = int(cumul)
+    return cumulative, result.stdout
+
+
+class TestImportTime:
+    def test_api_import_within_budget(self, tmp_path):
+        report, stdout = importtime_report("import app.main", tmp_path)
+
+        loaded_heavy = HEAVY_MODULES & {name.split(".")[0] for name in report}
+        assert not loaded_heavy, f"Modules lourds importés au démarrage: {sorted(loaded_heavy)}"
+
+        app_main_ms = report["app.main"] / 1000
+        assert app_main_ms < IMPORT_TIME_BUDGET_MS, f"import app.main: {app_main_ms:.0f} ms > {IMPORT_TIME_BUDGET_MS:.0f} ms"
+
+        # Aucun effet de bord à l'import (pas de print)
+        assert stdout == ""
+
+    def test_worker_defers_heavy_imports(self, tmp_path):
+        pytest.importorskip("redis")
+        report, _ = importtime_report("import scripts.worker", tmp_path)
+        loaded_heavy = HEAVY_MODULES & {name.split(".")[0] for name in report}
+        assert not loaded_heavy, f"Modules lourds importés par le worker: {sorted(loaded_heavy)}"
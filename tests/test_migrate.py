@@ -0,0 +1,49 @@
+# AFRIFLOW/backend/tests/test_migrate.py : tests des migrations au déploiement (scripts/migrate.py)
+
+from alembic import command
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+
+from scripts.migrate import alembic_config, migrate, stamp_legacy_database
+
+
+def _head(url):
+    return ScriptDirectory.from_config(alembic_config(url)).get_current_head()
+
+
+def _version(url):
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        version = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    engine.dispose()
+    return version
+
+
+class TestMigrate:
+    def test_fresh_database_migrated_to_head(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'fresh.db'}"
+        migrate(url)
+        assert _version(url) == _head(url)
+
+    def test_legacy_database_stamped_then_upgraded(self, tmp_path):
+        """Base créée par create_tables(): schéma 0001 sans alembic_version"""
+        url = f"sqlite:///{tmp_path / 'legacy.db'}"
+        command.upgrade(alembic_config(url), "0001")
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE alembic_version"))
+            conn.execute(text("INSERT INTO users (email, password_hash) VALUES ('old@test.com', 'x')"))
+        engine.dispose()
+
+        migrate(url)
+        assert _version(url) == _head(url)
+        engine = create_engine(url)
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT email FROM users")).scalar() == "old@test.com"
+        engine.dispose()
+
+    def test_stamp_only_once(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'again.db'}"
+        migrate(url)
+        assert not stamp_legacy_database(alembic_config(url), url)
+        assert "refresh_tokens" in inspect(create_engine(url)).get_table_names()
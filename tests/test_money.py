@@ -0,0 +1,92 @@
+# AFRIFLOW/backend/tests/test_money.py : tests des montants en unités mineures
+
+from datetime import datetime
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.database import Base, get_db
+from app.models import models
+from app.schemas import schemas
+from app.schemas.money import to_major, to_minor, from_minor
+
+# Base de données de test
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+class TestMoney:
+    def setup_method(self):
+        """Créer les tables et une entreprise en EUR"""
+        Base.metadata.create_all(bind=engine)
+
+        client.post("/users/register", json={"email": "money@test.com", "password": "Test123!"})
+        token = client.post("/users/login", json={"email": "money@test.com", "password": "Test123!"}).json()["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.business_id = client.post("/businesses/", json={"name": "Café", "currency": "EUR"}, headers=self.headers).json()["id"]
+
+    def teardown_method(self):
+        """Supprimer les tables après chaque test"""
+        Base.metadata.drop_all(bind=engine)
+
+    def test_conversions(self):
+        assert to_minor("12.345") == 1235
+        assert to_minor(0.1) == 10
+        assert to_minor(Decimal("150000")) == 15_000_000
+        assert from_minor(1235) == 12.35
+        assert from_minor(None) == 0.0
+
+        assert to_major(1999) == Decimal("19.99")
+        assert to_major(10) + to_major(20) == Decimal("0.3")
+
+    def test_output_schema_amount_is_exact_decimal(self):
+        """TransactionOut lit amount_minor: Decimal exact en Python, nombre dans le JSON"""
+        transaction = models.Transaction(
+            id=1, amount_minor=1999, payment_method="card", category="Vente",
+            description="", business_id=self.business_id, created_at=datetime(2025, 1, 1)
+        )
+        out = schemas.TransactionOut.model_validate(transaction)
+        assert out.amount == Decimal("19.99")
+        assert out.model_dump(mode="json")["amount"] == 19.99
+
+    def test_amount_stored_as_minor_units(self):
+        """Le montant saisi est stocké en entier et relu à l'identique"""
+        response = client.post("/transactions/", json={
+            "amount": 19.99, "payment_method": "card", "category": "Vente", "business_id": self.business_id
+        }, headers=self.headers)
+        assert response.status_code == 200
+        assert response.json()["amount"] == 19.99
+
+        db = TestingSessionLocal()
+        try:
+            assert db.query(models.Transaction.amount_minor).scalar() == 1999
+        finally:
+            db.close()
+
+    def test_sums_have_no_float_drift(self):
+        """Dix ventes de 0,10 font exactement 1,00 dans le tableau de bord et les analytics"""
+        for _ in range(10):
+            client.post("/transactions/", json={
+                "amount": 0.1, "payment_method": "cash", "category": "Vente", "business_id": self.business_id
+            }, headers=self.headers)
+        client.post("/expenses/", json={"amount": 0.3, "category": "Achats", "business_id": self.business_id}, headers=self.headers)
+
+        summary = client.get(f"/dashboard/?business_id={self.business_id}", headers=self.headers).json()["summary"]
+        assert summary["total_revenue"] == 1.0
+        assert summary["net_profit"] == 0.7
+
+        totals = client.get(f"/analytics/{self.business_id}/summary", headers=self.headers).json()["totals"]
+        assert totals["revenue"] == 1.0
+        assert totals["profit"] == 0.7
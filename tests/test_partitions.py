@@ -0,0 +1,223 @@
+# AFRIFLOW/backend/tests/test_partitions.py : partitions mensuelles et lecture des mois archivés
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, delete, func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import models
+from app.services import partition_service
+from app.services.analytics_service import AnalyticsService
+from app.services.cash_flow_service import refresh_monthly_cash_flow
+from app.services.partition_service import (
+    add_months, archive_partition, ensure_partitions, freeze_monthly_totals,
+    list_partitions, merge_totals, partitions_to_archive, restore_partition
+)
+from app.services.portfolio_service import PortfolioService
+from app.routes.dashboard import dashboard_summary
+
+# Base PostgreSQL jetable, comme tests/test_query_plans.py
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+START = datetime(2024, 1, 1)
+
+
+def _seed(session):
+    """Deux ans d'activité: une vente par semaine (3 moyens) et une dépense par mois"""
+    user = models.User(email="partitions@test.com", password_hash="x")
+    business = models.Business(name="Partitions", owner=user)
+    session.add(business)
+    for week in range(104):
+        created_at = START + timedelta(days=7 * week, hours=10)
+        business.transactions.append(models.Transaction(
+            amount_minor=(week % 7 + 1) * 1_000_00,
+            payment_method=["cash", "wave", "card"][week % 3],
+            category=["Vente", "Service"][week % 2],
+            created_at=created_at
+        ))
+    for month in range(24):
+        business.expenses.append(models.Expense(
+            amount_minor=50_000_00, category=["Loyer", "Transport"][month % 2], created_at=add_months(START, month)
+        ))
+    session.commit()
+    return user, business
+
+
+def _analytics(session, user, business):
+    service = AnalyticsService(session, business.id, user.id)
+    portfolio = PortfolioService(session, user.id)
+    return {
+        "summary": service.get_summary_stats(),
+        "monthly": service.get_monthly_revenue(2024),
+        "monthly_all": service.get_monthly_revenue(),
+        "expenses": service.get_expenses_by_category(),
+        "methods": service.get_payment_methods_distribution(),
+        "top": service.get_top_categories(),
+        "comparative": service.get_comparative_stats(2025),
+        "portfolio": portfolio.get_summary(),
+        "portfolio_monthly": portfolio.get_monthly_revenue(2024),
+        "portfolio_methods": portfolio.get_cash_flow_by_method(),
+        "dashboard": dashboard_summary(business_id=None, db=session, current_user=user),
+        "dashboard_business": dashboard_summary(business_id=business.id, db=session, current_user=user),
+    }
+
+
+class TestMonthHelpers:
+    def test_add_months_crosses_years(self):
+        assert add_months(datetime(2025, 11, 1), 3) == datetime(2026, 2, 1)
+        assert add_months(datetime(2025, 1, 1), -1) == datetime(2024, 12, 1)
+        assert partition_service.partition_name("transactions", datetime(2026, 3, 1)) == "transactions_p2026_03"
+
+    def test_merge_totals(self):
+        rows = [("cash", 100, 1), ("wave", 50, 2), ("cash", 25, None)]
+        assert sorted(merge_totals(rows)) == [("cash", 125, 1), ("wave", 50, 2)]
+
+
+class TestArchivedAnalyticsSQLite:
+    """SQLite n'est pas partitionné: on simule l'archivage d'un mois (agrégats figés + suppression des lignes)"""
+
+    def setup_method(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.user, self.business = _seed(self.session)
+
+    def teardown_method(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def _archive(self, months):
+        connection = self.session.connection()
+        for offset in range(months):
+            start = add_months(START, offset)
+            for table, model in (("transactions", models.Transaction), ("expenses", models.Expense)):
+                freeze_monthly_totals(connection, table, start)
+                connection.execute(delete(model.__table__).where(
+                    model.created_at >= start, model.created_at < add_months(start, 1)
+                ))
+        self.session.commit()
+        self.session.expire_all()
+
+    def test_partition_management_is_noop(self):
+        connection = self.session.connection()
+        assert ensure_partitions(connection) == []
+        assert partitions_to_archive(connection, datetime(2030, 1, 1)) == []
+
+    def test_analytics_unchanged_after_archiving(self):
+        before = _analytics(self.session, self.user, self.business)
+        self._archive(14)
+
+        live = self.session.query(func.count(models.Transaction.id)).scalar()
+        assert 0 < live < 104
+        assert _analytics(self.session, self.user, self.business) == before
+
+    def test_cash_flow_refresh_keeps_archived_months(self):
+        def cash_flow():
+            return sorted(
+                (r.year, r.month, r.payment_method, r.amount_minor, r.transaction_count)
+                for r in self.session.query(models.MonthlyCashFlow)
+            )
+        expected = cash_flow()
+        self._archive(6)
+
+        refresh_monthly_cash_flow(self.session.connection(), [self.business.id])
+        self.session.commit()
+        assert cash_flow() == expected
+
+    def test_deleting_business_removes_archived_totals(self):
+        self._archive(3)
+        assert self.session.query(models.ArchivedMonthlyTotal).count() > 0
+
+        self.session.delete(self.session.get(models.Business, self.business.id))
+        self.session.commit()
+        assert self.session.query(models.ArchivedMonthlyTotal).count() == 0
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL non définie")
+class TestPartitionsPostgres:
+    def setup_method(self):
+        pytest.importorskip("psycopg2")
+        from alembic import command
+        from alembic.config import Config
+
+        self.engine = create_engine(POSTGRES_URL)
+        with self.engine.begin() as conn:
+            conn.execute(text("DROP SCHEMA public CASCADE"))
+            conn.execute(text("CREATE SCHEMA public"))
+        config = Config("alembic.ini")
+        config.set_main_option("sqlalchemy.url", POSTGRES_URL)
+        command.upgrade(config, "head")
+
+        self.session = sessionmaker(bind=self.engine)()
+        self.user, self.business = _seed(self.session)
+        # Base vide à la migration: partitions créées à partir du mois courant, l'historique est dans _default
+        connection = self.session.connection()
+        for table in partition_service.PARTITIONED_TABLES:
+            for offset in range(24):
+                partition_service._attach_month(connection, table, add_months(START, offset))
+        self.session.commit()
+
+    def teardown_method(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def test_rows_routed_to_monthly_partitions(self):
+        connection = self.session.connection()
+        partitions = list_partitions(connection, "transactions")
+        assert START in partitions
+        counts = dict(connection.execute(text(
+            "SELECT tableoid::regclass::text, count(*) FROM transactions GROUP BY 1"
+        )).all())
+        assert counts[partitions[START]] == 5
+        assert "transactions_default" not in counts
+
+    def test_ensure_partitions_moves_rows_out_of_default(self):
+        future = datetime(2030, 1, 1)
+        self.session.add(models.Transaction(
+            amount_minor=100, payment_method="cash", category="Vente",
+            created_at=future + timedelta(days=3), business_id=self.business.id
+        ))
+        self.session.commit()
+
+        created = ensure_partitions(self.session.connection(), months_ahead=0, today=future)
+        self.session.commit()
+        assert created == ["transactions_p2030_01", "expenses_p2030_01"]
+        assert self.session.execute(text("SELECT count(*) FROM transactions_default")).scalar() == 0
+        assert self.session.execute(text("SELECT count(*) FROM transactions_p2030_01")).scalar() == 1
+
+    def test_archive_aborted_when_partition_changes_during_export(self, tmp_path, monkeypatch):
+        export = partition_service._export_partition
+
+        def export_then_write(connection, name, path, level):
+            fingerprint = export(connection, name, path, level)
+            # Saisie antidatée dans le mois pendant l'export
+            with self.engine.begin() as other:
+                other.execute(text(f"UPDATE {name} SET amount_minor = amount_minor + 1"))
+            return fingerprint
+
+        monkeypatch.setattr(partition_service, "_export_partition", export_then_write)
+        with pytest.raises(partition_service.PartitionError):
+            archive_partition(self.engine, "transactions", START, tmp_path)
+        assert START in list_partitions(self.session.connection(), "transactions")
+        assert os.listdir(tmp_path) == []
+        assert self.session.scalar(select(func.count()).select_from(models.ArchivedPartition)) == 0
+
+    def test_archive_and_restore_month(self, tmp_path):
+        before = _analytics(self.session, self.user, self.business)
+
+        candidates = partitions_to_archive(self.session.connection(), add_months(START, 6))
+        self.session.commit()
+        archived = [archive_partition(self.engine, table, start, tmp_path) for table, start in candidates]
+        assert len(archived) == 12
+        assert all(os.path.exists(a["path"]) for a in archived)
+        assert START not in list_partitions(self.session.connection(), "transactions")
+        assert _analytics(self.session, self.user, self.business) == before
+
+        restore_partition(self.session.connection(), "transactions_p2024_01")
+        self.session.commit()
+        assert START in list_partitions(self.session.connection(), "transactions")
+        assert self.session.scalar(select(func.count()).select_from(models.ArchivedPartition)) == 11
+        assert _analytics(self.session, self.user, self.business) == before
@@ -0,0 +1,116 @@
+# AFRIFLOW/backend/tests/test_portfolio.py : tests des analytics multi-entreprises
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.database import Base, get_db
+from datetime import datetime
+
+# Base de données de test
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+class TestPortfolio:
+    def setup_method(self):
+        """Un utilisateur avec deux entreprises dans deux devises"""
+        Base.metadata.create_all(bind=engine)
+
+        client.post("/users/register", json={"email": "portfolio@test.com", "password": "Test123!"})
+        response = client.post("/users/login", json={"email": "portfolio@test.com", "password": "Test123!"})
+        assert response.status_code == 200
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        self.dakar_id = self._create_business("Boutique Dakar", "FCFA")
+        self.paris_id = self._create_business("Boutique Paris", "EUR")
+
+        for amount, method in [(100000, "cash"), (50000, "mobile_money"), (25000, "mobile_money")]:
+            self._post("/transactions/", {"amount": amount, "payment_method": method, "category": "Vente", "business_id": self.dakar_id})
+        self._post("/transactions/", {"amount": 200, "payment_method": "card", "category": "Vente", "business_id": self.paris_id})
+        self._post("/expenses/", {"amount": 40000, "category": "Loyer", "business_id": self.dakar_id})
+
+    def teardown_method(self):
+        """Supprimer les tables après chaque test"""
+        Base.metadata.drop_all(bind=engine)
+
+    def _create_business(self, name, currency):
+        response = client.post("/businesses/", json={"name": name, "currency": currency}, headers=self.headers)
+        assert response.status_code == 200
+        return response.json()["id"]
+
+    def _post(self, url, payload):
+        response = client.post(url, json=payload, headers=self.headers)
+        assert response.status_code == 200
+
+    def test_portfolio_summary(self):
+        """Résumé par entreprise et totaux séparés par devise"""
+        response = client.get("/portfolio/summary", headers=self.headers)
+        assert response.status_code == 200
+        data = response.json()
+
+        by_id = {b["business_id"]: b for b in data["businesses"]}
+        assert by_id[self.dakar_id]["revenue"] == 175000
+        assert by_id[self.dakar_id]["expenses"] == 40000
+        assert by_id[self.dakar_id]["profit"] == 135000
+        assert by_id[self.dakar_id]["transactions"] == 3
+        assert by_id[self.paris_id]["revenue"] == 200
+        assert by_id[self.paris_id]["expense_count"] == 0
+
+        totals = data["totals_by_currency"]
+        assert set(totals) == {"FCFA", "EUR"}
+        assert totals["FCFA"]["revenue"] == 175000
+        assert totals["EUR"]["revenue"] == 200
+
+    def test_portfolio_monthly_revenue(self):
+        """12 mois par entreprise pour l'année demandée"""
+        year = datetime.utcnow().year
+        response = client.get(f"/portfolio/monthly-revenue?year={year}", headers=self.headers)
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["year"] == year
+        month_index = datetime.utcnow().month - 1
+        for business in data["businesses"]:
+            assert len(business["months"]) == 12
+        dakar = next(b for b in data["businesses"] if b["business_id"] == self.dakar_id)
+        assert dakar["months"][month_index]["total"] == 175000
+        assert dakar["months"][month_index]["transaction_count"] == 3
+        assert data["totals_by_currency"]["EUR"][month_index]["total"] == 200
+
+    def test_portfolio_cash_flow(self):
+        """Répartition par moyen de paiement"""
+        response = client.get("/portfolio/cash-flow", headers=self.headers)
+        assert response.status_code == 200
+        data = response.json()
+
+        dakar = next(b for b in data["businesses"] if b["business_id"] == self.dakar_id)
+        assert dakar["methods"] == {"cash": 100000, "mobile_money": 75000}
+        assert dakar["total"] == 175000
+        assert data["totals_by_currency"]["EUR"]["methods"] == {"card": 200}
+
+    def test_portfolio_isolated_per_user(self):
+        """Un autre utilisateur ne voit pas ces entreprises"""
+        client.post("/users/register", json={"email": "other@test.com", "password": "Test123!"})
+        token = client.post("/users/login", json={"email": "other@test.com", "password": "Test123!"}).json()["access_token"]
+
+        response = client.get("/portfolio/summary", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.json() == {"businesses": [], "totals_by_currency": {}}
+
+    def test_portfolio_requires_auth(self):
+        """Accès refusé sans token"""
+        response = client.get("/portfolio/summary")
+        assert response.status_code == 401
@@ -0,0 +1,177 @@
+# AFRIFLOW/backend/tests/test_ratelimit.py : tests de la limitation de débit (seaux à jetons)
+
+import os
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from app.ratelimit import MemoryBuckets, RateLimiter, RateLimitMiddleware, TOKEN_BUCKET_LUA, client_ip
+
+# Redis jetable pour le script Lua, comme TEST_POSTGRES_URL pour les partitions
+REDIS_URL = os.getenv("TEST_REDIS_URL")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client(default=(100, 60), auth=(3, 60), account=(2, 300)):
+    app = FastAPI()
+
+    @app.post("/users/login")
+    async def login(request: Request):
+        payload = await request.json()
+        if payload.get("password") != "ok":
+            raise HTTPException(status_code=400, detail="Email ou mot de passe incorrect")
+        return {"received": payload}
+
+    @app.get("/businesses/")
+    def businesses():
+        return []
+
+    @app.get("/health/live")
+    def live():
+        return {"status": "ok"}
+
+    app.add_middleware(RateLimitMiddleware, default=default, auth=auth, account=account, proxy_hops=1)
+    return TestClient(app)
+
+
+def from_ip(ip):
+    return {"X-Forwarded-For": f"203.0.113.9, {ip}"}
+
+
+class TestMemoryBuckets:
+    def test_burst_then_refill(self):
+        clock = FakeClock()
+        buckets = MemoryBuckets(clock=clock)
+        assert [buckets.take("k", 3, 60) for _ in range(3)] == [0, 0, 0]
+        assert buckets.take("k", 3, 60) == pytest.approx(20)
+
+        clock.now += 20
+        assert buckets.take("k", 3, 60) == 0
+        assert buckets.take("k", 3, 60) > 0
+
+    def test_keys_are_independent(self):
+        buckets = MemoryBuckets(clock=FakeClock())
+        assert buckets.take("a", 1, 60) == 0
+        assert buckets.take("a", 1, 60) > 0
+        assert buckets.take("b", 1, 60) == 0
+
+    def test_idle_buckets_pruned(self):
+        clock = FakeClock()
+        buckets = MemoryBuckets(max_keys=2, clock=clock)
+        buckets.take("a", 5, 60)
+        buckets.take("b", 5, 60)
+        clock.now += 61
+        buckets.take("c", 5, 60)
+        assert set(buckets._buckets) == {"c"}
+
+
+    def test_take_many_all_or_nothing(self):
+        buckets = MemoryBuckets(clock=FakeClock())
+        assert buckets.take("empty", 1, 60) == 0
+        assert buckets.take_many([("full", 5, 60, True), ("empty", 1, 60, True)]) > 0
+        assert buckets._buckets["full"][0] == 5
+
+        # Seau vérifié sans débit
+        assert buckets.take_many([("full", 5, 60, True), ("checked", 1, 60, False)]) == 0
+        assert buckets._buckets["checked"][0] == 1
+
+
+class TestClientIp:
+    def test_forwarded_for_hops(self):
+        scope = {"headers": [(b"x-forwarded-for", b"1.1.1.1, 10.0.0.1, 10.0.0.2")], "client": ("127.0.0.1", 1)}
+        assert client_ip(scope, 1) == "10.0.0.2"
+        assert client_ip(scope, 2) == "10.0.0.1"
+        assert client_ip(scope, 0) == "127.0.0.1"
+
+    def test_no_header_uses_peer(self):
+        assert client_ip({"headers": [], "client": ("192.0.2.1", 1)}, 1) == "192.0.2.1"
+
+
+class TestRateLimitMiddleware:
+    def test_login_limited_per_ip(self):
+        client = make_client()
+        for i in range(3):
+            response = client.post("/users/login", json={"email": f"u{i}@test.com", "password": "ok"}, headers=from_ip("198.51.100.1"))
+            assert response.status_code == 200
+        blocked = client.post("/users/login", json={"email": "u9@test.com", "password": "ok"}, headers=from_ip("198.51.100.1"))
+        assert blocked.status_code == 429
+        assert int(blocked.headers["retry-after"]) >= 1
+
+        # Une autre IP n'est pas concernée
+        assert client.post("/users/login", json={"email": "x@test.com", "password": "ok"}, headers=from_ip("198.51.100.2")).status_code == 200
+
+    def test_failed_logins_limited_per_account_across_ips(self):
+        client = make_client()
+        statuses = [
+            client.post("/users/login", json={"email": "Cible@Test.com "}, headers=from_ip(f"198.51.100.{i}")).status_code
+            for i in range(3)
+        ]
+        assert statuses == [400, 400, 429]
+
+    def test_successful_logins_do_not_charge_account(self):
+        client = make_client()
+        statuses = [
+            client.post("/users/login", json={"email": "cible@test.com", "password": "ok"}, headers=from_ip(f"198.51.100.{i}")).status_code
+            for i in range(5)
+        ]
+        assert statuses == [200] * 5
+
+    def test_rejected_request_keeps_other_tokens(self):
+        client = make_client(default=(2, 60), auth=(1, 60))
+        ip = from_ip("198.51.100.7")
+        assert client.post("/users/login", json={"email": "a@test.com", "password": "ok"}, headers=ip).status_code == 200
+        # Refusée par le seau auth: le jeton restant du seau IP n'est pas consommé
+        assert client.post("/users/login", json={"email": "a@test.com", "password": "ok"}, headers=ip).status_code == 429
+        assert client.get("/businesses/", headers=ip).status_code == 200
+        assert client.get("/businesses/", headers=ip).status_code == 429
+
+    def test_padded_body_cannot_skip_account_bucket(self):
+        client = make_client(auth=(100, 60))
+        padded = '{"email": "cible@test.com", "password": "x"}' + " " * 20_000
+        headers = {"Content-Type": "application/json"}
+        statuses = [
+            client.post("/users/login", content=padded, headers={**headers, **from_ip(f"198.51.100.{i}")}).status_code
+            for i in range(3)
+        ]
+        assert statuses == [413, 413, 413]
+
+        # Même compte, corps normal: le seau par compte s'applique toujours
+        statuses = [
+            client.post("/users/login", json={"email": "cible@test.com"}, headers=from_ip(f"198.51.100.{i}")).status_code
+            for i in range(3)
+        ]
+        assert statuses == [400, 400, 429]
+
+    def test_body_replayed_to_endpoint(self):
+        client = make_client()
+        payload = {"email": "a@test.com", "password": "ok"}
+        assert client.post("/users/login", json=payload).json() == {"received": payload}
+
+    def test_default_limit_and_exemptions(self):
+        client = make_client(default=(2, 60))
+        assert [client.get("/businesses/").status_code for _ in range(3)] == [200, 200, 429]
+        assert client.get("/health/live").status_code == 200
+
+
+@pytest.mark.skipif(not REDIS_URL, reason="TEST_REDIS_URL non définie")
+class TestRedisBuckets:
+    def setup_method(self):
+        import redis
+
+        self.client = redis.Redis.from_url(REDIS_URL)
+        self.client.delete(f"{RateLimiter.KEY_PREFIX}test")
+
+    def test_lua_token_bucket(self):
+        script = self.client.register_script(TOKEN_BUCKET_LUA)
+        key = f"{RateLimiter.KEY_PREFIX}test"
+        waits = [script(keys=[key], args=[2, 2 / 60, 60_000, 1]) for _ in range(3)]
+        assert waits[:2] == [0, 0]
+        assert 0 < waits[2] <= 30_000
+        assert 0 < self.client.pttl(key) <= 60_000
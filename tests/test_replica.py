@@ -0,0 +1,104 @@
+# AFRIFLOW/backend/tests/test_replica.py : tests du routage des lectures vers la réplique
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.database import Base, get_db, RoutingSession, ReplicaLagMonitor
+from app.models import models
+from app import replica as replica_module
+
+# Base de données de test (primaire) et réplique séparée
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+class TestReplicaRouting:
+    def setup_method(self):
+        """Primaire avec un utilisateur et une entreprise; la réplique reste vide"""
+        Base.metadata.create_all(bind=engine)
+        replica_module.write_tracker._local.clear()
+
+        client.post("/users/register", json={"email": "replica@test.com", "password": "Test123!"})
+        token = client.post("/users/login", json={"email": "replica@test.com", "password": "Test123!"}).json()["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.business_id = client.post("/businesses/", json={"name": "Réplique"}, headers=self.headers).json()["id"]
+
+    def teardown_method(self):
+        """Supprimer les tables après chaque test"""
+        replica_module.write_tracker._local.clear()
+        Base.metadata.drop_all(bind=engine)
+
+    def _replica(self, tmp_path, lag_monitor=None):
+        replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=replica)
+        return replica, sessionmaker(
+            class_=RoutingSession, autocommit=False, autoflush=False,
+            primary=engine, replica=replica, lag_monitor=lag_monitor
+        )
+
+    def _add_transaction(self, amount):
+        response = client.post("/transactions/", json={
+            "amount": amount, "payment_method": "cash", "category": "Vente", "business_id": self.business_id
+        }, headers=self.headers)
+        assert response.status_code == 200
+
+    def test_reads_go_to_replica_and_stick_after_write(self, tmp_path, monkeypatch):
+        replica, read_sessions = self._replica(tmp_path)
+        monkeypatch.setattr(replica_module, "replica_engine", replica)
+        monkeypatch.setattr(replica_module, "ReadSessionLocal", read_sessions)
+
+        self._add_transaction(1000)
+
+        # Juste après l'écriture: lecture sur le primaire (read-your-writes)
+        summary = client.get("/dashboard/", headers=self.headers).json()["summary"]
+        assert summary["total_revenue"] == 1000
+
+        # Une fois la fenêtre expirée: lecture sur la réplique (vide ici)
+        replica_module.write_tracker._local.clear()
+        summary = client.get("/dashboard/", headers=self.headers).json()["summary"]
+        assert summary["total_revenue"] == 0
+        replica.dispose()
+
+    def test_lagging_replica_falls_back_to_primary(self, tmp_path, monkeypatch):
+        monitor = ReplicaLagMonitor(None, max_lag_seconds=5, check_interval=60)
+        monkeypatch.setattr(monitor, "_measure_lag", lambda: 30.0)
+        replica, read_sessions = self._replica(tmp_path, lag_monitor=monitor)
+
+        db = read_sessions()
+        try:
+            assert db.get_bind() is engine
+            assert db.query(models.Business).count() == 1
+        finally:
+            db.close()
+        assert monitor.lag == 30.0 and not monitor.healthy()
+        replica.dispose()
+
+    def test_writes_flush_to_primary(self, tmp_path):
+        replica, read_sessions = self._replica(tmp_path)
+        db = read_sessions()
+        try:
+            assert db.get_bind() is replica
+            db.add(models.Expense(amount=250, category="Loyer", business_id=self.business_id))
+            db.commit()
+        finally:
+            db.close()
+
+        primary = TestingSessionLocal()
+        try:
+            assert primary.query(models.Expense).count() == 1
+        finally:
+            primary.close()
+        replica.dispose()
@@ -0,0 +1,70 @@
+# AFRIFLOW/backend/tests/test_seed_data.py : tests de la génération de données bulk (mode idempotent)
+
+from sqlalchemy import create_engine, func, select
+
+from app.database import Base
+from app.models import models
+from scripts import seed_data
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+
+COUNTED = (models.User, models.Business, models.Transaction, models.Expense)
+
+
+def _counts():
+    with engine.connect() as conn:
+        return {model.__tablename__: conn.execute(select(func.count()).select_from(model)).scalar() for model in COUNTED}
+
+
+def _bulk(users, **kwargs):
+    seed_data.generate_bulk_data(users=users, businesses_per_user=2, years=1, daily_transactions=2, idempotent=True, **kwargs)
+
+
+class TestBulkSeedIdempotent:
+    def setup_method(self):
+        Base.metadata.create_all(bind=engine)
+
+    def teardown_method(self):
+        Base.metadata.drop_all(bind=engine)
+
+    def test_second_run_adds_nothing(self, monkeypatch):
+        monkeypatch.setattr(seed_data, "engine", engine)
+        _bulk(3)
+        first = _counts()
+        assert first["users"] == 3
+        assert first["businesses"] == 6
+        assert first["transactions"] > 0 and first["expenses"] > 0
+
+        _bulk(3)
+        assert _counts() == first
+
+    def test_larger_run_completes_missing_users(self, monkeypatch):
+        monkeypatch.setattr(seed_data, "engine", engine)
+        _bulk(2)
+        before = _counts()
+
+        _bulk(3)
+        after = _counts()
+        assert after["users"] == 3
+        assert after["businesses"] == 6
+        assert after["transactions"] > before["transactions"]
+
+    def test_interrupted_run_resumed(self, monkeypatch):
+        """Utilisateurs et entreprises créés, activité jamais écrite: le passage suivant la complète"""
+        monkeypatch.setattr(seed_data, "engine", engine)
+        with engine.begin() as conn:
+            conn.execute(models.User.__table__.insert().values(email=seed_data.BULK_EMAIL_TEMPLATE.format(0), password_hash="x"))
+            user_id = conn.execute(select(models.User.id)).scalar()
+            conn.execute(models.Business.__table__.insert().values(name="Entreprise", currency="FCFA", owner_id=user_id))
+
+        _bulk(2)
+        counts = _counts()
+        assert counts["users"] == 2
+        assert counts["businesses"] == 4
+        with engine.connect() as conn:
+            empty = conn.execute(
+                select(func.count()).select_from(models.Business)
+                .where(~select(models.Transaction.id).where(models.Transaction.business_id == models.Business.id).exists())
+            ).scalar()
+        assert empty == 0
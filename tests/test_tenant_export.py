@@ -0,0 +1,164 @@
+# AFRIFLOW/backend/tests/test_tenant_export.py : tests de l'export / import logique d'une entreprise
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import models
+from app.services import tenant_export_service
+from app.services.tenant_export_service import TenantArchiveError, export_business, import_business
+
+# Base de données de test
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def snapshot(db, business_id):
+    """Contenu comparable d'une entreprise (sans les ids)"""
+    business = db.get(models.Business, business_id)
+    return {
+        "business": (business.name, business.sector, business.currency, business.owner.email),
+        "transactions": sorted(
+            (t.amount_minor, t.payment_method, t.category, t.description, t.created_at)
+            for t in db.query(models.Transaction).filter_by(business_id=business_id)
+        ),
+        "expenses": sorted(
+            (e.amount_minor, e.category, e.description, e.created_at)
+            for e in db.query(models.Expense).filter_by(business_id=business_id)
+        ),
+        "cash_flow": sorted(
+            (c.year, c.month, c.payment_method, c.amount_minor, c.transaction_count)
+            for c in db.query(models.MonthlyCashFlow).filter_by(business_id=business_id)
+        )
+    }
+
+
+class TestTenantExport:
+    def setup_method(self):
+        """Deux entreprises du même propriétaire; seule la première est exportée"""
+        Base.metadata.create_all(bind=engine)
+        db = TestingSessionLocal()
+        owner = models.User(email="export@test.com", password_hash="hash")
+        shop = models.Business(name="Boutique Dakar", sector="Commerce", currency="FCFA", owner=owner)
+        other = models.Business(name="Autre", owner=owner)
+        start = datetime(2026, 1, 1, 9)
+        shop.transactions = [
+            models.Transaction(
+                amount_minor=(i + 1) * 10_000,
+                payment_method=["cash", "wave", "card"][i % 3],
+                category="Vente",
+                # Caractères à échapper pour COPY / JSON
+                description=[None, "Tab\tet\nretour", "Café \\ thé", ""][i % 4],
+                created_at=start + timedelta(days=i * 7)
+            )
+            for i in range(25)
+        ]
+        shop.expenses = [
+            models.Expense(amount_minor=5_000_00, category="Loyer", description="Loyer", created_at=start + timedelta(days=30 * i))
+            for i in range(3)
+        ]
+        other.transactions = [models.Transaction(amount_minor=100, payment_method="cash", category="Vente")]
+        db.add_all([owner, shop, other])
+        db.commit()
+        self.business_id, self.other_id = shop.id, other.id
+        db.close()
+
+    def teardown_method(self):
+        Base.metadata.drop_all(bind=engine)
+
+    def test_round_trip_into_another_database(self, tmp_path):
+        archive = tmp_path / "business.ndjson.zst"
+        db = TestingSessionLocal()
+        result = export_business(db, self.business_id, archive, batch_size=4)
+        expected = snapshot(db, self.business_id)
+        db.close()
+        assert result["counts"] == {"users": 1, "businesses": 1, "transactions": 25, "expenses": 3, "archived_monthly_totals": 0}
+        assert not archive.with_name(archive.name + ".part").exists()
+
+        target = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+        Base.metadata.create_all(target)
+        # Ids déjà occupés sur la cible: l'import doit les réattribuer
+        with sessionmaker(bind=target)() as db:
+            squatter = models.User(email="squatter@test.com", password_hash="x")
+            db.add(models.Business(name="Squatter", owner=squatter))
+            db.commit()
+
+            imported = import_business(db, archive, batch_size=4)
+            db.commit()
+            assert imported["counts"] == result["counts"]
+            assert imported["business_id"] != self.business_id
+            assert snapshot(db, imported["business_id"]) == expected
+
+            # Propriétaire créé sans ses identifiants d'origine
+            owner = db.get(models.Business, imported["business_id"]).owner
+            assert owner.password_hash not in ("hash", None)
+            assert owner.token_version == 1
+        target.dispose()
+
+    def test_credentials_not_exported(self, tmp_path):
+        archive = tmp_path / "business.ndjson.zst"
+        db = TestingSessionLocal()
+        export_business(db, self.business_id, archive)
+        db.close()
+
+        with tenant_export_service._open_archive(archive, "r") as f:
+            lines = [json.loads(line) for line in f]
+        header = next(r for r in lines if isinstance(r, dict) and r.get("table") == "users")
+        assert header["columns"] == ["id", "email", "created_at"]
+        assert "hash" not in lines[lines.index(header) + 1]
+
+    def test_import_reuses_existing_owner(self, tmp_path):
+        archive = tmp_path / "business.ndjson.zst"
+        db = TestingSessionLocal()
+        export_business(db, self.business_id, archive)
+        db.rollback()
+
+        imported = import_business(db, archive)
+        db.commit()
+        business = db.get(models.Business, imported["business_id"])
+        assert business.owner.email == "export@test.com"
+        assert business.owner.password_hash == "hash"
+        assert db.query(func.count(models.User.id)).scalar() == 1
+        assert snapshot(db, imported["business_id"]) == snapshot(db, self.business_id)
+        db.close()
+
+    def test_only_requested_business_exported(self, tmp_path):
+        archive = tmp_path / "other.ndjson.zst"
+        db = TestingSessionLocal()
+        result = export_business(db, self.other_id, archive)
+        db.close()
+        assert result["counts"] == {"users": 1, "businesses": 1, "transactions": 1, "expenses": 0, "archived_monthly_totals": 0}
+
+    def test_unknown_business(self, tmp_path):
+        db = TestingSessionLocal()
+        with pytest.raises(TenantArchiveError):
+            export_business(db, 999, tmp_path / "missing.ndjson.zst")
+        db.close()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_truncated_archive_imports_nothing(self, tmp_path):
+        archive = tmp_path / "business.ndjson.zst"
+        db = TestingSessionLocal()
+        export_business(db, self.business_id, archive)
+        db.rollback()
+
+        with tenant_export_service._open_archive(archive, "r") as f:
+            lines = f.readlines()
+        truncated = tmp_path / "truncated.ndjson.zst"
+        with tenant_export_service._open_archive(truncated, "w") as f:
+            f.writelines(lines[:-5])
+
+        with pytest.raises(TenantArchiveError, match="tronquée"):
+            import_business(db, truncated)
+        db.rollback()
+        assert db.query(func.count(models.Business.id)).scalar() == 2
+        assert db.query(func.count(models.Transaction.id)).scalar() == 26
+        db.close()
+
+    def test_copy_text_escaping(self):
+        fields = [tenant_export_service._copy_field(v) for v in (None, "a\tb\nc\\d", 12, datetime(2026, 1, 2, 3, 4))]
+        assert fields == ["\\N", "a\\tb\\nc\\\\d", "12", "2026-01-02T03:04:00"]